@@ -9,7 +9,11 @@ import asyncio
 import adafruit_pcf8523
 import adafruit_pcf8523_timer
 import simple_particle_sim
-import adafruit_imageload
+import rtc_clock
+import frame_clock
+import i2c_bus
+import moon_scene
+import palette_fx
 from os import remove
 from adafruit_hx8357 import HX8357
 from adafruit_display_text import label
@@ -29,7 +33,27 @@ ROCKET_COLORS = 6 # The number of unique colors in the rocket
 EPOCH_CYCLE = 1 # Number of times light has hit the moon and back from Marriage timestamp to program save
 NUM_PARTICLES = 50 # Number of particles to maintain in the particle sim
 MAX_PARTICLE_SPEED = -35 # Max speed of particles in pixels per update
+STAR_COLORS = 3 # Number of palette slots the stars are spread over, each twinkles on its own. With the background, 3 fit the star bitmap in 2 bits per pixel, 38KB. 4 to 15 take 4 bits, 77KB
+TWINKLE_EVERY = 4 # Frames per twinkle step. Each step writes the star palette, which has displayio refresh the whole star layer that frame, about 155k pixels instead of 140k
+PARTICLE_BULK = False # Draw each star move with one bitmaptools call instead of two pixel writes. Off until it is timed on
+# the device: host/particle_bench.py shows no speedup on the host, where both are Python
+PARTICLE_ARRAYS = False # Keep the stars in ulab arrays and move them with whole-array operations. Pays off with hundreds of stars. Only run against NumPy on the host so far, not yet on the device's ulab
+BAKED_STARS_PATH = "/starfield.bin" # Play this loop baked by host/bake_starfield.py instead of simulating the stars, if it is there. None to always simulate
+STREAM_TILES = False # Read only the tiles in use from the sprite sheet on flash instead of loading the whole sheet into RAM.
+# Off: all 12 tiles shown are cached at boot and never change, so the cache bitmap only saves 1792 of the sheet's 4864
+# bytes, and on the host the provider's file, palette and slot tables held 5KB more than loading the sheet did
+TILE_CACHE_SLOTS = 12 # Number of tiles the streamed tile cache holds, enough for every tile on screen at once
+PRESCALE_PLANETS = True # Build 4x copies of the earth and moon tiles at boot instead of scaling the planet group on every refresh. Costs 16KB
+PLANET_CACHE_PATH = "/planet_tiles.bin" # Where the 4x planet tiles are kept between boots, None to build them every boot
+OCCLUDE_STARS = True # Skip drawing stars hidden behind the planets, rocket and text. Costs a 1 bit screen sized mask
 MARRIAGE_EPOCH = 1634061600 # Number of seconds since unix epoch to date of marriage
+RTC_SYNC_INTERVAL = 300 # Number of seconds between reads of the RTC, the software clock fills in between
+TIMESTAMP_INTERVAL = 3600 # Number of seconds between writes of timestamp.txt. Every write wears the same FAT and directory sectors, hourly they last about 11 years. A reboot works the counter out from the last write, so it can start up to this many seconds' worth of counts higher
+FRAME_RATE = 4 # Number of frames per second, paced by timer B of the RTC
+GOVERN_FRAMES = True # Drop stars, then frames, while frames keep running over their period, and bring them back when there is time
+GOVERNOR_LEVELS = ((NUM_PARTICLES, 1), (NUM_PARTICLES * 3 // 4, 1), (NUM_PARTICLES // 2, 1), (NUM_PARTICLES // 2, 2)) # Star count and frame tick divider of each quality level, best first
+TRACE_PATH = None # Set to a file such as "/trace.bin" to record every frame for replay with host/replay.py
+TRACE_SEED = 1 # Random seed used while recording a trace
 
 # Component Pins
 spi = board.SPI()
@@ -42,8 +66,14 @@ i2c = busio.I2C(board.SCL, board.SDA)
 # Component objects
 display = HX8357(display_bus, width=480, height=320, rotation=180)
 display.auto_refresh = False
+# adafruit_pcf8523 only finds the RTC while the Timer B source is at its reset value, and the frame clock
+# changes it, so put it back first or the RTC is not found after a reload
+timer = adafruit_pcf8523_timer.Timer(i2c)
+timer.timerB_enabled = False
+timer.timerB_frequency = timer.TIMER_FREQ_1_3600HZ
 rtc = adafruit_pcf8523.PCF8523(i2c)
-timer = adafruit_pcf8523_timer.Timer(rtc.i2c_device)
+clock = rtc_clock.RTCClock(rtc, RTC_SYNC_INTERVAL)
+bus = i2c_bus.I2CBusManager(rtc.i2c_device) # Queues register access from the frame loop so it runs between renders
 
 # Import time stamp and format to # of cycles
 # If something goes wrong, it is most likely because the clock is dead or something went wrong writing to the timestamp file
@@ -51,7 +81,7 @@ try:
     tsf = open("timestamp.txt", "r")
     imported_ts = tsf.read()
     tsf.close()
-    current_cycle = (int(time.mktime(rtc.datetime)) - int(imported_ts))/3
+    current_cycle = (clock.now() - int(imported_ts))/3
     cc_sci_not = "{:.3e}".format(float(current_cycle))
 except:
     current_cycle = 0
@@ -77,7 +107,44 @@ counter_label.x = 10 * TILE_WIDTH
 counter_label.y = 8 * TILE_HEIGHT
 
 # Particle system config
-particle_system = simple_particle_sim.ParticleSystem(NUM_PARTICLES, SCREEN_HEIGHT, SCREEN_WIDTH, MAX_PARTICLE_SPEED, 0, 0, 0, SCREEN_WIDTH - 1, 0, rand_y=True)
+# num_particles, system_height, system_width, min_dx, min_dy, max_dx, max_dy, start_x, start_y, rand_x, rand_y, colors
+particle_args = (NUM_PARTICLES, SCREEN_HEIGHT, SCREEN_WIDTH, MAX_PARTICLE_SPEED, 0, 0, 0, SCREEN_WIDTH - 1, 0, False, True, STAR_COLORS)
+
+# The trace has to start before the particle system so the starting particles can be replayed
+trace = None
+if TRACE_PATH:
+    # Only loaded when tracing, to keep its code out of RAM otherwise
+    import frame_trace
+    trace = frame_trace.FrameTraceWriter(TRACE_PATH, TRACE_SEED, particle_args, current_cycle)
+
+# A trace replays the live simulation, so the baked stars are only played when not tracing
+# The modules of optional features are only loaded when the feature is on, to keep their code out of RAM otherwise
+particle_system = None
+if BAKED_STARS_PATH and trace is None:
+    import baked_starfield
+    try:
+        particle_system = baked_starfield.BakedStarfield(BAKED_STARS_PATH)
+    except OSError:
+        print("No baked starfield at {}, simulating the stars".format(BAKED_STARS_PATH))
+    except ValueError as e:  # A damaged file, or one baked by another version
+        print("{}, simulating the stars".format(e))
+    # A file baked for another screen or palette would draw in the wrong place, or past the slots palette_fx twinkles
+    if particle_system is not None and (particle_system.system_width, particle_system.system_height, particle_system.colors) != (SCREEN_WIDTH, SCREEN_HEIGHT, STAR_COLORS):
+        print("Baked starfield at {} is {}x{} with {} colors, simulating the stars".format(
+            BAKED_STARS_PATH, particle_system.system_width, particle_system.system_height, particle_system.colors))
+        particle_system.close()
+        particle_system = None
+
+if particle_system is None and PARTICLE_ARRAYS:
+    import particle_arrays
+    if particle_arrays.np is not None:
+        particle_system = particle_arrays.ArrayParticleSystem(*particle_args)
+
+if particle_system is None:
+    particle_system = simple_particle_sim.ParticleSystem(*particle_args, bulk=PARTICLE_BULK)
+
+# Twinkle the stars by fading their palette slots, a few palette writes per frame however many stars there are
+twinkle = palette_fx.Twinkle(particle_system.pixel_shader, 1, particle_system.colors, every=TWINKLE_EVERY)
 
 # Planet and Rocket config
 # Create list for tile indicies from sprite sheet
@@ -85,24 +152,36 @@ earth_index = (0, 1, 2, 3)
 moon_index = (4, 5, 6, 7)
 rocket_index = (8, 9, 10, 11)
 
-# Create main sprite sheet
-art_sprite, art_palette = adafruit_imageload.load("art/sprite_sheet.bmp", bitmap=displayio.Bitmap, palette=displayio.Palette)
-art_palette.make_transparent(0)
-
-# Create tile grids for earth, moon, rocket
-earth_tile_grid = displayio.TileGrid(art_sprite, pixel_shader=art_palette, width = 2, height = 2, tile_width = TILE_WIDTH, tile_height = TILE_HEIGHT)
-moon_tile_grid = displayio.TileGrid(art_sprite, pixel_shader=art_palette, width = 2, height = 2, tile_width = TILE_WIDTH, tile_height = TILE_HEIGHT) 
-rocket_tile_grid = displayio.TileGrid(art_sprite, pixel_shader=art_palette, width = 2, height = 2, tile_width = TILE_WIDTH, tile_height = TILE_HEIGHT)
-
-# Set the tiles of each tile grid from the sprite sheet
-for index in range(len(earth_index)):
-    earth_tile_grid[index] = earth_index[index]
-
-for index in range(len(moon_index)):
-    moon_tile_grid[index] = moon_index[index]
-
-for index in range(len(rocket_index)):
-    rocket_tile_grid[index] = rocket_index[index]
+if STREAM_TILES:
+    # Read only the tiles in use from the sprite sheet on flash, into a small cache
+    import tile_provider
+    tiles = tile_provider.TileProvider("art/sprite_sheet.bmp", TILE_WIDTH, TILE_HEIGHT, TILE_CACHE_SLOTS)
+    tiles.palette.make_transparent(0)
+
+    # Create tile grids for earth, moon, rocket, showing the tiles from the sprite sheet
+    earth_tile_grid = tile_provider.StreamedTileGrid(tiles, width = 2, height = 2, tiles = earth_index)
+    moon_tile_grid = tile_provider.StreamedTileGrid(tiles, width = 2, height = 2, tiles = moon_index)
+    rocket_tile_grid = tile_provider.StreamedTileGrid(tiles, width = 2, height = 2, tiles = rocket_index)
+else:
+    # Create main sprite sheet
+    import adafruit_imageload
+    art_sprite, art_palette = adafruit_imageload.load("art/sprite_sheet.bmp", bitmap=displayio.Bitmap, palette=displayio.Palette)
+    art_palette.make_transparent(0)
+
+    # Create tile grids for earth, moon, rocket
+    earth_tile_grid = displayio.TileGrid(art_sprite, pixel_shader=art_palette, width = 2, height = 2, tile_width = TILE_WIDTH, tile_height = TILE_HEIGHT)
+    moon_tile_grid = displayio.TileGrid(art_sprite, pixel_shader=art_palette, width = 2, height = 2, tile_width = TILE_WIDTH, tile_height = TILE_HEIGHT) 
+    rocket_tile_grid = displayio.TileGrid(art_sprite, pixel_shader=art_palette, width = 2, height = 2, tile_width = TILE_WIDTH, tile_height = TILE_HEIGHT)
+
+    # Set the tiles of each tile grid from the sprite sheet
+    for index in range(len(earth_index)):
+        earth_tile_grid[index] = earth_index[index]
+
+    for index in range(len(moon_index)):
+        moon_tile_grid[index] = moon_index[index]
+
+    for index in range(len(rocket_index)):
+        rocket_tile_grid[index] = rocket_index[index]
 
 # Create group for earth, and moon, then separate for rocket and append TGs to groups
 planet_group = displayio.Group()
@@ -128,6 +207,11 @@ rocket_group.y = 15 * TILE_HEIGHT
 # Scale up the planet group so the planets are bigger
 planet_group.scale = PLANET_SCALE
 
+# Swap in copies of the planet tiles already scaled up, so refreshes don't scale them
+if PRESCALE_PLANETS:
+    import asset_cache
+    asset_cache.prescale_group(planet_group, PLANET_CACHE_PATH)
+
 planet_rocket = displayio.Group()
 planet_rocket.append(planet_group)
 planet_rocket.append(rocket_group)
@@ -145,6 +229,11 @@ display_group.append(text_group)
 # Display groups
 display.show(display_group)
 
+# Stars behind the planets, rocket and text are neither drawn nor refreshed
+if OCCLUDE_STARS:
+    import occlusion
+    particle_system.occlusion = occlusion.OcclusionMask(SCREEN_WIDTH, SCREEN_HEIGHT, (planet_group, rocket_group, text_group), particle_system.bitmap)
+
 # Configure timer. Needs to fire at 3 seconds, and enable the interrupt pin when doing so
 # The timer should have a frequency of 1Hz. A value of 3 counts at 1hz would give 3 seconds
 timer.timer_enabled = False
@@ -153,59 +242,84 @@ timer.timer_value = 3
 timer.timer_status = False
 timer.timer_enabled = True
 
+# Configure timer B to pace the frames. It counts down from a 64Hz source divided down to the frame rate
+frames = frame_clock.FrameClock(timer, FRAME_RATE, bus=bus)
+
+# Measure each frame's work and trade stars and frames for time when it keeps running long
+governor = None
+if GOVERN_FRAMES:
+    import frame_governor
+    governor = frame_governor.FrameGovernor(frames.rate, GOVERNOR_LEVELS)
+
 # What to do when the timer goes off
-# First delete current time stamp file
-# Write new timestamp
+# Write new timestamp, if the last one is old enough
 # Update cycle count
 # Reset the alarm
+timestamp_seconds = None # clock.seconds() at the last timestamp write
 async def on_timer(timer_status, clock, label):
     if timer_status:
-        try:
-            with open("/timestamp.txt", "w") as ts:
-                dt = clock.datetime
-                ts.write(str(time.mktime(dt)))
-                ts.flush()
-        except OSError as e:  # Typically when the filesystem isn't writeable...
-            print(e)
-            
+        global timestamp_seconds
+        seconds = clock.seconds()
+        if timestamp_seconds is None or seconds - timestamp_seconds >= TIMESTAMP_INTERVAL:
+            timestamp_seconds = seconds
+            try:
+                with open("/timestamp.txt", "w") as ts:
+                    ts.write(str(clock.now()))
+                    ts.flush()
+            except OSError as e:  # Typically when the filesystem isn't writeable...
+                print(e)
+
         global current_cycle
         current_cycle += 1
-        cc_sci_not = "{:.3e}".format(float(current_cycle))
-        label.text = str(cc_sci_not) + " times!"
-        timer.timer_status = False
+        label.text = moon_scene.counter_text(current_cycle)
+        await frames.clear_flags(frame_clock.CTAF)
     else:
         pass
             
 
 async def main(rtg):
-    # Create the timer task
-    timer_task = asyncio.create_task(on_timer(timer.timer_status, rtc, counter_label))
-    
-    # Let it run 
-    await asyncio.gather(timer_task)
-
-    # Update particles
-    particle_system.remove_out_of_bounds()
-    particle_system.update()
-
-    if rtg.x < (12 * TILE_WIDTH) and rtg.flip_y:
-        rtg.x += (4 * TILE_WIDTH)
-    elif rtg.x == (12 * TILE_WIDTH) and rtg.flip_y:
-        rtg.flip_y = False
-    elif not rtg.flip_y and rtg.x > (2 * TILE_WIDTH):
-        rtg.x -= (4 * TILE_WIDTH)
-    elif rtg.x == (0) and not rtg.flip_y:
-        rtg.flip_y  = True
-
-    display.refresh()
-    time.sleep(0.25)
+    # Start the I2C queue, then polling timer B for frame ticks through it
+    bus_task = asyncio.create_task(bus.run())
+    frame_task = asyncio.create_task(frames.run())
+
+    while True:
+        # Wait for the next frame tick
+        ticks = await frames.wait()
+        if governor is not None and not governor.begin_frame(ticks):
+            continue
+        if trace is not None:
+            trace.begin_frame()
+
+        # Create the timer task
+        # The frame clock read Control_2 for the tick, and the Timer A flag is in the same byte
+        timer_status = bool(frames.control & frame_clock.CTAF)
+        timer_task = asyncio.create_task(on_timer(timer_status, clock, counter_label))
+
+        # Let it run
+        await asyncio.gather(timer_task)
+        if trace is not None:
+            trace.lap(0)
+
+        # Update particles
+        particle_system.remove_out_of_bounds()
+        particle_system.update()
+        twinkle.update()
+        if trace is not None:
+            trace.lap(1)
+
+        moon_scene.step_rocket(rtg, TILE_WIDTH)
+        if trace is not None:
+            trace.lap(2)
+
+        display.refresh()
+        if trace is not None:
+            trace.lap(3)
+            trace.end_frame(timer_status, clock.now(), current_cycle, rtg, ticks, particle_system)
+        if governor is not None and governor.end_frame():
+            particle_system.resize(governor.particles)
 
 
 # refresh the display after everything is set up
 display.refresh()
 
-while True:
-    asyncio.run(main(rocket_tile_grid))
-
-
-
+asyncio.run(main(rocket_tile_grid))
@@ -0,0 +1,27 @@
+# SPDX-License-Identifier: MIT
+
+# Host stand-in for adafruit_bitmap_font.bitmap_font. The font file is not read, every glyph is a solid box
+# of the same size, which is all the host needs to lay out and occlude labels.
+
+GLYPH_WIDTH = 8 # Width of every glyph in pixels
+GLYPH_HEIGHT = 16 # Height of every glyph in pixels
+
+class Font:
+    """
+    Stand-in for a loaded font.
+
+    Attributes:
+        path (str): The font file asked for.
+        glyph_width (int): Width of every glyph in pixels. Host only.
+        glyph_height (int): Height of every glyph in pixels. Host only.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.glyph_width = GLYPH_WIDTH
+        self.glyph_height = GLYPH_HEIGHT
+
+    def get_bounding_box(self) -> tuple:
+        return self.glyph_width, self.glyph_height, 0, 0
+
+def load_font(path: str, bitmap=None) -> Font:
+    return Font(path)
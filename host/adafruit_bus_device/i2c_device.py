@@ -0,0 +1,53 @@
+# SPDX-License-Identifier: MIT
+
+# Host stand-in for adafruit_bus_device.i2c_device, with the same behaviour as the library on the fake busio.I2C.
+
+class I2CDevice:
+    """
+    Stand-in for adafruit_bus_device.i2c_device.I2CDevice.
+    """
+    def __init__(self, i2c, device_address: int, probe: bool = True):
+        self.i2c = i2c
+        self.device_address = device_address
+        if probe:
+            self._probe_for_device()
+
+    def readinto(self, buf, *, start: int = 0, end: int = None):
+        if end is None:
+            end = len(buf)
+        self.i2c.readfrom_into(self.device_address, buf, start=start, end=end)
+
+    def write(self, buf, *, start: int = 0, end: int = None):
+        if end is None:
+            end = len(buf)
+        self.i2c.writeto(self.device_address, buf, start=start, end=end)
+
+    def write_then_readinto(self, out_buffer, in_buffer, *, out_start: int = 0, out_end: int = None,
+                            in_start: int = 0, in_end: int = None):
+        if out_end is None:
+            out_end = len(out_buffer)
+        if in_end is None:
+            in_end = len(in_buffer)
+        self.i2c.writeto_then_readfrom(self.device_address, out_buffer, in_buffer, out_start=out_start, out_end=out_end,
+                                       in_start=in_start, in_end=in_end)
+
+    def __enter__(self):
+        # The library spins until the lock is free. Nothing else can free it on the host, so fail instead of hanging.
+        if not self.i2c.try_lock():
+            raise RuntimeError("I2C bus is already locked, nested I2CDevice use")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.i2c.unlock()
+        return False
+
+    def _probe_for_device(self):
+        with self:
+            try:
+                self.i2c.writeto(self.device_address, b"")
+            except OSError:
+                try:
+                    result = bytearray(1)
+                    self.i2c.readfrom_into(self.device_address, result)
+                except OSError:
+                    raise ValueError("No I2C device at address: 0x%x" % self.device_address)
@@ -0,0 +1,55 @@
+# SPDX-License-Identifier: MIT
+
+# Host stand-in for adafruit_display_text.label. The text is one TileGrid of solid glyph boxes, rebuilt
+# whenever the text changes, with the label y at the middle of the text as in the library.
+
+import displayio
+
+class Label(displayio.Group):
+    """
+    Stand-in for adafruit_display_text.label.Label.
+
+    Attributes:
+        font: The font the text is laid out in.
+        color (int): The text color.
+        text (str): The text shown.
+    """
+    def __init__(self, font, *, text: str = "", color: int = 0xFFFFFF, scale: int = 1, x: int = 0, y: int = 0, **kwargs):
+        super().__init__(scale=scale, x=x, y=y)
+        self.font = font
+        self._palette = displayio.Palette(2)
+        self._palette.make_transparent(0)
+        self.color = color
+        self._text = None
+        self.text = text
+
+    @property
+    def color(self) -> int:
+        return self._palette[1]
+
+    @color.setter
+    def color(self, color: int):
+        self._palette[1] = color
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    @text.setter
+    def text(self, text: str):
+        if text == self._text:
+            return
+        self._text = text
+        width = self.font.glyph_width
+        height = self.font.glyph_height
+        bitmap = displayio.Bitmap(max(len(text), 1) * width, height, 2)
+        for index, character in enumerate(text):
+            if character != " ":
+                for y in range(height):
+                    for x in range(index * width, (index + 1) * width - 1):
+                        bitmap[x, y] = 1
+        tile_grid = displayio.TileGrid(bitmap, pixel_shader=self._palette, y=-(height // 2))
+        if len(self):
+            self[0] = tile_grid
+        else:
+            self.append(tile_grid)
@@ -0,0 +1,122 @@
+# SPDX-License-Identifier: MIT
+
+# Host stand-in for adafruit_hx8357. Nothing is drawn: a refresh works out which areas of the screen the core
+# would send, the way displayio decides it, and puts the time that takes on a VirtualClock.
+
+import displayio
+
+# A VirtualClock refreshes put their time on, or None. Host scripts that cannot reach the display a script
+# creates itself (like code.py) set it first.
+CLOCK = None
+
+# Bits sent per pixel, the display runs in 16 bit color
+BITS_PER_PIXEL = 16
+
+# Rough time the core takes to composite one pixel of a refresh area before sending it
+COMPOSE_NS_PER_PIXEL = 300
+
+# Rough time each refresh area costs on top of its pixels, setting the display window and the SPI transfer up
+AREA_NS = 50000
+
+class HX8357:
+    """
+    Stand-in for adafruit_hx8357.HX8357.
+
+    Attributes:
+        width (int): Width of the screen in pixels.
+        height (int): Height of the screen in pixels.
+        auto_refresh (bool): Kept for code.py, refreshes only happen when refresh() is called.
+        root_group: The Group shown, or None.
+        refreshes (int): The number of refresh() calls. Host only.
+        areas (int): The number of areas sent over all refreshes. Host only.
+        pixels (int): The number of pixels sent over all refreshes. Host only.
+        refresh_ns (int): How long the last refresh took. Host only.
+    """
+    def __init__(self, display_bus, *, width: int = 480, height: int = 320, rotation: int = 0, **kwargs):
+        self.width = width
+        self.height = height
+        self.rotation = rotation
+        self.auto_refresh = True
+        self.root_group = None
+        self.refreshes = 0
+        self.areas = 0
+        self.pixels = 0
+        self.refresh_ns = 0
+        self._baudrate = getattr(display_bus, "baudrate", 24000000)
+        self._shown = {}
+        self._palette_writes = {}
+
+    def show(self, group):
+        self.root_group = group
+        self._shown = {}
+
+    def _collect(self, layer, x: int, y: int, scale: int, found: list):
+        if layer.hidden:
+            return
+        if isinstance(layer, displayio.TileGrid):
+            found.append((layer, x + layer.x * scale, y + layer.y * scale, scale))
+            return
+        x += layer.x * scale
+        y += layer.y * scale
+        scale *= layer.scale
+        for index in range(len(layer)):
+            self._collect(layer[index], x, y, scale, found)
+
+    def refresh(self, *, target_frames_per_second: int = None, minimum_frames_per_second: int = 0) -> bool:
+        found = []
+        if self.root_group is not None:
+            self._collect(self.root_group, 0, 0, 1, found)
+
+        # Areas of TileGrids that moved, changed tiles or went away, of dirty bitmaps, and of palettes written to
+        areas = []
+        shown = {}
+        for tile_grid, x, y, scale in found:
+            width = tile_grid.width * tile_grid.tile_width * scale
+            height = tile_grid.height * tile_grid.tile_height * scale
+            if tile_grid.transpose_xy:
+                width, height = height, width
+            rect = (x, y, x + width, y + height)
+            tiles = tuple(tile_grid[index] for index in range(tile_grid.width * tile_grid.height))
+            signature = (rect, tile_grid.flip_x, tile_grid.flip_y, tile_grid.transpose_xy, tiles, id(tile_grid.bitmap))
+            shown[id(tile_grid)] = (signature, rect)
+            old = self._shown.pop(id(tile_grid), None)
+            shader = tile_grid.pixel_shader
+            palette_writes = getattr(shader, "writes", 0)
+            if old is None or old[0] != signature:
+                if old is not None:
+                    areas.append(old[1])
+                areas.append(rect)
+            elif self._palette_writes.get(id(shader), palette_writes) != palette_writes:
+                areas.append(rect)
+            else:
+                dirty = tile_grid.bitmap.dirty_area
+                if dirty[2] > dirty[0] and dirty[3] > dirty[1]:
+                    if tiles == (0,) and not (tile_grid.flip_x or tile_grid.flip_y or tile_grid.transpose_xy) and \
+                            tile_grid.tile_width == tile_grid.bitmap.width and tile_grid.tile_height == tile_grid.bitmap.height:
+                        areas.append((x + dirty[0] * scale, y + dirty[1] * scale, x + dirty[2] * scale, y + dirty[3] * scale))
+                    else:
+                        areas.append(rect)
+            self._palette_writes[id(shader)] = palette_writes
+        for _, rect in self._shown.values():
+            areas.append(rect)
+        self._shown = shown
+        for tile_grid, _, _, _ in found:
+            tile_grid.bitmap.clean()
+
+        pixels = 0
+        sent = 0
+        for x1, y1, x2, y2 in areas:
+            x1 = max(x1, 0)
+            y1 = max(y1, 0)
+            x2 = min(x2, self.width)
+            y2 = min(y2, self.height)
+            if x2 > x1 and y2 > y1:
+                pixels += (x2 - x1) * (y2 - y1)
+                sent += 1
+        self.refresh_ns = sent * AREA_NS + pixels * (COMPOSE_NS_PER_PIXEL + BITS_PER_PIXEL * 1000000000 // self._baudrate)
+        self.refreshes += 1
+        self.areas += sent
+        self.pixels += pixels
+        if CLOCK is not None:
+            CLOCK.advance_ns(self.refresh_ns)
+        return True
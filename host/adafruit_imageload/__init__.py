@@ -0,0 +1,33 @@
+# SPDX-License-Identifier: MIT
+
+# Host stand-in for adafruit_imageload, loading 8 bit uncompressed BMP files only, like art/sprite_sheet.bmp.
+
+import struct
+
+def load(file_or_filename, *, bitmap=None, palette=None):
+    with open(file_or_filename, "rb") as file:
+        data = file.read()
+    if data[0:2] != b"BM":
+        raise ValueError("host adafruit_imageload only loads BMP files")
+    data_offset = struct.unpack_from("<I", data, 10)[0]
+    header_size, width, height, _, bits_per_pixel, compression = struct.unpack_from("<IiiHHI", data, 14)
+    colors = struct.unpack_from("<I", data, 46)[0] or 256
+    if bits_per_pixel != 8 or compression != 0:
+        raise NotImplementedError("host adafruit_imageload only loads 8 bit uncompressed BMP files")
+
+    image_palette = None
+    if palette is not None:
+        image_palette = palette(colors)
+        for index in range(colors):
+            blue, green, red = data[14 + header_size + 4 * index:14 + header_size + 4 * index + 3]
+            image_palette[index] = red << 16 | green << 8 | blue
+
+    # Rows are padded to 4 bytes and stored bottom up unless the height is negative
+    image = bitmap(width, abs(height), colors)
+    stride = (width + 3) & ~3
+    for y in range(abs(height)):
+        row = abs(height) - 1 - y if height > 0 else y
+        start = data_offset + row * stride
+        image.data[y * width:(y + 1) * width] = data[start:start + width]
+    image.dirty()
+    return image, image_palette
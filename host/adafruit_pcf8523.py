@@ -0,0 +1,50 @@
+# SPDX-FileCopyrightText: 2016 Philip R. Moyer for Adafruit Industries
+# SPDX-FileCopyrightText: 2016 Radomir Dopieralski for Adafruit Industries
+# SPDX-License-Identifier: MIT
+
+# Host stand-in for adafruit_pcf8523 1.5.16, the version in lib, making the same transactions as the library.
+
+from adafruit_bus_device.i2c_device import I2CDevice
+from adafruit_register import i2c_bit
+from adafruit_register import i2c_bits
+from adafruit_register import i2c_bcd_alarm
+from adafruit_register import i2c_bcd_datetime
+
+STANDARD_BATTERY_SWITCHOVER_AND_DETECTION = 0b000
+BATTERY_SWITCHOVER_OFF = 0b111
+
+class PCF8523:
+    """
+    Stand-in for adafruit_pcf8523.PCF8523.
+    """
+    lost_power = i2c_bit.RWBit(0x03, 7)
+    power_management = i2c_bits.RWBits(3, 0x02, 5)
+    datetime_register = i2c_bcd_datetime.BCDDateTimeRegister(0x03, False, 0)
+    alarm = i2c_bcd_alarm.BCDAlarmTimeRegister(0x0A, has_seconds=False, weekday_shared=False, weekday_start=0)
+    alarm_interrupt = i2c_bit.RWBit(0x00, 1)
+    alarm_status = i2c_bit.RWBit(0x01, 3)
+    battery_low = i2c_bit.ROBit(0x02, 2)
+    high_capacitance = i2c_bit.RWBit(0x00, 7)
+    calibration_schedule_per_minute = i2c_bit.RWBit(0x0E, 7)
+    calibration = i2c_bits.RWBits(7, 0x0E, 0, 1, signed=True)
+
+    def __init__(self, i2c_bus):
+        self.i2c_device = I2CDevice(i2c_bus, 0x68)
+
+        # The library checks for the chip by reading the Timer B frequency bits, which are 1 after a reset
+        buf = bytearray(2)
+        buf[0] = 0x12
+        with self.i2c_device as i2c:
+            i2c.write_then_readinto(buf, buf, out_end=1, in_start=1)
+        if (buf[1] & 0b00000111) != 0b00000111:
+            raise ValueError("Unable to find PCF8523 at i2c address 0x68.")
+
+    @property
+    def datetime(self):
+        return self.datetime_register
+
+    @datetime.setter
+    def datetime(self, value):
+        self.power_management = STANDARD_BATTERY_SWITCHOVER_AND_DETECTION
+        self.datetime_register = value
+        self.lost_power = False
@@ -0,0 +1,20 @@
+# SPDX-License-Identifier: MIT
+
+# Host stand-in for adafruit_register.i2c_bcd_alarm. The app never uses the RTC alarm, so only constructing
+# the register is supported.
+
+class BCDAlarmTimeRegister:
+    """
+    Stand-in for adafruit_register.i2c_bcd_alarm.BCDAlarmTimeRegister.
+    """
+    def __init__(self, register_address: int, has_seconds: bool = True, weekday_shared: bool = True, weekday_start: int = 1):
+        self.register_address = register_address
+        self.has_seconds = has_seconds
+        self.weekday_shared = weekday_shared
+        self.weekday_start = weekday_start
+
+    def __get__(self, obj, objtype=None):
+        raise NotImplementedError("the host stand-in does not support the alarm")
+
+    def __set__(self, obj, value):
+        raise NotImplementedError("the host stand-in does not support the alarm")
@@ -0,0 +1,48 @@
+# SPDX-FileCopyrightText: 2016 Scott Shawcroft for Adafruit Industries
+# SPDX-License-Identifier: MIT
+
+# Host stand-in for adafruit_register.i2c_bcd_datetime, making the same transactions as the library.
+
+import time
+
+def _bcd2bin(value: int) -> int:
+    return value - 6 * (value >> 4)
+
+def _bin2bcd(value: int) -> int:
+    return value + 6 * (value // 10)
+
+class BCDDateTimeRegister:
+    """
+    Stand-in for adafruit_register.i2c_bcd_datetime.BCDDateTimeRegister.
+    """
+    def __init__(self, register_address: int, weekday_first: bool = True, weekday_start: int = 1):
+        self.buffer = bytearray(8)
+        self.buffer[0] = register_address
+        self.weekday_offset = 0 if weekday_first else 1
+        self.weekday_start = weekday_start
+
+    def __get__(self, obj, objtype=None) -> time.struct_time:
+        with obj.i2c_device as i2c:
+            i2c.write_then_readinto(self.buffer, self.buffer, out_end=1, in_start=1)
+        return time.struct_time((
+            _bcd2bin(self.buffer[7]) + 2000,
+            _bcd2bin(self.buffer[6]),
+            _bcd2bin(self.buffer[5 - self.weekday_offset]),
+            _bcd2bin(self.buffer[3]),
+            _bcd2bin(self.buffer[2]),
+            _bcd2bin(self.buffer[1] & 0x7F),
+            _bcd2bin(self.buffer[4 + self.weekday_offset] - self.weekday_start),
+            -1,
+            -1,
+        ))
+
+    def __set__(self, obj, value: time.struct_time):
+        self.buffer[1] = _bin2bcd(value.tm_sec) & 0x7F
+        self.buffer[2] = _bin2bcd(value.tm_min)
+        self.buffer[3] = _bin2bcd(value.tm_hour)
+        self.buffer[4 + self.weekday_offset] = _bin2bcd(value.tm_wday + self.weekday_start)
+        self.buffer[5 - self.weekday_offset] = _bin2bcd(value.tm_mday)
+        self.buffer[6] = _bin2bcd(value.tm_mon)
+        self.buffer[7] = _bin2bcd(value.tm_year - 2000)
+        with obj.i2c_device as i2c:
+            i2c.write(self.buffer)
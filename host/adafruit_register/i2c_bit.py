@@ -0,0 +1,39 @@
+# SPDX-FileCopyrightText: 2016 Scott Shawcroft for Adafruit Industries
+# SPDX-License-Identifier: MIT
+
+# Host stand-in for adafruit_register.i2c_bit, making the same transactions as the library.
+
+class RWBit:
+    """
+    Stand-in for adafruit_register.i2c_bit.RWBit.
+    """
+    def __init__(self, register_address: int, bit: int, register_width: int = 1, lsb_first: bool = True):
+        self.bit_mask = 1 << (bit % 8)
+        self.buffer = bytearray(1 + register_width)
+        self.buffer[0] = register_address
+        if lsb_first:
+            self.byte = bit // 8 + 1
+        else:
+            self.byte = register_width - (bit // 8)
+
+    def __get__(self, obj, objtype=None) -> bool:
+        with obj.i2c_device as i2c:
+            i2c.write_then_readinto(self.buffer, self.buffer, out_end=1, in_start=1)
+        return bool(self.buffer[self.byte] & self.bit_mask)
+
+    def __set__(self, obj, value: bool):
+        with obj.i2c_device as i2c:
+            i2c.write_then_readinto(self.buffer, self.buffer, out_end=1, in_start=1)
+            if value:
+                self.buffer[self.byte] |= self.bit_mask
+            else:
+                self.buffer[self.byte] &= ~self.bit_mask
+            i2c.write(self.buffer)
+
+
+class ROBit(RWBit):
+    """
+    Stand-in for adafruit_register.i2c_bit.ROBit.
+    """
+    def __set__(self, obj, value: bool):
+        raise AttributeError()
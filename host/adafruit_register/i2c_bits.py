@@ -0,0 +1,59 @@
+# SPDX-FileCopyrightText: 2016 Scott Shawcroft for Adafruit Industries
+# SPDX-License-Identifier: MIT
+
+# Host stand-in for adafruit_register.i2c_bits, making the same transactions as the library.
+
+class RWBits:
+    """
+    Stand-in for adafruit_register.i2c_bits.RWBits.
+    """
+    def __init__(self, num_bits: int, register_address: int, lowest_bit: int, register_width: int = 1,
+                 lsb_first: bool = True, signed: bool = False):
+        self.bit_mask = ((1 << num_bits) - 1) << lowest_bit
+        if self.bit_mask >= 1 << (register_width * 8):
+            raise ValueError("Cannot have more bits than register size")
+        self.lowest_bit = lowest_bit
+        self.buffer = bytearray(1 + register_width)
+        self.buffer[0] = register_address
+        self.lsb_first = lsb_first
+        self.sign_bit = (1 << (num_bits - 1)) if signed else 0
+
+    def _order(self):
+        order = range(len(self.buffer) - 1, 0, -1)
+        if not self.lsb_first:
+            order = range(1, len(self.buffer))
+        return order
+
+    def __get__(self, obj, objtype=None) -> int:
+        with obj.i2c_device as i2c:
+            i2c.write_then_readinto(self.buffer, self.buffer, out_end=1, in_start=1)
+        reg = 0
+        for i in self._order():
+            reg = (reg << 8) | self.buffer[i]
+        reg = (reg & self.bit_mask) >> self.lowest_bit
+        if reg & self.sign_bit:
+            reg -= 2 * self.sign_bit
+        return reg
+
+    def __set__(self, obj, value: int):
+        value <<= self.lowest_bit
+        with obj.i2c_device as i2c:
+            i2c.write_then_readinto(self.buffer, self.buffer, out_end=1, in_start=1)
+            order = self._order()
+            reg = 0
+            for i in order:
+                reg = (reg << 8) | self.buffer[i]
+            reg &= ~self.bit_mask
+            reg |= value
+            for i in reversed(order):
+                self.buffer[i] = reg & 0xFF
+                reg >>= 8
+            i2c.write(self.buffer)
+
+
+class ROBits(RWBits):
+    """
+    Stand-in for adafruit_register.i2c_bits.ROBits.
+    """
+    def __set__(self, obj, value: int):
+        raise AttributeError()
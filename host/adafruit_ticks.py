@@ -0,0 +1,25 @@
+# SPDX-License-Identifier: MIT
+
+# Host stand-in for adafruit_ticks. Ticks come from time.monotonic_ns(), looked up on every call so a host
+# script can put time on a VirtualClock, and wrap at 2**29 like the library's.
+
+import time
+
+_TICKS_PERIOD = 1 << 29
+_TICKS_MAX = _TICKS_PERIOD - 1
+_TICKS_HALFPERIOD = _TICKS_PERIOD // 2
+
+def ticks_ms() -> int:
+    return (time.monotonic_ns() // 1000000) & _TICKS_MAX
+
+def ticks_add(ticks: int, delta: int) -> int:
+    if -_TICKS_HALFPERIOD < delta < _TICKS_HALFPERIOD:
+        return (ticks + delta) % _TICKS_PERIOD
+    raise OverflowError("ticks interval overflow")
+
+def ticks_diff(ticks1: int, ticks2: int) -> int:
+    diff = (ticks1 - ticks2) & _TICKS_MAX
+    return ((diff + _TICKS_HALFPERIOD) & _TICKS_MAX) - _TICKS_HALFPERIOD
+
+def ticks_less(ticks1: int, ticks2: int) -> bool:
+    return ticks_diff(ticks1, ticks2) < 0
@@ -0,0 +1,169 @@
+# SPDX-License-Identifier: MIT
+
+# Bake the starfield of code.py into a loop for baked_starfield.BakedStarfield to play on the device, in place of
+# simulating the stars live. Copy the output to the root of CIRCUITPY as starfield.bin (code.py BAKED_STARS_PATH).
+#
+# Usage: python host/bake_starfield.py [--output starfield.bin] [--frames 240] [--seed 1]
+#
+# Once every starting star has left the screen, all stars respawn with the same velocity, so each respawns again
+# a fixed number of frames later with only its y random. The loop is closed by drawing fresh y values for its
+# first stretch, then replaying them so the stars on screen at its end are the ones it started with. The baker
+# checks the whole system state repeats before writing, then plays the file back against the simulation.
+
+import hostenv
+import circuitpython_random
+circuitpython_random.install()
+
+import argparse
+import random
+import struct
+import sys
+import simple_particle_sim
+import baked_starfield
+
+# Constants, as in code.py
+SCREEN_WIDTH = 480 # Width of screen in pixels
+SCREEN_HEIGHT = 320 # Height of screen in pixels
+NUM_PARTICLES = 50 # Number of particles to maintain in the particle sim
+MAX_PARTICLE_SPEED = -35 # Max speed of particles in pixels per update
+STAR_COLORS = 3 # Number of palette slots the stars are spread over
+MAX_WARMUP = 10000 # Frames to wait for the starting stars to leave before giving up
+
+class LoopRandom:
+    """
+    Stands in for the random module of simple_particle_sim. Numbers are drawn fresh and recorded until replay() is
+    called, then the recorded ones are handed out again in order.
+    """
+    def __init__(self):
+        self.recording = None
+        self._replayed = None
+
+    def record(self):
+        self.recording = []
+
+    def replay(self):
+        self._replayed = iter(self.recording)
+
+    def randrange(self, *args):
+        return random.randrange(*args)
+
+    def randint(self, a, b):
+        if self._replayed is not None:
+            return next(self._replayed)
+        value = random.randint(a, b)
+        if self.recording is not None:
+            self.recording.append(value)
+        return value
+
+def lifetime(particle_system):
+    # Frames from a respawn to the next one, which is the same for every star once they all share a velocity
+    particle = simple_particle_sim.Particle(particle_system.system_width - 1, 0, particle_system.p_behavior[0], particle_system.p_behavior[1])
+    frames = 0
+    while not any(particle.is_out_of_bounds(particle_system.system_width, particle_system.system_height)):
+        particle.move()
+        frames += 1
+        if frames > MAX_WARMUP:
+            raise ValueError("respawned stars never leave the screen")
+    return frames
+
+def state(particle_system):
+    return [(p.x, p.y, p.dx, p.dy, p.px, p.py, p.color) for p in particle_system.particles], particle_system._next_color
+
+def step(particle_system):
+    particle_system.remove_out_of_bounds()
+    particle_system.update()
+
+def changes(before, after):
+    # Pixels that differ between two bitmaps, packed as in the baked file
+    return [index | value << baked_starfield.VALUE_SHIFT for index, (old, value) in enumerate(zip(before, after)) if old != value]
+
+def bake(frames, seed, num_particles=NUM_PARTICLES, speed=MAX_PARTICLE_SPEED, colors=STAR_COLORS):
+    """Simulate the starfield into a loop of at least frames frames. Returns the key frame changes, the frame changes and the bitmaps."""
+    loop_random = LoopRandom()
+    device_random = simple_particle_sim.random
+    simple_particle_sim.random = loop_random
+    try:
+        random.seed(seed)
+        particle_system = simple_particle_sim.ParticleSystem(num_particles, SCREEN_HEIGHT, SCREEN_WIDTH, speed, 0, 0, 0, SCREEN_WIDTH - 1, 0,
+                                                             rand_y=True, colors=colors)
+        period = lifetime(particle_system)
+
+        warmup = 0
+        while any((p.dx, p.dy) != particle_system.p_behavior[:2] for p in particle_system.particles):
+            step(particle_system)
+            warmup += 1
+            if warmup > MAX_WARMUP:
+                raise ValueError("the starting stars never leave the screen")
+
+        # The loop is whole lifetimes long, and hands out colors a whole number of times so they line up too
+        length = -(-frames // period) * period
+        while (num_particles * length // period) % colors:
+            length += period
+
+        # The y values drawn from here on are replayed once the loop is nearly over, so the stars respawned in the
+        # last lifetime of the loop match those respawned in the lifetime before it starts
+        loop_random.record()
+        for _ in range(period):
+            step(particle_system)
+        start = state(particle_system)
+        bitmaps = [bytes(particle_system.bitmap.data)]
+        for frame in range(length):
+            if frame == length - period:
+                loop_random.replay()
+            step(particle_system)
+            bitmaps.append(bytes(particle_system.bitmap.data))
+        if state(particle_system) != start or bitmaps[-1] != bitmaps[0]:
+            raise ValueError("the starfield does not loop after {} frames".format(length))
+    finally:
+        simple_particle_sim.random = device_random
+
+    key = changes(bytes(len(bitmaps[0])), bitmaps[0])
+    deltas = [changes(before, after) for before, after in zip(bitmaps, bitmaps[1:])]
+    print("stars respawn every {} frames, the starting stars were gone after {} frames".format(period, warmup))
+    return key, deltas, bitmaps, colors
+
+def write(path, key, deltas, colors):
+    max_changes = max(len(frame) for frame in [key] + deltas)
+    size = 0
+    with open(path, "wb") as file:
+        size += file.write(struct.pack(baked_starfield.HEADER_FORMAT, baked_starfield.MAGIC, baked_starfield.VERSION,
+                                       SCREEN_WIDTH, SCREEN_HEIGHT, colors, len(deltas), max_changes))
+        for frame in [key] + deltas:
+            size += file.write(struct.pack("<I{}I".format(len(frame)), len(frame), *frame))
+    return size, max_changes
+
+def check(path, bitmaps):
+    # Play the file twice through, across the seam, and compare every frame with the simulation
+    player = baked_starfield.BakedStarfield(path)
+    mismatches = 0
+    if bytes(player.bitmap.data) != bitmaps[0]:
+        mismatches += 1
+    loop = len(bitmaps) - 1
+    for frame in range(2 * loop):
+        player.update()
+        if bytes(player.bitmap.data) != bitmaps[frame % loop + 1]:
+            mismatches += 1
+    player.close()
+    return mismatches
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bake the starfield into a seamless loop for baked_starfield.py.")
+    parser.add_argument("--output", default="starfield.bin", help="file to write")
+    parser.add_argument("--frames", type=int, default=240, help="shortest loop length in frames")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    parser.add_argument("--particles", type=int, default=NUM_PARTICLES, help="number of stars")
+    parser.add_argument("--speed", type=int, default=MAX_PARTICLE_SPEED, help="star speed in pixels per frame, negative is leftwards")
+    parser.add_argument("--colors", type=int, default=STAR_COLORS, help="palette slots the stars are spread over")
+    options = parser.parse_args()
+
+    try:
+        key, deltas, bitmaps, colors = bake(options.frames, options.seed, options.particles, options.speed, options.colors)
+    except ValueError as error:
+        print("cannot bake: {}".format(error))
+        sys.exit(1)
+    size, max_changes = write(options.output, key, deltas, colors)
+    per_frame = sum(len(frame) for frame in deltas) / len(deltas)
+    print("{} frames, {:.1f} pixel changes per frame (at most {}), {} bytes".format(len(deltas), per_frame, max_changes, size))
+    mismatches = check(options.output, bitmaps)
+    print("played back twice through: {} mismatched frames".format(mismatches))
+    sys.exit(1 if mismatches else 0)
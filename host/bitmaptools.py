@@ -0,0 +1,88 @@
+# SPDX-License-Identifier: MIT
+
+# Host stand-in for the parts of CircuitPython's bitmaptools the app uses, working on the host
+# displayio.Bitmap. calls counts the calls made, so benchmarks can compare how often each path enters the core.
+
+calls = 0
+
+def _count():
+    global calls
+    calls += 1
+
+def arrayblit(bitmap, data, x1: int = 0, y1: int = 0, x2: int = None, y2: int = None, skip_index: int = None):
+    _count()
+    if x2 is None:
+        x2 = bitmap.width
+    if y2 is None:
+        y2 = bitmap.height
+    width = x2 - x1
+    if len(data) < width * (y2 - y1):
+        raise ValueError("data is too short")
+    pixels = bitmap.data
+    for row in range(y2 - y1):
+        start = (y1 + row) * bitmap.width + x1
+        source = data[row * width:(row + 1) * width]
+        if skip_index is None:
+            pixels[start:start + width] = bytes(source)
+        else:
+            for column, value in enumerate(source):
+                if value != skip_index:
+                    pixels[start + column] = value
+    bitmap.writes += 1
+    bitmap.dirty(x1, y1, x2, y2)
+
+def fill_region(dest_bitmap, x1: int, y1: int, x2: int, y2: int, value: int):
+    _count()
+    x1 = max(x1, 0)
+    y1 = max(y1, 0)
+    x2 = min(x2, dest_bitmap.width)
+    y2 = min(y2, dest_bitmap.height)
+    if x2 <= x1 or y2 <= y1:
+        return
+    row = bytes([value]) * (x2 - x1)
+    pixels = dest_bitmap.data
+    for y in range(y1, y2):
+        start = y * dest_bitmap.width + x1
+        pixels[start:start + x2 - x1] = row
+    dest_bitmap.writes += 1
+    dest_bitmap.dirty(x1, y1, x2, y2)
+
+def draw_line(dest_bitmap, x1: int, y1: int, x2: int, y2: int, value: int):
+    _count()
+    # Bresenham, clipped to the bitmap
+    dx = abs(x2 - x1)
+    dy = -abs(y2 - y1)
+    sx = 1 if x1 < x2 else -1
+    sy = 1 if y1 < y2 else -1
+    error = dx + dy
+    x = x1
+    y = y1
+    pixels = dest_bitmap.data
+    while True:
+        if 0 <= x < dest_bitmap.width and 0 <= y < dest_bitmap.height:
+            pixels[y * dest_bitmap.width + x] = value
+        if x == x2 and y == y2:
+            break
+        doubled = 2 * error
+        if doubled >= dy:
+            error += dy
+            x += sx
+        if doubled <= dx:
+            error += dx
+            y += sy
+    dest_bitmap.writes += 1
+    dest_bitmap.dirty(max(min(x1, x2), 0), max(min(y1, y2), 0), min(max(x1, x2) + 1, dest_bitmap.width), min(max(y1, y2) + 1, dest_bitmap.height))
+
+def readinto(bitmap, file, bits_per_pixel: int, element_size: int = 1, reverse_pixels_in_element: bool = False,
+             swap_bytes_in_element: bool = False, reverse_rows: bool = False):
+    _count()
+    if bits_per_pixel != 8 or element_size != 1 or reverse_pixels_in_element or swap_bytes_in_element:
+        raise NotImplementedError("the host stand-in only reads one byte per pixel")
+    rows = range(bitmap.height - 1, -1, -1) if reverse_rows else range(bitmap.height)
+    for y in rows:
+        row = file.read(bitmap.width)
+        if len(row) < bitmap.width:
+            raise EOFError()
+        bitmap.data[y * bitmap.width:(y + 1) * bitmap.width] = row
+    bitmap.writes += 1
+    bitmap.dirty()
@@ -0,0 +1,15 @@
+# SPDX-License-Identifier: MIT
+
+# Host stand-in for the board module of the Feather RP2040. Pins are just their names.
+
+D7 = "D7"
+D24 = "D24"
+D25 = "D25"
+SCL = "SCL"
+SDA = "SDA"
+
+def SPI():
+    return "SPI"
+
+def I2C():
+    return "I2C"
@@ -0,0 +1,103 @@
+# SPDX-License-Identifier: MIT
+
+# Run the I2C side of the code.py frame loop against the PCF8523 register model and report the bus traffic
+# of each caller, with the frame loop using the drivers directly and through the I2CBusManager queue.
+#
+# Usage: python host/bus_report.py [--seconds N] [--budget N]
+#   --budget fails (exit status 1) if the queued loop makes more than N transactions per second,
+#   so a change that adds bus traffic to the timer or clock code is caught in CI.
+
+import hostenv
+import argparse
+import asyncio
+import sys
+import time
+import busio
+import virtual_clock
+import adafruit_pcf8523
+from adafruit_pcf8523_timer import Timer
+import frame_clock
+from frame_clock import FrameClock
+from i2c_bus import I2CBusManager
+from pcf8523_model import PCF8523Model, REGISTER_COUNT
+from rtc_clock import RTCClock
+
+FRAME_RATE = 4 # Frames per second, as in code.py
+RTC_SYNC_INTERVAL = 300 # Seconds between RTC reads, as in code.py
+FRAME_WORK = 0.1 # Seconds each frame blocks the event loop, standing in for the particle update and refresh
+START_EPOCH = 1700000000
+
+async def frame_loop(seconds, clock, rtc_clock, timer, frames, bus):
+    tasks = [asyncio.create_task(frames.run())]
+    if bus is not None:
+        tasks.append(asyncio.create_task(bus.run()))
+    end = clock.monotonic() + seconds
+    timer_count = 0
+    while clock.monotonic() < end:
+        await frames.wait()
+        # As in code.py, the Timer A flag comes from the Control_2 byte the frame clock read for the tick
+        if frames.control & frame_clock.CTAF:
+            rtc_clock.seconds()
+            timer_count += 1
+            await frames.clear_flags(frame_clock.CTAF)
+        clock.sleep(FRAME_WORK)
+    for task in tasks:
+        task.cancel()
+    return timer_count
+
+def run(seconds, queued):
+    clock = virtual_clock.VirtualClock()
+    model = PCF8523Model(clock, START_EPOCH)
+    i2c = busio.I2C(clock=clock)
+    i2c.attach(0x68, model)
+
+    # The rest of the host runs on the virtual clock too, for adafruit_ticks in RTCClock
+    real_monotonic_ns = time.monotonic_ns
+    time.monotonic_ns = clock.monotonic_ns
+    try:
+        # Setup as in code.py
+        timer = Timer(i2c)
+        timer.timerB_enabled = False
+        timer.timerB_frequency = timer.TIMER_FREQ_1_3600HZ
+        rtc = adafruit_pcf8523.PCF8523(i2c)
+        rtc_clock = RTCClock(rtc, RTC_SYNC_INTERVAL)
+        bus = I2CBusManager(rtc.i2c_device) if queued else None
+        timer.timer_enabled = False
+        timer.timer_frequency = timer.TIMER_FREQ_1HZ
+        timer.timer_value = 3
+        timer.timer_status = False
+        timer.timer_enabled = True
+        frames = FrameClock(timer, FRAME_RATE, bus=bus)
+        setup = i2c.totals()
+        i2c.reset_stats()
+        model.reads = [0] * REGISTER_COUNT
+        model.writes = [0] * REGISTER_COUNT
+
+        timer_count = virtual_clock.run(frame_loop(seconds, clock, rtc_clock, timer, frames, bus), clock)
+    finally:
+        time.monotonic_ns = real_monotonic_ns
+    return i2c, model, setup, timer_count, frames, rtc_clock
+
+def report(name, seconds, i2c, model, setup, timer_count, frames, rtc_clock):
+    total = i2c.totals()
+    print("{}: {} frames, {} missed ticks, {} timer A, {} RTC syncs, setup took {} transactions".format(
+        name, frames.ticks, frames.missed, timer_count, rtc_clock.syncs, setup.transactions))
+    print("  {: <28} {: >12} {: >10} {: >12} {: >10}".format("caller", "transactions", "bytes", "per second", "per frame"))
+    for caller, stats in sorted(i2c.callers.items(), key=lambda item: -item[1].transactions) + [("total", total)]:
+        print("  {: <28} {: >12} {: >10} {: >12.1f} {: >10.2f}".format(
+            caller, stats.transactions, stats.bytes, stats.transactions / seconds, stats.transactions / max(frames.ticks, 1)))
+    print("  register reads  " + " ".join("{:02x}:{}".format(r, n) for r, n in enumerate(model.reads) if n))
+    print("  register writes " + " ".join("{:02x}:{}".format(r, n) for r, n in enumerate(model.writes) if n))
+    return total.transactions / seconds
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report I2C traffic of the frame loop against the PCF8523 model.")
+    parser.add_argument("--seconds", type=int, default=600, help="virtual seconds to run, 600 by default")
+    parser.add_argument("--budget", type=float, help="most transactions per second allowed for the queued loop")
+    options = parser.parse_args()
+
+    report("direct", options.seconds, *run(options.seconds, False))
+    rate = report("queued", options.seconds, *run(options.seconds, True))
+    if options.budget is not None and rate > options.budget:
+        print("queued loop made {:.1f} transactions per second, over the budget of {}".format(rate, options.budget))
+        sys.exit(1)
@@ -0,0 +1,159 @@
+# SPDX-License-Identifier: MIT
+
+# Host stand-in for busio.I2C. Devices are register models attached by address, and every transaction is
+# counted against the code that made it, so changes to how the drivers use the bus can be measured.
+
+import errno
+import sys
+
+# Devices attached to every new bus, by address. Host scripts that cannot reach the bus a script creates
+# itself (like code.py) put their models here first.
+DEVICES = {}
+
+# A VirtualClock every new bus puts the time of its transactions on, for the same reason, or None
+CLOCK = None
+
+# Modules that make transactions on behalf of someone else. A transaction is counted against the first
+# caller on the stack outside of these.
+PASS_THROUGH = ("busio", "adafruit_bus_device", "adafruit_register", "adafruit_pcf8523")
+
+# Clock cycles on the wire for the start and stop conditions of a transaction, and for each byte and its ack
+START_STOP_CLOCKS = 2
+BYTE_CLOCKS = 9
+
+class CallerStats:
+    """
+    A helper class representing the bus traffic of one caller.
+
+    Attributes:
+        transactions (int): The number of transactions, each one start to stop.
+        bytes_written (int): The number of bytes written, including register addresses.
+        bytes_read (int): The number of bytes read.
+    """
+    def __init__(self):
+        self.transactions = 0
+        self.bytes_written = 0
+        self.bytes_read = 0
+
+    @property
+    def bytes(self) -> int:
+        """All bytes moved over the bus, excluding device addresses."""
+        return self.bytes_written + self.bytes_read
+
+
+class I2C:
+    """
+    Stand-in for busio.I2C.
+
+    Attributes:
+        frequency (int): The bus clock in Hz.
+        devices (dict): The device models on the bus, by address. Host only.
+        clock: A VirtualClock advanced by the time each transaction takes on the wire, or None. CLOCK by default. Host only.
+        callers (dict): A CallerStats for each caller, by "module.function". Host only.
+    """
+    def __init__(self, scl=None, sda=None, *, frequency: int = 100000, timeout: int = 255, clock=None):
+        self.frequency = frequency
+        self.devices = dict(DEVICES)
+        self.clock = clock if clock is not None else CLOCK
+        self.callers = {}
+        self._locked = False
+
+    def attach(self, address: int, device):
+        """Put a device model on the bus. It needs i2c_write(data) and i2c_read(length) methods. Host only."""
+        self.devices[address] = device
+
+    def try_lock(self) -> bool:
+        if self._locked:
+            return False
+        self._locked = True
+        return True
+
+    def unlock(self):
+        self._locked = False
+
+    def deinit(self):
+        self.devices = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.deinit()
+
+    def scan(self) -> list:
+        self._check_lock()
+        return sorted(self.devices)
+
+    def readfrom_into(self, address: int, buffer, *, start: int = 0, end: int = None):
+        if end is None:
+            end = len(buffer)
+        device = self._device(address)
+        buffer[start:end] = device.i2c_read(end - start)
+        self._account(0, end - start)
+
+    def writeto(self, address: int, buffer, *, start: int = 0, end: int = None):
+        if end is None:
+            end = len(buffer)
+        device = self._device(address)
+        device.i2c_write(bytes(buffer[start:end]))
+        self._account(end - start, 0)
+
+    def writeto_then_readfrom(self, address: int, out_buffer, in_buffer, *, out_start: int = 0, out_end: int = None,
+                              in_start: int = 0, in_end: int = None):
+        if out_end is None:
+            out_end = len(out_buffer)
+        if in_end is None:
+            in_end = len(in_buffer)
+        device = self._device(address)
+        # Copy out first, out_buffer and in_buffer are often the same buffer
+        device.i2c_write(bytes(out_buffer[out_start:out_end]))
+        in_buffer[in_start:in_end] = device.i2c_read(in_end - in_start)
+        # One transaction with a repeated start, so two device address bytes
+        self._account(out_end - out_start, in_end - in_start, addresses=2)
+
+    def _check_lock(self):
+        if not self._locked:
+            raise RuntimeError("Function requires lock")
+
+    def _device(self, address: int):
+        self._check_lock()
+        device = self.devices.get(address)
+        if device is None:
+            raise OSError(errno.ENODEV, "No such device")
+        return device
+
+    def _account(self, written: int, read: int, addresses: int = 1):
+        caller = self.caller()
+        stats = self.callers.get(caller)
+        if stats is None:
+            stats = self.callers[caller] = CallerStats()
+        stats.transactions += 1
+        stats.bytes_written += written
+        stats.bytes_read += read
+        if self.clock is not None:
+            clocks = START_STOP_CLOCKS * addresses + BYTE_CLOCKS * (addresses + written + read)
+            self.clock.advance_ns(clocks * 1000000000 // self.frequency)
+
+    @staticmethod
+    def caller() -> str:
+        """The "module.function" the current transaction is counted against. Host only."""
+        frame = sys._getframe(1)
+        while frame is not None:
+            module = frame.f_globals.get("__name__", "?")
+            if module.split(".")[0] not in PASS_THROUGH:
+                return "{}.{}".format(module, frame.f_code.co_name)
+            frame = frame.f_back
+        return "?"
+
+    def totals(self) -> CallerStats:
+        """All traffic on the bus so far, summed over callers. Host only."""
+        total = CallerStats()
+        for stats in self.callers.values():
+            total.transactions += stats.transactions
+            total.bytes_written += stats.bytes_written
+            total.bytes_read += stats.bytes_read
+        return total
+
+    def reset_stats(self):
+        """Forget the traffic counted so far. Host only."""
+        self.callers = {}
@@ -0,0 +1,85 @@
+# SPDX-License-Identifier: MIT
+
+# Host stand-in for CircuitPython's random module. It follows the core's yasmarang generator, so the
+# same seed gives the same numbers as on the device. It cannot simply be named random.py, because that
+# would hide the standard library module from everything else on the host, so call install() before
+# importing any device code instead.
+
+import random as _host_random
+import sys
+
+_MASK = 0xFFFFFFFF
+
+_pad = 0xEDA4BABA
+_n = 69
+_d = 233
+_dat = 0
+
+def _yasmarang() -> int:
+    global _pad, _n, _d, _dat
+    _pad = (_pad + _dat + _d * _n) & _MASK
+    _pad = ((_pad << 3) + (_pad >> 29)) & _MASK
+    _n = _pad | 2
+    _d = (_d ^ (((_pad << 31) + (_pad >> 1)) & _MASK)) & _MASK
+    _dat = (_dat ^ (_pad & 0xFF) ^ (_d >> 8) ^ 1) & 0xFF
+    return (_pad ^ (_d << 5) ^ (_pad >> 18) ^ (_dat << 1)) & _MASK
+
+def _randbelow(n: int) -> int:
+    mask = 1
+    while (n & mask) < n:
+        mask = (mask << 1) | 1
+    r = _yasmarang() & mask
+    while r >= n:
+        r = _yasmarang() & mask
+    return r
+
+def seed(a: int):
+    global _pad, _n, _d, _dat
+    _pad = a & _MASK
+    _n = 69
+    _d = 233
+    _dat = 0
+
+def getrandbits(k: int) -> int:
+    if not 0 <= k <= 32:
+        raise ValueError("bits must be 32 or less")
+    return _yasmarang() & ((1 << k) - 1)
+
+def randrange(start: int, stop: int = None, step: int = 1) -> int:
+    if stop is None:
+        start, stop = 0, start
+    if step > 0:
+        n = (stop - start + step - 1) // step
+    elif step < 0:
+        n = (stop - start + step + 1) // step
+    else:
+        raise ValueError("zero step")
+    if n <= 0:
+        raise ValueError("empty range for randrange")
+    return start + step * _randbelow(n)
+
+def randint(a: int, b: int) -> int:
+    if b < a:
+        raise ValueError("empty range for randint")
+    return a + _randbelow(b - a + 1)
+
+def choice(seq):
+    if not seq:
+        raise IndexError("empty sequence")
+    return seq[_randbelow(len(seq))]
+
+def random() -> float:
+    return (_yasmarang() >> 9) / (1 << 23)
+
+def uniform(a: float, b: float) -> float:
+    return a + (b - a) * random()
+
+def __getattr__(name):
+    # Anything the device module does not have, such as random.Random, comes from the host module
+    return getattr(_host_random, name)
+
+def install():
+    """
+    Make "import random" give this module from now on. Call it before importing device code.
+    """
+    sys.modules["random"] = sys.modules[__name__]
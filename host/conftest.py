@@ -0,0 +1,19 @@
+# SPDX-License-Identifier: MIT
+
+# Fixtures shared by the host tests. Run them from the host folder with: python -m pytest -q
+# (from the top folder, python -m would put code.py ahead of the standard library's code module)
+
+import hostenv
+import circuitpython_random
+circuitpython_random.install()
+
+import time
+import pytest
+import virtual_clock
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A VirtualClock that time.monotonic_ns follows for the test, so adafruit_ticks and the libraries run on it."""
+    clock = virtual_clock.VirtualClock()
+    monkeypatch.setattr(time, "monotonic_ns", clock.monotonic_ns)
+    return clock
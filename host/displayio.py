@@ -0,0 +1,237 @@
+# SPDX-License-Identifier: MIT
+
+# Host stand-in for the parts of CircuitPython's displayio the app uses. Bitmaps keep one byte per
+# pixel and track the area written since the last refresh, the way the core does.
+
+import re
+
+# Compiled patterns finding the runs of pixels a blit does not skip, by skip_index
+_RUNS = {}
+
+def release_displays():
+    pass
+
+
+class FourWire:
+    """
+    Stand-in for displayio.FourWire. It only keeps the SPI clock, which sets how long a refresh takes.
+    """
+    def __init__(self, spi_bus, *, command=None, chip_select=None, reset=None, baudrate: int = 24000000, polarity: int = 0, phase: int = 0):
+        self.baudrate = baudrate
+
+
+class Bitmap:
+    """
+    Stand-in for displayio.Bitmap.
+
+    Attributes:
+        width (int): Width in pixels.
+        height (int): Height in pixels.
+        value_count (int): The number of distinct pixel values.
+        data (bytearray): The pixels, one byte each, row by row.
+        dirty_area (tuple): The area written since the last refresh, as x1, y1, x2, y2. Host only.
+        writes (int): The number of pixel writes. Host only.
+    """
+    def __init__(self, width: int, height: int, value_count: int):
+        if value_count > 256:
+            raise ValueError("host Bitmap stores one byte per pixel")
+        self.width = width
+        self.height = height
+        self.value_count = value_count
+        self.data = bytearray(width * height)
+        self.writes = 0
+        self.clean()
+
+    def _index(self, key) -> int:
+        if isinstance(key, tuple):
+            x, y = key
+            if not (0 <= x < self.width and 0 <= y < self.height):
+                raise IndexError("pixel index out of range")
+            return y * self.width + x
+        if not 0 <= key < len(self.data):
+            raise IndexError("pixel index out of range")
+        return key
+
+    def __getitem__(self, key) -> int:
+        return self.data[self._index(key)]
+
+    def __setitem__(self, key, value: int):
+        if not 0 <= value < self.value_count:
+            raise ValueError("pixel value out of range")
+        index = self._index(key)
+        self.data[index] = value
+        self.writes += 1
+        x = index % self.width
+        y = index // self.width
+        self.dirty(x, y, x + 1, y + 1)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def fill(self, value: int):
+        self.data[:] = bytes([value]) * len(self.data)
+        self.dirty()
+
+    def blit(self, x: int, y: int, source_bitmap, *, x1: int = 0, y1: int = 0, x2: int = None, y2: int = None, skip_index: int = None):
+        if x2 is None:
+            x2 = source_bitmap.width
+        if y2 is None:
+            y2 = source_bitmap.height
+        # Copy row by row, clipped to this bitmap, and with skip_index only the runs of other values
+        source = source_bitmap.data
+        left = max(x, 0)
+        right = min(x + x2 - x1, self.width)
+        runs = None
+        if skip_index is not None:
+            runs = _RUNS.get(skip_index)
+            if runs is None:
+                runs = _RUNS[skip_index] = re.compile(b"[^" + re.escape(bytes([skip_index])) + b"]+")
+        for row in range(max(y, 0) - y, min(y + y2 - y1, self.height) - y):
+            if right <= left:
+                break
+            start = (y1 + row) * source_bitmap.width + x1 + left - x
+            line = source[start:start + right - left]
+            dest = (y + row) * self.width + left
+            if runs is None:
+                self.data[dest:dest + right - left] = line
+            else:
+                for run in runs.finditer(line):
+                    self.data[dest + run.start():dest + run.end()] = run.group()
+        self.writes += 1
+        self.dirty(max(x, 0), max(y, 0), min(x + x2 - x1, self.width), min(y + y2 - y1, self.height))
+
+    def dirty(self, x1: int = 0, y1: int = 0, x2: int = -1, y2: int = -1):
+        if x2 == -1:
+            x2 = self.width
+        if y2 == -1:
+            y2 = self.height
+        if self.dirty_area[2] <= self.dirty_area[0]:
+            self.dirty_area = (x1, y1, x2, y2)
+        else:
+            old = self.dirty_area
+            self.dirty_area = (min(old[0], x1), min(old[1], y1), max(old[2], x2), max(old[3], y2))
+
+    def clean(self):
+        """Forget the dirty area, as a display refresh does. Host only."""
+        self.dirty_area = (0, 0, 0, 0)
+
+
+class Palette:
+    """
+    Stand-in for displayio.Palette.
+    """
+    def __init__(self, color_count: int, *, dither: bool = False):
+        self._colors = [0] * color_count
+        self._transparent = [False] * color_count
+        self.dither = dither
+        self.writes = 0
+
+    def __len__(self) -> int:
+        return len(self._colors)
+
+    def __getitem__(self, index: int) -> int:
+        return self._colors[index]
+
+    def __setitem__(self, index: int, value: int):
+        self._colors[index] = value
+        self.writes += 1
+
+    def make_transparent(self, index: int):
+        self._transparent[index] = True
+
+    def make_opaque(self, index: int):
+        self._transparent[index] = False
+
+    def is_transparent(self, index: int) -> bool:
+        return self._transparent[index]
+
+
+class ColorConverter:
+    """
+    Stand-in for displayio.ColorConverter. Every pixel is opaque.
+    """
+    def __init__(self, *, input_colorspace=None, dither: bool = False):
+        self.dither = dither
+
+    def make_transparent(self, color: int):
+        pass
+
+    def is_transparent(self, color: int) -> bool:
+        return False
+
+
+class TileGrid:
+    """
+    Stand-in for displayio.TileGrid.
+    """
+    def __init__(self, bitmap, *, pixel_shader, width: int = 1, height: int = 1, tile_width: int = None,
+                 tile_height: int = None, default_tile: int = 0, x: int = 0, y: int = 0):
+        self.bitmap = bitmap
+        self.pixel_shader = pixel_shader
+        self.width = width
+        self.height = height
+        self.tile_width = tile_width if tile_width is not None else bitmap.width
+        self.tile_height = tile_height if tile_height is not None else bitmap.height
+        self.x = x
+        self.y = y
+        self.hidden = False
+        self.flip_x = False
+        self.flip_y = False
+        self.transpose_xy = False
+        self._tiles = [default_tile] * (width * height)
+
+    def _index(self, key) -> int:
+        if isinstance(key, tuple):
+            x, y = key
+            return y * self.width + x
+        return key
+
+    def __getitem__(self, key) -> int:
+        return self._tiles[self._index(key)]
+
+    def __setitem__(self, key, tile: int):
+        if tile >= (self.bitmap.width // self.tile_width) * (self.bitmap.height // self.tile_height):
+            raise ValueError("tile index out of bounds")
+        self._tiles[self._index(key)] = tile
+
+
+class Group:
+    """
+    Stand-in for displayio.Group.
+    """
+    def __init__(self, *, scale: int = 1, x: int = 0, y: int = 0):
+        self.scale = scale
+        self.x = x
+        self.y = y
+        self.hidden = False
+        self._layers = []
+
+    def append(self, layer):
+        self._layers.append(layer)
+
+    def insert(self, index: int, layer):
+        self._layers.insert(index, layer)
+
+    def index(self, layer) -> int:
+        return self._layers.index(layer)
+
+    def pop(self, i: int = -1):
+        return self._layers.pop(i)
+
+    def remove(self, layer):
+        self._layers.remove(layer)
+
+    def __len__(self) -> int:
+        return len(self._layers)
+
+    def __getitem__(self, index: int):
+        return self._layers[index]
+
+    def __setitem__(self, index: int, layer):
+        self._layers[index] = layer
+
+    def __delitem__(self, index: int):
+        del self._layers[index]
+
+    def __iter__(self):
+        return iter(self._layers)
@@ -0,0 +1,85 @@
+# SPDX-License-Identifier: MIT
+
+# Compare frame timing of the old time.sleep(0.25) loop against FrameClock pacing from Timer B of the
+# PCF8523 register model, driven through the real timer driver on the fake I2C bus.
+# Usage: python host/frame_jitter.py [frames] [seed] [max work ms]
+#   A max work over the 250 ms period has frames run long, so the FrameClock has to count the missed ticks.
+
+import hostenv
+import asyncio
+import random
+import sys
+import time
+import busio
+import virtual_clock
+from adafruit_bus_device.i2c_device import I2CDevice
+from adafruit_pcf8523_timer import Timer
+from frame_clock import FrameClock
+from pcf8523_model import PCF8523Model
+
+FRAME_PERIOD = 0.25 # Seconds per frame the app is aiming for
+MIN_WORK = 0.060 # Shortest simulated frame work (particle update and display refresh) in seconds
+MAX_WORK = 0.140 # Longest simulated frame work in seconds
+
+def frame_work(rng, max_work):
+    return rng.uniform(MIN_WORK, max_work)
+
+def sleep_paced(frames, seed, max_work):
+    clock = virtual_clock.VirtualClock()
+    rng = random.Random(seed)
+    starts = []
+    for _ in range(frames):
+        starts.append(clock.monotonic_ns())
+        clock.sleep(frame_work(rng, max_work))
+        clock.sleep(FRAME_PERIOD)
+    return starts
+
+def timer_paced(frames, seed, max_work):
+    clock = virtual_clock.VirtualClock()
+    rng = random.Random(seed)
+    i2c = busio.I2C(clock=clock)
+    model = PCF8523Model(clock)
+    i2c.attach(0x68, model)
+    timer = Timer(I2CDevice(i2c, 0x68))
+    starts = []
+
+    async def frame_loop():
+        frame_clock = FrameClock(timer, rate=1 / FRAME_PERIOD)
+        poll_task = asyncio.create_task(frame_clock.run())
+        for _ in range(frames):
+            await frame_clock.wait()
+            starts.append(clock.monotonic_ns())
+            # Frame work blocks the event loop just like display.refresh() does
+            clock.sleep(frame_work(rng, max_work))
+        poll_task.cancel()
+        return frame_clock
+
+    # The FrameClock times ticks with time.monotonic_ns(), so it has to run on the virtual clock too
+    real_monotonic_ns = time.monotonic_ns
+    time.monotonic_ns = clock.monotonic_ns
+    try:
+        frame_clock = virtual_clock.run(frame_loop(), clock)
+    finally:
+        time.monotonic_ns = real_monotonic_ns
+    return starts, frame_clock, i2c, model.timer_ticks()
+
+def report(name, starts):
+    periods = [(b - a) / 1000000 for a, b in zip(starts, starts[1:])]
+    mean = sum(periods) / len(periods)
+    jitter = (sum((p - mean) ** 2 for p in periods) / len(periods)) ** 0.5
+    ideal = starts[0] + (len(starts) - 1) * FRAME_PERIOD * 1000000000
+    drift = (starts[-1] - ideal) / 1000000000
+    print("{: <8} mean period: {: >8.2f} ms  jitter: {: >6.2f} ms  min: {: >8.2f} ms  max: {: >8.2f} ms  drift after {} frames: {: >+8.2f} s".format(
+        name, mean, jitter, min(periods), max(periods), len(starts), drift))
+
+if __name__ == "__main__":
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    max_work = int(sys.argv[3]) / 1000 if len(sys.argv) > 3 else MAX_WORK
+
+    report("sleep", sleep_paced(frames, seed, max_work))
+    starts, frame_clock, i2c, timer_ticks = timer_paced(frames, seed, max_work)
+    report("timer B", starts)
+    print("timer B  rate: {:.2f} Hz  divider: {}  missed ticks: {}  poll interval: {:.2f} ms  I2C transactions per frame: {:.1f}".format(
+        frame_clock.rate, frame_clock.divider, frame_clock.missed, frame_clock.poll_interval * 1000, i2c.totals().transactions / frames))
+    print("timer B  ticks counted: {}  periods run out on the RTC: {}".format(frame_clock.ticks, timer_ticks))
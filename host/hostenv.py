@@ -0,0 +1,16 @@
+# SPDX-License-Identifier: MIT
+
+# Import this first from a host script. The host folder stays at the front of sys.path so its
+# stand-ins win over the compiled .mpy libraries, and the device lib folder goes right after it.
+
+import os
+import sys
+
+HOST_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(HOST_DIR)
+LIB_DIR = os.path.join(ROOT_DIR, "lib")
+
+if HOST_DIR not in sys.path:
+    sys.path.insert(0, HOST_DIR)
+if LIB_DIR not in sys.path:
+    sys.path.insert(sys.path.index(HOST_DIR) + 1, LIB_DIR)
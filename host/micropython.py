@@ -0,0 +1,6 @@
+# SPDX-License-Identifier: MIT
+
+# Host stand-in for the micropython module.
+
+def const(value):
+    return value
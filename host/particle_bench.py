@@ -0,0 +1,53 @@
+# SPDX-License-Identifier: MIT
+
+# Times ParticleSystem.update() per frame against particle count, with pixel writes, with bitmaptools spans and
+# with the NumPy arrays of particle_arrays.ArrayParticleSystem (ulab on the device), if NumPy is installed.
+# Host time is dominated by the Python stand-ins, so calls into the core per frame are reported too: on the
+# device each of those crosses from Python into C, which is what the bulk path saves.
+# Usage: python host/particle_bench.py
+
+import hostenv
+import gc
+import random
+import time
+import simple_particle_sim
+import particle_arrays
+
+# Constants
+SCREEN_WIDTH = 480 # Width of screen in pixels
+SCREEN_HEIGHT = 320 # Width of height in pixels
+MAX_PARTICLE_SPEED = -35 # Max speed of particles in pixels per update
+PARTICLE_COUNTS = (25, 50, 100, 200, 400, 1600, 3200) # Particle counts to time
+WARMUP_FRAMES = 20 # Frames run before timing, so respawned particles are part of the mix
+TIMED_FRAMES = 100 # Frames timed for each count and path
+
+# Each setup is a ParticleSystem class and whether it draws with bitmaptools spans
+setups = [(simple_particle_sim.ParticleSystem, False), (simple_particle_sim.ParticleSystem, True)]
+header = "{: >10} {: >12} {: >12}".format("particles", "pixels ms", "bulk ms")
+if particle_arrays.np is not None:
+    setups.append((particle_arrays.ArrayParticleSystem, False))
+    header += " {: >12}".format("arrays ms")
+print(header + " {: >14} {: >14}".format("pixels calls", "bulk calls"))
+for count in PARTICLE_COUNTS:
+    results = []
+    calls = []
+    for particle_class, bulk in setups:
+        random.seed(1)
+        particle_system = particle_class(count, SCREEN_HEIGHT, SCREEN_WIDTH, MAX_PARTICLE_SPEED, 0, 0, 0, SCREEN_WIDTH - 1, 0, rand_y=True, bulk=bulk)
+        for _ in range(WARMUP_FRAMES):
+            particle_system.remove_out_of_bounds()
+            particle_system.update()
+        gc.collect()
+
+        start = time.monotonic_ns()
+        start_calls = particle_system.bitmap.writes
+        for _ in range(TIMED_FRAMES):
+            particle_system.remove_out_of_bounds()
+            particle_system.update()
+        results.append((time.monotonic_ns() - start) / TIMED_FRAMES / 1000000)
+        # Every pixel write and every bitmaptools call counts as one write to the host bitmap
+        calls.append((particle_system.bitmap.writes - start_calls) / TIMED_FRAMES)
+
+        del particle_system
+        gc.collect()
+    print("{: >10}".format(count) + "".join(" {: >12.3f}".format(result) for result in results) + " {: >14.1f} {: >14.1f}".format(calls[0], calls[1]))
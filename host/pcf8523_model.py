@@ -0,0 +1,344 @@
+# SPDX-License-Identifier: MIT
+
+import calendar
+import time
+from virtual_clock import VirtualClock
+
+# Register addresses
+CONTROL_1 = 0x00
+CONTROL_2 = 0x01
+CONTROL_3 = 0x02
+SECONDS = 0x03
+YEARS = 0x09
+TMR_CLKOUT_CTRL = 0x0F
+TMR_A_FREQ_CTRL = 0x10
+TMR_A_REG = 0x11
+TMR_B_FREQ_CTRL = 0x12
+TMR_B_REG = 0x13
+REGISTER_COUNT = 0x14
+
+# Register values after power on or a software reset, 0 where the datasheet leaves them undefined
+RESET_VALUES = (0x00, 0x00, 0xE0, 0x80, 0x00, 0x00, 0x01, 0x00, 0x01, 0x00,
+                0x80, 0x80, 0x80, 0x80, 0x00, 0x00, 0x07, 0x00, 0x07, 0x00)
+
+# Control_1 bits
+STOP = 0x20
+SOFTWARE_RESET = 0x58 # Writing exactly this value to Control_1 resets the chip
+
+# Control_2 flags. They are cleared by writing 0, and writing 1 leaves them as they are.
+WTAF = 0x80
+CTAF = 0x40
+CTBF = 0x20
+FLAGS = 0xF8
+WTAIE = 0x04
+CTAIE = 0x02
+CTBIE = 0x01
+
+# Tmr_CLKOUT_ctrl bits
+TAC_MASK = 0x06
+TAC_COUNTDOWN = 0x02
+TAC_WATCHDOG = 0x04
+TBC = 0x01
+
+# The OS flag in the seconds register, set when the oscillator stopped and the time is not to be trusted
+OSCILLATOR_STOPPED = 0x80
+
+# Timer source frequency in Hz as (numerator, denominator) for each TIMER_FREQ_* selection value. 0b100 to 0b110 are 1/3600 Hz too.
+SOURCE_HZ = {0b000: (4096, 1), 0b001: (64, 1), 0b010: (1, 1), 0b011: (1, 60)}
+SLOWEST_HZ = (1, 3600)
+
+# The time the registers start at, 2000-01-01 00:00:00
+Y2K_EPOCH = 946684800
+
+def bcd(value: int) -> int:
+    return value + 6 * (value // 10)
+
+def from_bcd(value: int) -> int:
+    return value - 6 * (value >> 4)
+
+class _Countdown:
+    """
+    A helper class representing one of the two countdown timers.
+
+    Attributes:
+        start_ns (int): Crystal time in nanoseconds the countdown was last loaded.
+        elapsed (int): The number of times it has counted down to zero since then.
+        running (bool): True while it is counting.
+    """
+    def __init__(self):
+        self.start_ns = 0
+        self.elapsed = 0
+        self.running = False
+
+
+class PCF8523Model:
+    """
+    A register-accurate host model of the PCF8523 real time clock, for the fake busio.I2C.
+    The time registers and both countdown timers run on a VirtualClock.
+
+    Attributes:
+        clock (VirtualClock): The clock the chip runs on.
+        ppm (int): How fast the RTC crystal runs compared to the clock, in parts per million.
+        registers (bytearray): The stored register values.
+        pointer (int): The register the next read or write starts at.
+        interrupts (int): The number of INT pin assertions, one per countdown with its interrupt enabled.
+        reads (list): The number of reads of each register.
+        writes (list): The number of writes to each register.
+    """
+    def __init__(self, clock: VirtualClock, epoch: int = Y2K_EPOCH, ppm: int = 0, lost_power: bool = False):
+        """
+        Initializes the model in its reset state, with the time set.
+
+        Parameters:
+            clock (VirtualClock): The clock the chip runs on.
+            epoch (int): The time in seconds since the unix epoch, from 2000 through 2099.
+            ppm (int): How fast the RTC crystal runs compared to the clock, in parts per million.
+            lost_power (bool): True to start with the OS flag set, as after the backup battery ran out.
+        """
+        self.clock = clock
+        self.ppm = ppm
+        self.pointer = 0
+        self.interrupts = 0
+        self.reads = [0] * REGISTER_COUNT
+        self.writes = [0] * REGISTER_COUNT
+        self._timer_a = _Countdown()
+        self._timer_b = _Countdown()
+        self.reset()
+        self.set_time(epoch)
+        if not lost_power:
+            self.registers[SECONDS] &= ~OSCILLATOR_STOPPED
+
+    def reset(self):
+        """
+        Put every register back to its reset value and stop both timers, as a software reset does.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        self.registers = bytearray(RESET_VALUES)
+        self._timer_a.running = False
+        self._timer_b.running = False
+
+    def crystal_ns(self) -> int:
+        """
+        Get the time by the RTC crystal.
+
+        Returns:
+            int: The clock time in nanoseconds scaled by ppm.
+        """
+        return self.clock.monotonic_ns() * (1000000 + self.ppm) // 1000000
+
+    def set_time(self, epoch: int):
+        """
+        Set the time registers without a bus transaction, like setting the clock before the test starts.
+
+        Parameters:
+            epoch (int): The time in seconds since the unix epoch.
+
+        Returns:
+            None
+        """
+        t = time.gmtime(epoch)
+        self._fields = bytearray((bcd(t.tm_sec), bcd(t.tm_min), bcd(t.tm_hour), bcd(t.tm_mday), t.tm_wday,
+                                  bcd(t.tm_mon), bcd(t.tm_year - 2000)))
+        self._time_ns = self.crystal_ns()
+
+    def _elapsed(self) -> int:
+        # Whole seconds counted since the time registers were last exact
+        if self.registers[CONTROL_1] & STOP:
+            return 0
+        return (self.crystal_ns() - self._time_ns) // 1000000000
+
+    def _fields_epoch(self) -> int:
+        fields = self._fields
+        return calendar.timegm((from_bcd(fields[6]) + 2000, from_bcd(fields[5] & 0x1F), from_bcd(fields[3] & 0x3F),
+                                from_bcd(fields[2] & 0x3F), from_bcd(fields[1] & 0x7F), from_bcd(fields[0] & 0x7F), 0, 0, 0))
+
+    def epoch(self) -> int:
+        """
+        Get the time the chip is keeping.
+
+        Returns:
+            int: The time in seconds since the unix epoch.
+        """
+        return self._fields_epoch() + self._elapsed()
+
+    def _time_registers(self) -> bytearray:
+        elapsed = self._elapsed()
+        if not elapsed:
+            # Return what was written as it is, even a date that does not exist, as the chip does
+            return bytearray(self._fields)
+        start = self._fields_epoch()
+        now = start + elapsed
+        t = time.gmtime(now)
+        weekday = (self._fields[4] + now // 86400 - start // 86400) % 7
+        return bytearray((bcd(t.tm_sec), bcd(t.tm_min), bcd(t.tm_hour), bcd(t.tm_mday), weekday,
+                          bcd(t.tm_mon), bcd(t.tm_year - 2000)))
+
+    def _settle(self):
+        # Roll the counted seconds into the time registers. The clock stands still during a transaction,
+        # so a block write of the time is never rolled over while half of it is written.
+        elapsed = self._elapsed()
+        if elapsed:
+            self._fields = self._time_registers()
+            self._time_ns += elapsed * 1000000000
+
+    def _write_time_register(self, register: int, value: int):
+        self._settle()
+        if register == SECONDS:
+            self.registers[SECONDS] = value & OSCILLATOR_STOPPED
+            value &= 0x7F
+            # Writing the seconds restarts the one second prescaler
+            self._time_ns = self.crystal_ns()
+        self._fields[register - SECONDS] = value
+
+    def _source_hz(self, frequency_register: int) -> tuple:
+        return SOURCE_HZ.get(self.registers[frequency_register] & 0x07, SLOWEST_HZ)
+
+    def _run_countdown(self, countdown: _Countdown, frequency_register: int, value_register: int, flag: int,
+                       interrupt_enable: int, once: bool):
+        value = self.registers[value_register]
+        if not countdown.running or not value:
+            return
+        numerator, denominator = self._source_hz(frequency_register)
+        source_ticks = (self.crystal_ns() - countdown.start_ns) * numerator // (denominator * 1000000000)
+        elapsed = source_ticks // value
+        if once:
+            elapsed = min(elapsed, 1)
+        if elapsed > countdown.elapsed:
+            self.registers[CONTROL_2] |= flag
+            if self.registers[CONTROL_2] & interrupt_enable:
+                self.interrupts += elapsed - countdown.elapsed
+            countdown.elapsed = elapsed
+
+    def update(self):
+        """
+        Bring the timer flags up to the current clock time. Every bus access does this first.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        mode = self.registers[TMR_CLKOUT_CTRL] & TAC_MASK
+        self._run_countdown(self._timer_a, TMR_A_FREQ_CTRL, TMR_A_REG, WTAF if mode == TAC_WATCHDOG else CTAF,
+                            WTAIE if mode == TAC_WATCHDOG else CTAIE, mode == TAC_WATCHDOG)
+        self._run_countdown(self._timer_b, TMR_B_FREQ_CTRL, TMR_B_REG, CTBF, CTBIE, False)
+
+    def _load(self, countdown: _Countdown, running: bool):
+        # A countdown starts over from its value when it is enabled or its source or value changes
+        countdown.running = running
+        countdown.start_ns = self.crystal_ns()
+        countdown.elapsed = 0
+
+    def timer_ticks(self, timer_b: bool = True) -> int:
+        """
+        Get the number of countdowns since a timer was loaded, without a bus transaction.
+
+        Parameters:
+            timer_b (bool): True for Timer B, False for Timer A.
+
+        Returns:
+            int: The number of times the timer has counted down to zero.
+        """
+        self.update()
+        return (self._timer_b if timer_b else self._timer_a).elapsed
+
+    def read_register(self, register: int) -> int:
+        """
+        Read one register as the bus sees it.
+
+        Parameters:
+            register (int): The register address.
+
+        Returns:
+            int: The register value.
+        """
+        self.reads[register] += 1
+        if register == SECONDS:
+            return self._time_registers()[0] | (self.registers[SECONDS] & OSCILLATOR_STOPPED)
+        if SECONDS < register <= YEARS:
+            return self._time_registers()[register - SECONDS]
+        return self.registers[register]
+
+    def write_register(self, register: int, value: int):
+        """
+        Write one register as the bus does.
+
+        Parameters:
+            register (int): The register address.
+            value (int): The new value.
+
+        Returns:
+            None
+        """
+        self.writes[register] += 1
+        old = self.registers[register]
+        if register == CONTROL_1:
+            if value == SOFTWARE_RESET:
+                # The time registers keep counting through a software reset
+                self._settle()
+                self.reset()
+                return
+            if (old ^ value) & STOP:
+                # Stopping freezes the time, starting again restarts the prescaler
+                self._settle()
+                self._time_ns = self.crystal_ns()
+            self.registers[CONTROL_1] = value
+        elif register == CONTROL_2:
+            self.registers[CONTROL_2] = (old & value & FLAGS) | (value & ~FLAGS & 0xFF)
+        elif SECONDS <= register <= YEARS:
+            self._write_time_register(register, value)
+        else:
+            self.registers[register] = value
+            if register == TMR_CLKOUT_CTRL:
+                timer_a = value & TAC_MASK in (TAC_COUNTDOWN, TAC_WATCHDOG)
+                if timer_a and (not self._timer_a.running or (old ^ value) & TAC_MASK):
+                    self._load(self._timer_a, True)
+                self._timer_a.running = timer_a
+                if value & TBC and not self._timer_b.running:
+                    self._load(self._timer_b, True)
+                self._timer_b.running = bool(value & TBC)
+            elif register in (TMR_A_FREQ_CTRL, TMR_A_REG) and old != value:
+                self._load(self._timer_a, self._timer_a.running)
+            elif register in (TMR_B_FREQ_CTRL, TMR_B_REG) and old != value:
+                self._load(self._timer_b, self._timer_b.running)
+
+    def i2c_write(self, data: bytes):
+        """
+        Handle the write part of a bus transaction. The first byte sets the register pointer.
+
+        Parameters:
+            data (bytes): The bytes written, empty for a probe.
+
+        Returns:
+            None
+        """
+        self.update()
+        if not data:
+            return
+        self.pointer = data[0] % REGISTER_COUNT
+        for value in data[1:]:
+            self.write_register(self.pointer, value)
+            self.pointer = (self.pointer + 1) % REGISTER_COUNT
+
+    def i2c_read(self, length: int) -> bytes:
+        """
+        Handle the read part of a bus transaction, from the register pointer on. The address wraps after 0x13.
+
+        Parameters:
+            length (int): The number of bytes read.
+
+        Returns:
+            bytes: The register values.
+        """
+        self.update()
+        data = bytearray(length)
+        for index in range(length):
+            data[index] = self.read_register(self.pointer)
+            self.pointer = (self.pointer + 1) % REGISTER_COUNT
+        return bytes(data)
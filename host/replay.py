@@ -0,0 +1,136 @@
+# SPDX-License-Identifier: MIT
+
+# Replay a frame trace recorded by code.py (TRACE_PATH) on the host, or compare two traces frame by frame.
+#
+# Usage:
+#   python host/replay.py trace.bin [--record replayed.bin] [--bulk | --arrays]
+#       Drive the particle system, rocket and counter from the trace and check the outputs match it.
+#       --record writes the replay as a new trace, with host stage timings and bitmap checksums.
+#       --bulk draws particles with the bitmaptools path.
+#       --arrays moves particles with particle_arrays.ArrayParticleSystem, which needs NumPy.
+#   python host/replay.py --compare a.bin b.bin
+#       Compare stage timings and outputs of two traces, e.g. replays of the same trace by two versions.
+
+import hostenv
+import circuitpython_random
+circuitpython_random.install()
+
+import argparse
+import os
+import struct
+import sys
+import zlib
+import displayio
+import frame_trace
+import moon_scene
+import simple_particle_sim
+import particle_arrays
+
+TILE_WIDTH = 16 # Width of single tile in pixels, as in code.py
+MAX_LISTED = 10 # Mismatching frames listed in full
+
+def replay(path, record_path=None, bulk=False, arrays=False):
+    reader = frame_trace.FrameTraceReader(path)
+    args = reader.particle_args
+    writer = frame_trace.FrameTraceWriter(record_path or os.devnull, reader.seed, args, reader.counter)
+    particle_class = particle_arrays.ArrayParticleSystem if arrays else simple_particle_sim.ParticleSystem
+    particle_system = particle_class(*args[:9], rand_x=bool(args[9]), rand_y=bool(args[10]), colors=args[11], bulk=bulk)
+
+    # The rocket starts at the left flying right, as in code.py
+    rocket = displayio.TileGrid(displayio.Bitmap(2 * TILE_WIDTH, 2 * TILE_WIDTH, 1), pixel_shader=displayio.Palette(1))
+    rocket.flip_y = True
+    counter = reader.counter
+
+    mismatches = []
+    frames = 0
+    resizes = 0
+    occluded = 0
+    for recorded in reader:
+        # code.py resizes after a frame is recorded when the governor changes level, so the next frame has the new count
+        if recorded.particles != len(particle_system.particles):
+            particle_system.resize(recorded.particles)
+            resizes += 1
+        writer.begin_frame()
+        if recorded.timer:
+            counter += 1
+        writer.lap(0)
+        particle_system.remove_out_of_bounds()
+        particle_system.update()
+        writer.lap(1)
+        moon_scene.step_rocket(rocket, TILE_WIDTH)
+        writer.lap(2)
+        crc = zlib.crc32(particle_system.bitmap.data)
+        particle_system.bitmap.clean()
+        writer.lap(3)
+        writer.end_frame(recorded.timer, recorded.epoch, counter, rocket, recorded.ticks, particle_system, crc)
+
+        # The replay has no scene in front of the particles, so it checks where they are and the area they would have
+        # written without the occlusion mask, which is the dirty area itself on frames the mask hid nothing
+        expected = (recorded.seed, tuple(recorded.unmasked), recorded.positions, recorded.rocket_x, recorded.flip_y, recorded.particles, round(recorded.counter))
+        actual = ((reader.seed + recorded.frame) & 0xFFFFFFFF, particle_system.dirty_area(), frame_trace.particle_checksum(particle_system),
+                  rocket.x, rocket.flip_y, len(particle_system.particles), round(as_float32(counter)))
+        if expected != actual:
+            mismatches.append((recorded.frame, expected, actual))
+        occluded += recorded.occluded
+        frames += 1
+    writer.close()
+    reader.close()
+
+    print("replayed {} frames of {}, {} occluded, {} particle count changes, {} mismatched".format(frames, path, occluded, resizes, len(mismatches)))
+    for frame, expected, actual in mismatches[:MAX_LISTED]:
+        print("  frame {: >6} recorded (seed, unmasked dirty, positions, rocket x, flip, particles, counter) {} replayed {}".format(frame, expected, actual))
+    return len(mismatches)
+
+def as_float32(value):
+    # Counters are stored as 32 bit floats, round the replayed one the same way before comparing
+    return struct.unpack("<f", struct.pack("<f", value))[0]
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def compare(path_a, path_b):
+    frames_a = list(frame_trace.FrameTraceReader(path_a))
+    frames_b = list(frame_trace.FrameTraceReader(path_b))
+    count = min(len(frames_a), len(frames_b))
+    if len(frames_a) != len(frames_b):
+        print("traces differ in length ({} and {}), comparing the first {} frames".format(len(frames_a), len(frames_b), count))
+
+    print("{: <10} {: >10} {: >10} {: >10} {: >10} {: >10} {: >10}".format("stage us", "a mean", "b mean", "a p95", "b p95", "a max", "b max"))
+    for stage, name in enumerate(frame_trace.STAGES + ("total",)):
+        if name == "total":
+            a = [sum(frame.stage_us) for frame in frames_a[:count]]
+            b = [sum(frame.stage_us) for frame in frames_b[:count]]
+        else:
+            a = [frame.stage_us[stage] for frame in frames_a[:count]]
+            b = [frame.stage_us[stage] for frame in frames_b[:count]]
+        print("{: <10} {: >10.0f} {: >10.0f} {: >10} {: >10} {: >10} {: >10}".format(
+            name, sum(a) / count, sum(b) / count, percentile(a, 0.95), percentile(b, 0.95), max(a), max(b)))
+
+    mismatches = []
+    for a, b in zip(frames_a, frames_b):
+        # A replay has no occlusion mask, so the masked dirty areas only compare when both traces masked alike
+        output_a = (a.unmasked, a.positions, a.dirty if a.occluded == b.occluded else 0, a.rocket_x, a.flip_y, a.particles, a.counter, a.crc if a.crc and b.crc else 0)
+        output_b = (b.unmasked, b.positions, b.dirty if a.occluded == b.occluded else 0, b.rocket_x, b.flip_y, b.particles, b.counter, b.crc if a.crc and b.crc else 0)
+        if output_a != output_b:
+            mismatches.append((a.frame, output_a, output_b))
+    print("{} of {} frames have different outputs".format(len(mismatches), count))
+    for frame, output_a, output_b in mismatches[:MAX_LISTED]:
+        print("  frame {: >6} a (unmasked dirty, positions, dirty, rocket x, flip, particles, counter, crc) {} b {}".format(frame, output_a, output_b))
+    return len(mismatches)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a frame trace on the host, or compare two traces.")
+    parser.add_argument("trace", nargs="?", help="trace to replay")
+    parser.add_argument("--record", help="write the replay as a new trace")
+    parser.add_argument("--bulk", action="store_true", help="draw particles with the bitmaptools path")
+    parser.add_argument("--arrays", action="store_true", help="move particles with NumPy arrays")
+    parser.add_argument("--compare", nargs=2, metavar=("A", "B"), help="compare two traces instead of replaying")
+    options = parser.parse_args()
+    if options.compare:
+        sys.exit(1 if compare(*options.compare) else 0)
+    if not options.trace:
+        parser.error("a trace to replay is needed")
+    if options.arrays and particle_arrays.np is None:
+        parser.error("--arrays needs NumPy")
+    sys.exit(1 if replay(options.trace, options.record, options.bulk, options.arrays) else 0)
@@ -0,0 +1,372 @@
+# SPDX-License-Identifier: MIT
+
+# Run code.py unchanged for simulated days on virtual time, against the PCF8523 register model, the fake I2C bus,
+# a display that only works out how long each refresh takes, and a flash filesystem kept in memory. Reports heap
+# growth of the app, bytes and sectors written to flash, counter and clock error against the RTC, and the
+# distribution of frame times over the whole run.
+#
+# Frame times are virtual: I2C transactions at the bus clock, display refreshes from the areas they send, and a
+# rough cost per pixel write for the particle update. Python work outside of those takes no time.
+#
+# Usage: python host/soak.py [--days N] [--hours N] [--ppm N] [--seed N] [--timestamp N] [--trace-heap]
+#                            [--trace PATH] [--slow-ms N] [--min-flash-years N]
+#   Exits with status 1 if the flash writes after warm up would wear the FAT and directory sectors out in less
+#   than --min-flash-years, 5 by default. The run has to be longer than one sample interval to be checked.
+#   A simulated day takes about six minutes. The heap is followed by the number of allocated blocks, which is cheap;
+#   --trace-heap also attributes the growth to lines of code.py and lib with tracemalloc, at about ten times the run time.
+#   --trace runs code.py with TRACE_PATH set and saves the trace to PATH, for host/replay.py.
+#   --slow-ms adds that much work to every frame in every other virtual minute, so the frame governor steps down,
+#   and back up when frames leave it enough headroom. With --trace, replaying the trace checks that the particle
+#   count changes replay too. Pass a recent
+#   --timestamp with --trace, e.g. 1699000000: the trace stores the counter as a 32 bit float, which is only exact
+#   up to 16777216.
+
+import hostenv
+import circuitpython_random
+circuitpython_random.install()
+
+import argparse
+import asyncio
+import errno
+import gc
+import io
+import os
+import random
+import struct
+import sys
+import time
+import tracemalloc
+import adafruit_hx8357
+import busio
+import virtual_clock
+from pcf8523_model import PCF8523Model
+
+CODE_PATH = os.path.join(hostenv.ROOT_DIR, "code.py")
+START_EPOCH = 1700000000 # RTC time at boot
+TIMESTAMP = 1634061600 # timestamp.txt at boot, the marriage timestamp in code.py
+TIMER_PERIOD = 3 # Seconds between timer A events, as code.py sets the timer
+SAMPLE_INTERVAL = 3600 # Virtual seconds between heap and counter samples. Growth is measured from the first one, after warm up
+PIXEL_WRITE_NS = 20000 # Rough device time of one pixel write or bitmaptools call from Python
+SLOW_PERIOD = 60 # Virtual seconds of extra work from --slow-ms, then as many without
+DEVICE_TRACE_PATH = "/trace.bin" # TRACE_PATH set in code.py for --trace
+SECTOR_SIZE = 4096 # Flash erase sector in bytes
+FS_SECTORS = 2 # Sectors rewritten on top of the data by every file write, the FAT and the directory entry
+FLASH_ENDURANCE = 100000 # Erase cycles a flash sector is rated for
+MIN_FLASH_YEARS = 5 # Stated lifetime the FAT and directory sectors have to last at the write rate after warm up
+DEVICE_MODULES = ("asset_cache", "tile_provider", "frame_trace", "adafruit_imageload", "baked_starfield") # Modules that open files on the device filesystem
+DEVICE_FILE_FUNCTIONS = ("open", "remove", "rename") # Names those modules use for the filesystem, where they have them
+
+class FlashFile:
+    """
+    A helper class representing a file being written to the in memory flash. The data is stored when it is closed.
+    """
+    def __init__(self, flash, name: str, binary: bool):
+        self._flash = flash
+        self._name = name
+        self._buffer = io.BytesIO() if binary else io.StringIO()
+
+    def write(self, data) -> int:
+        return self._buffer.write(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self._buffer is not None:
+            data = self._buffer.getvalue()
+            self._flash.store(self._name, data if isinstance(data, bytes) else data.encode())
+            self._buffer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class Flash:
+    """
+    A device filesystem for code.py. Files written live in memory and are counted, files only read come from
+    the repository, like the art.
+
+    Attributes:
+        files (dict): Written file contents as bytes, by name.
+        writes (dict): The number of times each file was written, by name.
+        bytes_written (dict): Bytes written to each file, by name.
+        sectors (dict): Sectors erased for each file, including the filesystem sectors, by name.
+    """
+    def __init__(self, root: str, files: dict = None):
+        self.root = root
+        self.files = dict(files or {})
+        self.writes = {}
+        self.bytes_written = {}
+        self.sectors = {}
+
+    def open(self, path: str, mode: str = "r", *args, **kwargs):
+        name = path.lstrip("/")
+        binary = "b" in mode
+        if "w" in mode or "a" in mode or "+" in mode:
+            return FlashFile(self, name, binary)
+        if name in self.files:
+            data = self.files[name]
+            return io.BytesIO(data) if binary else io.StringIO(data.decode())
+        real_path = os.path.join(self.root, name)
+        if os.path.isfile(real_path):
+            return open(real_path, mode, *args, **kwargs)
+        raise OSError(errno.ENOENT, "No such file/directory: " + path)
+
+    def remove(self, path: str):
+        name = path.lstrip("/")
+        if name not in self.files:
+            raise OSError(errno.ENOENT, "No such file/directory: " + path)
+        del self.files[name]
+
+    def rename(self, old_path: str, new_path: str):
+        # As on FAT, a file cannot be renamed over another one
+        old = old_path.lstrip("/")
+        new = new_path.lstrip("/")
+        if old not in self.files:
+            raise OSError(errno.ENOENT, "No such file/directory: " + old_path)
+        if new in self.files:
+            raise OSError(errno.EEXIST, "File exists: " + new_path)
+        self.files[new] = self.files.pop(old)
+
+    def store(self, name: str, data: bytes):
+        self.files[name] = data
+        self.writes[name] = self.writes.get(name, 0) + 1
+        self.bytes_written[name] = self.bytes_written.get(name, 0) + len(data)
+        self.sectors[name] = self.sectors.get(name, 0) + max((len(data) + SECTOR_SIZE - 1) // SECTOR_SIZE, 1) + FS_SECTORS
+
+
+class FrameTimes:
+    """
+    A histogram of frame times in milliseconds, so a run of days keeps a fixed amount of memory.
+    """
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.longest = 0
+
+    def add(self, ns: int):
+        ms = ns // 1000000
+        self.counts[ms] = self.counts.get(ms, 0) + 1
+        self.count += 1
+        self.longest = max(self.longest, ns)
+
+    def percentile(self, fraction: float) -> int:
+        target = self.count * fraction
+        seen = 0
+        for ms in sorted(self.counts):
+            seen += self.counts[ms]
+            if seen >= target:
+                return ms
+        return 0
+
+
+def device_float(value: float) -> float:
+    # CircuitPython floats are 32 bit floats with the 2 lowest mantissa bits dropped
+    bits = struct.unpack("<I", struct.pack("<f", value))[0] & ~3
+    return struct.unpack("<f", struct.pack("<I", bits))[0]
+
+def app_snapshot():
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(True, CODE_PATH),
+        tracemalloc.Filter(True, os.path.join(hostenv.LIB_DIR, "*")),
+    ))
+
+def soak(seconds: int, ppm: int, seed: int, timestamp: int, trace_heap: bool, trace: bool = False, slow_ms: int = 0) -> dict:
+    clock = virtual_clock.VirtualClock()
+    model = PCF8523Model(clock, START_EPOCH, ppm)
+    flash = Flash(hostenv.ROOT_DIR, {"timestamp.txt": str(timestamp).encode()})
+    frame_times = FrameTimes()
+    app = {"__name__": "__main__", "__file__": CODE_PATH, "open": flash.open}
+    result = {"app": app, "model": model, "flash": flash, "frame_times": frame_times, "samples": [], "snapshots": []}
+
+    async def run_app(main):
+        # Stands in for asyncio.run() at the end of code.py, once everything in it has been set up
+        display = app["display"]
+        frames = app["frames"]
+        particle_system = app["particle_system"]
+        result["boot_epoch"] = model.epoch()
+        result["boot_cycle"] = app["current_cycle"]
+
+        # Time each frame from its tick to the end of its refresh, with the particle update costed by its writes
+        wait = frames.wait
+        update = particle_system.update
+        refresh = display.refresh
+        frame_start = [None]
+
+        async def timed_wait():
+            ticks = await wait()
+            frame_start[0] = clock.monotonic_ns()
+            return ticks
+
+        def timed_update():
+            writes = particle_system.bitmap.writes
+            update()
+            clock.advance_ns((particle_system.bitmap.writes - writes) * PIXEL_WRITE_NS)
+            if slow_ms and int(clock.monotonic()) // SLOW_PERIOD % 2:
+                clock.advance_ns(slow_ms * 1000000)
+
+        def timed_refresh():
+            refresh()
+            if frame_start[0] is not None:
+                frame_times.add(clock.monotonic_ns() - frame_start[0])
+                frame_start[0] = None
+
+        frames.wait = timed_wait
+        particle_system.update = timed_update
+        display.refresh = timed_refresh
+
+        task = asyncio.create_task(main)
+        end = clock.monotonic() + seconds
+        while clock.monotonic() < end:
+            await asyncio.sleep(min(SAMPLE_INTERVAL, end - clock.monotonic()))
+            # Elapsed RTC seconds, counter error, clock error against the RTC and allocated heap blocks
+            elapsed = model.epoch() - result["boot_epoch"]
+            expected = result["boot_cycle"] + elapsed // TIMER_PERIOD
+            gc.collect()
+            result["samples"].append((elapsed, app["current_cycle"] - expected, app["clock"].now() - model.epoch(), sys.getallocatedblocks(),
+                                      sum(flash.writes.values())))
+            if trace_heap and len(result["snapshots"]) < 2:
+                result["snapshots"].append(app_snapshot())
+            elif trace_heap:
+                result["snapshots"][1] = app_snapshot()
+        task.cancel()
+        if app["trace"] is not None:
+            app["trace"].close()
+        result["end_epoch"] = model.epoch()
+        result["clock_now"] = app["clock"].now()
+
+    real_monotonic_ns = time.monotonic_ns
+    real_asyncio_run = asyncio.run
+    saved = {}
+    time.monotonic_ns = clock.monotonic_ns
+    asyncio.run = lambda main: virtual_clock.run(run_app(main), clock)
+    busio.DEVICES[0x68] = model
+    busio.CLOCK = clock
+    adafruit_hx8357.CLOCK = clock
+    if trace_heap:
+        tracemalloc.start()
+    try:
+        random.seed(seed)
+        for name in DEVICE_MODULES:
+            module = __import__(name)
+            for function in DEVICE_FILE_FUNCTIONS:
+                if function == "open" or hasattr(module, function):
+                    saved[name, function] = getattr(module, function, None)
+                    setattr(module, function, getattr(flash, function))
+        with open(CODE_PATH) as file:
+            source = file.read()
+        if trace:
+            source = source.replace("\nTRACE_PATH = None ", "\nTRACE_PATH = {!r} ".format(DEVICE_TRACE_PATH), 1)
+        exec(compile(source, CODE_PATH, "exec"), app)
+    finally:
+        if trace_heap:
+            tracemalloc.stop()
+        time.monotonic_ns = real_monotonic_ns
+        asyncio.run = real_asyncio_run
+        del busio.DEVICES[0x68]
+        busio.CLOCK = None
+        adafruit_hx8357.CLOCK = None
+        for (name, function), value in saved.items():
+            if value is None:
+                delattr(sys.modules[name], function)
+            else:
+                setattr(sys.modules[name], function, value)
+    return result
+
+def report(seconds: int, result: dict) -> float:
+    days = seconds / 86400
+    app = result["app"]
+    flash = result["flash"]
+    frame_times = result["frame_times"]
+    samples = result["samples"]
+    frames = app["frames"]
+    display = app["display"]
+    print("soaked {:.2f} days: {} frame ticks, {} missed, {} refreshes, {} I2C transactions".format(
+        days, frames.ticks, frames.missed, display.refreshes, app["i2c"].totals().transactions))
+
+    period_ms = 1000 / frames.rate
+    print("frame time ms (tick to end of refresh):")
+    print("  p50 {}  p95 {}  p99 {}  p99.9 {}  max {:.1f}  over the {:.0f} ms frame period: {}".format(
+        frame_times.percentile(0.5), frame_times.percentile(0.95), frame_times.percentile(0.99), frame_times.percentile(0.999),
+        frame_times.longest / 1000000, period_ms, sum(count for ms, count in frame_times.counts.items() if ms >= period_ms)))
+    print("  refresh areas per frame {:.1f}, pixels per frame {:.0f}".format(
+        display.areas / max(display.refreshes, 1), display.pixels / max(display.refreshes, 1)))
+    governor = app.get("governor")
+    if governor is not None:
+        print("  governor: level {} of {}, {} stars at {:.2f} fps targeted, {:.2f} achieved, {} overruns, {} level changes".format(
+            governor.level, len(governor.levels), governor.particles, governor.target_fps, governor.fps, governor.overruns, governor.changes))
+
+    boot_cycle = result["boot_cycle"]
+    cycle = app["current_cycle"]
+    expected = boot_cycle + (result["end_epoch"] - result["boot_epoch"]) // TIMER_PERIOD
+    # The same increments with device floats, which stop adding up once the count is large
+    device_cycle = device_float(boot_cycle)
+    for _ in range(round(cycle - boot_cycle)):
+        device_cycle = device_float(device_cycle + 1)
+    reboot_cycle = (result["clock_now"] - int(flash.files["timestamp.txt"])) / TIMER_PERIOD
+    print("counter: {:.0f} at boot, {:.0f} at the end, {:.0f} expected from the RTC, error {:+.0f}".format(boot_cycle, cycle, expected, cycle - expected))
+    print("  with device floats {:.0f}, error {:+.0f}. A reboot at the end would start it from {:.0f}".format(device_cycle, device_cycle - expected, reboot_cycle))
+    print("clock error against the RTC, s: last {:+d}  worst {:+d}".format(
+        samples[-1][2] if samples else 0, max((sample[2] for sample in samples), key=abs, default=0)))
+
+    print("flash writes:")
+    print("  {: <24} {: >10} {: >12} {: >10} {: >16}".format("file", "writes", "bytes", "sectors", "writes per day"))
+    for name in sorted(flash.writes):
+        print("  {: <24} {: >10} {: >12} {: >10} {: >16.0f}".format(
+            name, flash.writes[name], flash.bytes_written[name], flash.sectors[name], flash.writes[name] / days))
+    # Every write rewrites the same FAT and directory sectors, so those wear out first. Boot writes caches once,
+    # so the lifetime goes by the writes from the first sample on
+    flash_years = None
+    if len(samples) > 1:
+        writes_per_day = (samples[-1][4] - samples[0][4]) * 86400 / (samples[-1][0] - samples[0][0])
+        flash_years = FLASH_ENDURANCE / writes_per_day / 365 if writes_per_day else float("inf")
+        print("  after warm up {:.1f} writes per day, the FAT and directory sectors reach {} erase cycles after {:.1f} years".format(
+            writes_per_day, FLASH_ENDURANCE, flash_years))
+    elif flash.writes:
+        print("  the FAT and directory sectors reach {} erase cycles after {:.1f} days, boot writes included".format(
+            FLASH_ENDURANCE, FLASH_ENDURANCE * days / sum(flash.writes.values())))
+
+    if len(samples) > 1:
+        hours = (samples[-1][0] - samples[0][0]) / 3600
+        growth = samples[-1][3] - samples[0][3]
+        print("heap: {} allocated blocks at the first sample, {:+d} by the end, {:+.1f} per hour".format(samples[0][3], growth, growth / hours))
+        print("  samples: " + ", ".join("{:.0f}h {}".format(sample[0] / 3600, sample[3]) for sample in samples[::max(len(samples) // 12, 1)]))
+    snapshots = result["snapshots"]
+    if len(snapshots) > 1:
+        first = sum(stat.size for stat in snapshots[0].statistics("filename"))
+        last = sum(stat.size for stat in snapshots[-1].statistics("filename"))
+        print("  code.py and lib: {} bytes at the first sample, {:+d} by the end".format(first, last - first))
+        for stat in snapshots[-1].compare_to(snapshots[0], "lineno")[:5]:
+            if stat.size_diff:
+                frame = stat.traceback[0]
+                print("  {:+8d} bytes {:+6d} blocks  {}:{}".format(stat.size_diff, stat.count_diff, os.path.relpath(frame.filename, hostenv.ROOT_DIR), frame.lineno))
+    return flash_years
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run code.py for simulated days on virtual time and report what it wears out.")
+    parser.add_argument("--days", type=float, default=1, help="virtual days to run, 1 by default")
+    parser.add_argument("--hours", type=float, default=0, help="virtual hours to run on top of the days")
+    parser.add_argument("--ppm", type=int, default=0, help="RTC crystal error in parts per million")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    parser.add_argument("--timestamp", type=int, default=TIMESTAMP, help="contents of timestamp.txt at boot")
+    parser.add_argument("--trace-heap", action="store_true", help="attribute heap growth to lines of code with tracemalloc, much slower")
+    parser.add_argument("--trace", help="record a frame trace of the run to this file, for host/replay.py")
+    parser.add_argument("--slow-ms", type=int, default=0, help="extra work per frame in every other virtual minute, to drive the frame governor")
+    parser.add_argument("--min-flash-years", type=float, default=MIN_FLASH_YEARS, help="fail if the flash would wear out sooner than this")
+    options = parser.parse_args()
+
+    os.environ["TZ"] = "UTC" # RTCClock converts with time.mktime, which is UTC on the device
+    time.tzset()
+    seconds = int((options.days * 24 + options.hours) * 3600)
+    result = soak(seconds, options.ppm, options.seed, options.timestamp, options.trace_heap, bool(options.trace), options.slow_ms)
+    flash_years = report(seconds, result)
+    if options.trace:
+        with open(options.trace, "wb") as file:
+            file.write(result["flash"].files[DEVICE_TRACE_PATH.lstrip("/")])
+        print("frame trace saved to {}".format(options.trace))
+    if flash_years is not None and flash_years < options.min_flash_years:
+        print("flash wears out after {:.1f} years, under the {} year lifetime".format(flash_years, options.min_flash_years))
+        sys.exit(1)
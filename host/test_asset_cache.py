@@ -0,0 +1,122 @@
+# SPDX-License-Identifier: MIT
+
+import os
+import pytest
+import bitmaptools
+import displayio
+import asset_cache
+
+TILE = 8
+TILES = (2, 0)
+
+def make_sheet():
+    # Three tiles of stripes, with palette index 0 transparent
+    source = displayio.Bitmap(3 * TILE, TILE, 4)
+    for y in range(TILE):
+        for x in range(3 * TILE):
+            source[x, y] = (x // TILE + y) % 4
+    palette = displayio.Palette(4)
+    for index in range(4):
+        palette[index] = index * 0x111111
+    palette.make_transparent(0)
+    return source, palette
+
+@pytest.fixture
+def builds(monkeypatch):
+    # Count the tile builds by the fills they make, a load from the cache makes none
+    counted = []
+    fill_region = bitmaptools.fill_region
+    def counting(*args):
+        counted.append(args)
+        fill_region(*args)
+    monkeypatch.setattr(bitmaptools, "fill_region", counting)
+    return counted
+
+def scale(path=None):
+    source, palette = make_sheet()
+    return asset_cache.scale_tiles(source, palette, TILES, TILE, TILE, 2, None if path is None else str(path))
+
+def test_scaled_tiles(builds):
+    source, palette = make_sheet()
+    sheet, sheet_palette = asset_cache.scale_tiles(source, palette, TILES, TILE, TILE, 2)
+    assert (sheet.width, sheet.height) == (2 * TILE * 2, TILE * 2)
+    for y in range(sheet.height):
+        for x in range(sheet.width):
+            tile = TILES[x // (2 * TILE)]
+            value = source[tile * TILE + x % (2 * TILE) // 2, y // 2]
+            assert sheet_palette[sheet[x, y]] == palette[value]
+            assert sheet_palette.is_transparent(sheet[x, y]) == palette.is_transparent(value)
+
+def test_saved_then_loaded(tmp_path, builds):
+    path = tmp_path / "tiles.bin"
+    built, _ = scale(path)
+    assert builds
+    assert path.stat().st_size == asset_cache.HEADER_SIZE + built.width * built.height
+    assert not os.path.exists(str(path) + asset_cache.TEMP_SUFFIX)
+    builds.clear()
+    loaded, _ = scale(path)
+    assert not builds
+    assert loaded.data == built.data
+
+@pytest.mark.parametrize("cut", (1, 0.5, "header", "half header", "empty"))
+def test_truncated_cache_is_rebuilt(tmp_path, builds, cut):
+    path = tmp_path / "tiles.bin"
+    built, _ = scale(path)
+    data = path.read_bytes()
+    if cut == "header":
+        data = data[:asset_cache.HEADER_SIZE]
+    elif cut == "half header":
+        data = data[:asset_cache.HEADER_SIZE // 2]
+    elif cut == "empty":
+        data = b""
+    elif cut == 1:
+        data = data[:-1]
+    else:
+        data = data[:int(len(data) * cut)]
+    path.write_bytes(data)
+    builds.clear()
+    rebuilt, _ = scale(path)
+    assert builds
+    assert rebuilt.data == built.data
+    # The rebuilt cache is saved whole, and loads next time
+    assert path.stat().st_size == asset_cache.HEADER_SIZE + built.width * built.height
+    builds.clear()
+    scale(path)
+    assert not builds
+
+def test_stale_or_foreign_cache_is_rebuilt(tmp_path, builds):
+    path = tmp_path / "tiles.bin"
+    built, _ = scale(path)
+    data = bytearray(path.read_bytes())
+    # A cache of other tiles, by its checksum, then a file that is not a cache at all
+    for offset in (asset_cache.HEADER_SIZE - 1, 0):
+        changed = bytearray(data)
+        changed[offset] ^= 0xFF
+        path.write_bytes(changed)
+        builds.clear()
+        rebuilt, _ = scale(path)
+        assert builds
+        assert rebuilt.data == built.data
+        assert path.read_bytes() == data
+
+def test_unwritable_cache_still_builds(tmp_path, builds, capsys):
+    path = tmp_path / "missing" / "tiles.bin"
+    built, _ = scale(path)
+    assert builds
+    assert built.data == scale()[0].data
+    assert capsys.readouterr().out
+    assert not os.path.exists(str(path))
+
+def test_prescale_group(tmp_path):
+    source, palette = make_sheet()
+    group = displayio.Group(scale=2)
+    for position, tile in enumerate(TILES):
+        grid = displayio.TileGrid(source, pixel_shader=palette, tile_width=TILE, tile_height=TILE, x=position * TILE)
+        grid[0] = tile
+        group.append(grid)
+    group[1].flip_x = True
+    new_grids = asset_cache.prescale_group(group, str(tmp_path / "tiles.bin"))
+    assert group.scale == 1
+    assert [group[index] for index in range(len(group))] == new_grids
+    assert [(grid.x, grid.tile_width, grid[0]) for grid in new_grids] == [(0, 2 * TILE, 0), (2 * TILE, 2 * TILE, 1)]
+    assert new_grids[1].flip_x
@@ -0,0 +1,96 @@
+# SPDX-License-Identifier: MIT
+
+import struct
+import pytest
+import displayio
+import bake_starfield
+from baked_starfield import BakedStarfield, HEADER_FORMAT, HEADER_SIZE, MAGIC, VERSION, VALUE_SHIFT
+from occlusion import OcclusionMask
+
+WIDTH = 8
+HEIGHT = 4
+COLORS = 2
+
+# A star crossing the top row and one crossing the bottom row, as (pixel index, value) changes per frame.
+# The key frame draws both, and the loop ends where it started
+KEY = ((7, 1), (31, 2))
+LOOP = (((7, 0), (6, 1), (31, 0), (30, 2)), ((6, 0), (5, 1), (30, 0), (29, 2)), ((5, 0), (7, 1), (29, 0), (31, 2)))
+
+def pack(frames, width: int = WIDTH, height: int = HEIGHT, colors: int = COLORS, loop: int = None, max_changes: int = None) -> bytes:
+    data = struct.pack(HEADER_FORMAT, MAGIC, VERSION, width, height, colors, len(frames) - 1 if loop is None else loop,
+                       max(len(frame) for frame in frames) if max_changes is None else max_changes)
+    for frame in frames:
+        data += struct.pack("<I{}I".format(len(frame)), len(frame), *(index | value << VALUE_SHIFT for index, value in frame))
+    return data
+
+@pytest.fixture
+def starfield_path(tmp_path):
+    path = tmp_path / "starfield.bin"
+    path.write_bytes(pack((KEY,) + LOOP))
+    return path
+
+def test_plays_the_loop(starfield_path):
+    starfield = BakedStarfield(str(starfield_path))
+    assert (starfield.system_width, starfield.system_height, starfield.colors, starfield.frames) == (WIDTH, HEIGHT, COLORS, 3)
+    start = bytes(starfield.bitmap.data)
+    assert (starfield.bitmap[7, 0], starfield.bitmap[7, 3]) == (1, 2)
+    starfield.update()
+    assert (starfield.bitmap[7, 0], starfield.bitmap[6, 0], starfield.bitmap[6, 3]) == (0, 1, 2)
+    assert starfield.dirty_area() == (6, 0, 8, 4)
+    starfield.update()
+    starfield.update()
+    assert bytes(starfield.bitmap.data) == start
+    # Around the seam again
+    starfield.update()
+    assert starfield.frame == 1
+    assert starfield.bitmap[6, 0] == 1
+    starfield.close()
+
+def test_occluded_pixels_are_skipped(starfield_path):
+    starfield = BakedStarfield(str(starfield_path))
+    cover = displayio.Bitmap(4, 2, 2)
+    cover.fill(1)
+    palette = displayio.Palette(2)
+    starfield.occlusion = OcclusionMask(WIDTH, HEIGHT, (displayio.TileGrid(cover, pixel_shader=palette, x=4, y=-1),), starfield.bitmap)
+    # The cover hides the top right, so the top star is cleared and not drawn while the bottom one moves on
+    assert starfield.bitmap[7, 0] == 0
+    starfield.update()
+    assert starfield.occluded == 2
+    assert (starfield.bitmap[6, 0], starfield.bitmap[6, 3]) == (0, 2)
+    assert starfield.dirty_area() == starfield.dirty_area(False) == (6, 0, 8, 4)
+    starfield.close()
+
+def damaged_files():
+    whole = pack((KEY,) + LOOP)
+    frame = struct.calcsize("<I4I")
+    yield "empty", b""
+    yield "half a header", whole[:HEADER_SIZE // 2]
+    yield "no frames", whole[:HEADER_SIZE]
+    yield "cut in a count", whole[:HEADER_SIZE + 4 + 8 + 2]
+    yield "cut in the changes", whole[:-5]
+    yield "missing its last frame", whole[:-frame]
+    yield "trailing bytes", whole + b"\x00"
+    yield "bad magic", b"XXXX" + whole[4:]
+    yield "newer version", whole[:4] + bytes((VERSION + 1,)) + whole[5:]
+    yield "more changes than the header", pack((KEY,) + LOOP, max_changes=2)
+    yield "pixel off the screen", pack((KEY, LOOP[0], LOOP[1], ((5, 0), (WIDTH * HEIGHT, 1))))
+    yield "value past the colors", pack((KEY, LOOP[0], LOOP[1], ((5, 0), (7, COLORS + 1))))
+    yield "fewer frames than the header", pack((KEY,) + LOOP, loop=4)
+
+@pytest.mark.parametrize("name, data", list(damaged_files()), ids=[name for name, _ in damaged_files()])
+def test_damaged_file_is_refused(tmp_path, monkeypatch, name, data):
+    path = tmp_path / "starfield.bin"
+    path.write_bytes(data)
+    # Refused before the bitmap is allocated
+    monkeypatch.setattr(displayio, "Bitmap", None)
+    with pytest.raises(ValueError):
+        BakedStarfield(str(path))
+
+def test_baked_loop_plays_back(tmp_path):
+    path = str(tmp_path / "starfield.bin")
+    key, deltas, bitmaps, colors = bake_starfield.bake(14, 1, num_particles=5, colors=1)
+    bake_starfield.write(path, key, deltas, colors)
+    assert bake_starfield.check(path, bitmaps) == 0
+    starfield = BakedStarfield(path)
+    assert starfield.frames == len(deltas) == len(bitmaps) - 1
+    starfield.close()
@@ -0,0 +1,73 @@
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import busio
+import virtual_clock
+from adafruit_pcf8523_timer import Timer
+import frame_clock
+from frame_clock import FrameClock
+from pcf8523_model import PCF8523Model
+
+def make_frames(clock, rate: float = 4):
+    model = PCF8523Model(clock, 1700000000)
+    i2c = busio.I2C(clock=clock)
+    i2c.attach(0x68, model)
+    return model, FrameClock(Timer(i2c), rate)
+
+async def frame_loop(clock, model, frames, seconds: float, work: float) -> list:
+    # Wait for each tick and block the loop for work seconds, as a frame's update and refresh do. Returns the ticks
+    # of each wait, and how far the frame clock's count was behind the timer's right after it
+    task = asyncio.create_task(frames.run())
+    waits = []
+    behind = []
+    end = clock.monotonic() + seconds
+    while clock.monotonic() < end:
+        waits.append(await frames.wait())
+        behind.append(model.timer_ticks() - frames.ticks)
+        clock.sleep(work)
+    task.cancel()
+    return waits, behind
+
+def test_divider_and_rate(clock):
+    _, frames = make_frames(clock, 4)
+    assert frames.divider == 16
+    assert frames.rate == 4
+    assert frames.period_ns == 250000000
+    _, frames = make_frames(clock, 0.1)
+    assert frames.divider == 255
+
+def test_ticks_at_the_timer_rate(clock):
+    model, frames = make_frames(clock)
+    waits, behind = virtual_clock.run(frame_loop(clock, model, frames, 60, 0.1), clock)
+    assert frames.missed == 0
+    assert all(ticks == 1 for ticks in waits)
+    assert set(behind) == {0}
+    assert abs(frames.ticks - 240) <= 1
+
+def test_long_frames_count_missed_ticks(clock):
+    model, frames = make_frames(clock)
+    # Each frame takes 2.4 periods, so every wait covers 2 or 3 ticks
+    waits, behind = virtual_clock.run(frame_loop(clock, model, frames, 60, 0.6), clock)
+    assert set(waits[1:]) <= {2, 3}
+    assert frames.missed == sum(waits) - len(waits)
+    # Missed periods are worked out from time, so the count keeps up with the timer
+    assert set(behind) <= {0, 1}
+
+def test_tick_clears_its_flag_and_keeps_timer_a(clock):
+    model, frames = make_frames(clock)
+    timer = frames.timer
+    timer.timer_frequency = timer.TIMER_FREQ_1HZ
+    timer.timer_value = 3
+    timer.timer_enabled = True
+    clock.sleep(0.3)
+    assert frames.poll() == 1
+    assert not frames.control & frame_clock.CTAF
+    assert not model.registers[frame_clock.CONTROL_2] & frame_clock.CTBF
+    assert frames.poll() == 0
+    clock.sleep(3)
+    assert frames.poll() == 12
+    # The Timer A flag comes with the tick's read, and stays set on the chip until it is cleared
+    assert frames.control & frame_clock.CTAF
+    assert model.registers[frame_clock.CONTROL_2] & frame_clock.CTAF
+    asyncio.run(frames.clear_flags(frame_clock.CTAF))
+    assert not model.registers[frame_clock.CONTROL_2] & frame_clock.CTAF
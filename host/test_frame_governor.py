@@ -0,0 +1,93 @@
+# SPDX-License-Identifier: MIT
+
+import displayio
+import frame_trace
+import moon_scene
+import replay
+import simple_particle_sim
+from frame_governor import FrameGovernor
+
+RATE = 4
+LEVELS = ((50, 1), (30, 1), (30, 2), (15, 2))
+
+def frame(clock, governor, work_ms: int, ticks: int = 1) -> bool:
+    # Draw one frame taking work_ms if the governor wants it drawn, and return whether the level changed
+    if not governor.begin_frame(ticks):
+        return False
+    clock.sleep(work_ms / 1000)
+    return governor.end_frame()
+
+def test_overruns_step_down_after_patience(clock):
+    governor = FrameGovernor(RATE, LEVELS)
+    assert (governor.particles, governor.target_fps) == (50, 4)
+    # Over 90% of the 250 ms period is an overrun
+    assert [frame(clock, governor, 240) for _ in range(4)] == [False, False, False, True]
+    assert governor.level == 1
+    assert governor.particles == 30
+    assert governor.overruns == 4
+    # A frame in budget starts the count again
+    for work_ms in (240, 240, 240, 100, 240, 240, 240):
+        assert not frame(clock, governor, work_ms)
+    assert governor.level == 1
+
+def test_late_ticks_count_as_overruns(clock):
+    governor = FrameGovernor(RATE, LEVELS)
+    for _ in range(4):
+        frame(clock, governor, 10, ticks=2)
+    assert governor.level == 1
+
+def test_divider_skips_ticks(clock):
+    governor = FrameGovernor(RATE, LEVELS)
+    governor.level = 2
+    assert governor.target_fps == 2
+    assert [governor.begin_frame(1) for _ in range(2)] == [False, True]
+    governor.end_frame()
+    # A long frame that used up both ticks of the period is drawn straight away, and is not late
+    assert governor.begin_frame(2)
+    governor.end_frame()
+    assert governor.overruns == 0
+
+def test_headroom_steps_back_up_and_stops_at_the_ends(clock):
+    governor = FrameGovernor(RATE, LEVELS)
+    for _ in range(4 * len(LEVELS)):
+        frame(clock, governor, 600)
+    assert governor.level == len(LEVELS) - 1
+    assert governor.changes == len(LEVELS) - 1
+    # Half of the level above's 500 ms period is headroom at the bottom level
+    changes = [frame(clock, governor, 200, ticks=2) for _ in range(40)]
+    assert changes.count(True) == 1
+    assert changes[-1]
+    assert governor.level == len(LEVELS) - 2
+    for _ in range(40 * len(LEVELS)):
+        frame(clock, governor, 10, ticks=2 if governor.levels[governor.level][1] == 2 else 1)
+    assert governor.level == 0
+    assert governor.changes == 2 * (len(LEVELS) - 1)
+
+def test_fps_over_the_window(clock):
+    governor = FrameGovernor(RATE, LEVELS, window=8)
+    for _ in range(8):
+        frame(clock, governor, 100)
+        clock.sleep(0.15)
+    # The window runs from the governor's start to the end of the 8th frame, 7 periods and a frame
+    assert governor.fps == 8 * 1000 / (8 * 250 - 150)
+
+def test_governed_trace_replays(tmp_path):
+    # Record a trace the way code.py does when the governor changes level: resize after the frame is recorded
+    path = str(tmp_path / "trace.bin")
+    args = (50, 64, 96, -5, 0, 0, 0, 95, 0, False, True, 3)
+    writer = frame_trace.FrameTraceWriter(path, 3, args, 0)
+    particle_system = simple_particle_sim.ParticleSystem(*args)
+    rocket = displayio.TileGrid(displayio.Bitmap(32, 32, 1), pixel_shader=displayio.Palette(1))
+    rocket.flip_y = True
+    counts = {20: 30, 40: 15, 60: 50}
+    for number in range(80):
+        writer.begin_frame()
+        particle_system.remove_out_of_bounds()
+        particle_system.update()
+        moon_scene.step_rocket(rocket, 16)
+        writer.end_frame(False, 1700000000, 0, rocket, 1, particle_system)
+        if number in counts:
+            particle_system.resize(counts[number])
+    writer.close()
+    assert sorted({frame.particles for frame in frame_trace.FrameTraceReader(path)}) == [15, 30, 50]
+    assert replay.replay(path) == 0
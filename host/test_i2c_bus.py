@@ -0,0 +1,93 @@
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import busio
+import virtual_clock
+from adafruit_bus_device.i2c_device import I2CDevice
+from adafruit_pcf8523_timer import Timer
+import frame_clock
+from frame_clock import FrameClock
+from i2c_bus import I2CBusManager
+from pcf8523_model import PCF8523Model, CONTROL_2, SECONDS, TMR_B_REG, WTAF
+
+def make_bus(clock):
+    model = PCF8523Model(clock, 1700000000)
+    i2c = busio.I2C(clock=clock)
+    i2c.attach(0x68, model)
+    return model, i2c
+
+async def gather(bus, *accesses):
+    # Queue the accesses, then let the manager flush them once
+    task = asyncio.create_task(bus.run())
+    results = await asyncio.gather(*accesses)
+    task.cancel()
+    return results
+
+def test_accesses_run_in_order_one_transaction_each(clock):
+    model, i2c = make_bus(clock)
+    bus = I2CBusManager(I2CDevice(i2c, 0x68))
+    i2c.reset_stats()
+    _, before, after, time_registers = virtual_clock.run(gather(
+        bus, bus.write(TMR_B_REG, b"\x10"), bus.read(TMR_B_REG), bus.read(TMR_B_REG), bus.read(SECONDS, 7)), clock)
+    # The reads queued after the write see it, and the two reads of one register are not merged
+    assert before == after == bytearray(b"\x10")
+    assert len(time_registers) == 7
+    assert bus.accesses == bus.transactions == i2c.totals().transactions == 4
+    assert bus.bytes == 2 + 2 + 2 + 8
+    assert model.reads[TMR_B_REG] == 2
+    assert model.writes[TMR_B_REG] == 1
+
+def read_clearing_watchdog(model):
+    # Make the model clear the watchdog flag when Control_2 is read, as the chip does
+    read_register = model.read_register
+    def read(register):
+        value = read_register(register)
+        if register == CONTROL_2:
+            model.registers[CONTROL_2] &= ~WTAF
+        return value
+    return read
+
+def test_every_read_reaches_the_device(clock):
+    # Reading Control_2 clears the watchdog flag, so two reads in one flush can see different values
+    model, i2c = make_bus(clock)
+    bus = I2CBusManager(I2CDevice(i2c, 0x68))
+    model.registers[CONTROL_2] |= WTAF
+    model.read_register = read_clearing_watchdog(model)
+    first, second = virtual_clock.run(gather(bus, bus.read(CONTROL_2), bus.read(CONTROL_2)), clock)
+    assert first[0] & WTAF
+    assert not second[0] & WTAF
+
+def test_frame_clock_through_the_bus(clock):
+    model, i2c = make_bus(clock)
+    timer = Timer(i2c)
+    bus = I2CBusManager(timer.i2c_device)
+    frames = FrameClock(timer, 4, bus=bus)
+    i2c.reset_stats()
+
+    async def poll_twice():
+        task = asyncio.create_task(bus.run())
+        clock.sleep(0.3)
+        first = await frames.poll_bus()
+        transactions = bus.transactions
+        second = await frames.poll_bus()
+        task.cancel()
+        return first, transactions, second
+    first, transactions, second = virtual_clock.run(poll_twice(), clock)
+    # One read of Control_2 and one write clearing the tick flag, then a read finding it clear
+    assert first == 1
+    assert transactions == 2
+    assert second == 0
+    assert bus.transactions == i2c.totals().transactions == 3
+    assert not model.registers[CONTROL_2] & frame_clock.CTBF
+
+def test_direct_poll_transactions(clock):
+    model, i2c = make_bus(clock)
+    frames = FrameClock(Timer(i2c), 4)
+    i2c.reset_stats()
+    writes = model.writes[CONTROL_2]
+    assert frames.poll() == 0
+    assert i2c.totals().transactions == 1
+    clock.sleep(0.3)
+    assert frames.poll() == 1
+    assert i2c.totals().transactions == 3
+    assert model.writes[CONTROL_2] == writes + 1
@@ -0,0 +1,130 @@
+# SPDX-License-Identifier: MIT
+
+import random
+import displayio
+import frame_trace
+import moon_scene
+import replay
+import simple_particle_sim
+from occlusion import OcclusionMask, OCCLUDED, VISIBLE
+
+WIDTH = 96
+HEIGHT = 64
+TILE = 16
+PARTICLE_ARGS = (40, HEIGHT, WIDTH, -5, 0, 0, 0, WIDTH - 1, 0, False, True, 3)
+
+def make_scene():
+    # Tile 0 is an 8x8 opaque corner, tile 1 is opaque all over, and palette index 0 is transparent
+    sheet = displayio.Bitmap(2 * TILE, TILE, 2)
+    for y in range(TILE):
+        for x in range(TILE):
+            sheet[TILE + x, y] = 1
+            if x < 8 and y < 8:
+                sheet[x, y] = 1
+    palette = displayio.Palette(2)
+    palette.make_transparent(0)
+    grid = displayio.TileGrid(sheet, pixel_shader=palette, width=2, height=1, tile_width=TILE, tile_height=TILE, x=4, y=4)
+    scaled = displayio.TileGrid(sheet, pixel_shader=palette, tile_width=TILE, tile_height=TILE)
+    group = displayio.Group(scale=2, x=40, y=20)
+    group.append(scaled)
+    return grid, scaled, group
+
+def fresh(layers):
+    return bytes(OcclusionMask(WIDTH, HEIGHT, layers).bitmap.data)
+
+def test_incremental_updates_match_a_fresh_mask():
+    grid, scaled, group = make_scene()
+    layers = (grid, group)
+    mask = OcclusionMask(WIDTH, HEIGHT, layers)
+    assert mask.bitmap[4, 4] == OCCLUDED
+    assert mask.bitmap[12, 12] == VISIBLE
+    assert mask.bitmap[40, 20] == OCCLUDED
+    assert mask.bitmap[55, 35] == OCCLUDED
+    assert mask.bitmap[56, 36] == VISIBLE
+
+    changes = (
+        lambda: setattr(grid, "x", 30),
+        lambda: setattr(grid, "flip_x", True),
+        lambda: grid.__setitem__(0, 1),
+        lambda: setattr(scaled, "y", 5),
+        lambda: setattr(grid, "transpose_xy", True),
+        lambda: setattr(group, "hidden", True),
+        lambda: setattr(group, "hidden", False),
+        lambda: setattr(grid, "x", -10),
+    )
+    for change in changes:
+        change()
+        assert mask.update()
+        assert bytes(mask.bitmap.data) == fresh(layers)
+    rebuilds = mask.rebuilds
+    assert not mask.update()
+    assert mask.rebuilds == rebuilds
+
+def test_new_stamps_clear_the_target():
+    grid, _, _ = make_scene()
+    target = displayio.Bitmap(WIDTH, HEIGHT, 4)
+    target.fill(3)
+    mask = OcclusionMask(WIDTH, HEIGHT, (grid,), target)
+    assert target[4, 4] == 0
+    assert target[12, 12] == 3
+    grid.x = 50
+    mask.update()
+    assert target[50, 4] == 0
+
+def make_particles(mask_layers=None):
+    random.seed(1)
+    particle_system = simple_particle_sim.ParticleSystem(*PARTICLE_ARGS)
+    if mask_layers is not None:
+        particle_system.occlusion = OcclusionMask(WIDTH, HEIGHT, mask_layers, particle_system.bitmap)
+    return particle_system
+
+def test_mask_skips_writes_but_not_moves():
+    grid, _, group = make_scene()
+    masked = make_particles((grid, group))
+    plain = make_particles()
+    occluded = 0
+    for frame in range(60):
+        for particle_system in (masked, plain):
+            random.seed(frame)
+            particle_system.remove_out_of_bounds()
+            particle_system.update()
+        occluded += masked.occluded
+        # The particles move the same, and the unmasked dirty area is what the plain system wrote
+        assert frame_trace.particle_checksum(masked) == frame_trace.particle_checksum(plain)
+        assert masked.dirty_area(False) == plain.dirty_area()
+    assert occluded
+    assert masked.bitmap.data != plain.bitmap.data
+
+def record(path, frames: int) -> int:
+    # Record a trace the way code.py does, with the particles behind the scene
+    writer = frame_trace.FrameTraceWriter(str(path), 7, PARTICLE_ARGS, 0)
+    particle_system = simple_particle_sim.ParticleSystem(*PARTICLE_ARGS)
+    grid, _, group = make_scene()
+    particle_system.occlusion = OcclusionMask(WIDTH, HEIGHT, (grid, group), particle_system.bitmap)
+    rocket = displayio.TileGrid(displayio.Bitmap(2 * TILE, 2 * TILE, 1), pixel_shader=displayio.Palette(1))
+    rocket.flip_y = True
+    occluded = 0
+    for _ in range(frames):
+        writer.begin_frame()
+        particle_system.remove_out_of_bounds()
+        particle_system.update()
+        moon_scene.step_rocket(rocket, TILE)
+        writer.end_frame(False, 1700000000, 0, rocket, 1, particle_system)
+        occluded += bool(particle_system.occluded)
+    writer.close()
+    return occluded
+
+def test_occluded_trace_replays(tmp_path):
+    path = tmp_path / "trace.bin"
+    assert record(path, 80)
+    assert replay.replay(str(path)) == 0
+
+    # A star out of place on an occluded frame is caught by the position checksum, which each record stores
+    # before its 4 stage timings and crc
+    frames = list(frame_trace.FrameTraceReader(str(path)))
+    frame = next(frame for frame in frames if frame.occluded)
+    offset = frame_trace.HEADER_SIZE + frame.frame * frame_trace.FRAME_SIZE + frame_trace.FRAME_SIZE - 4 * 6
+    data = bytearray(path.read_bytes())
+    data[offset] ^= 1
+    path.write_bytes(data)
+    assert replay.replay(str(path)) == 1
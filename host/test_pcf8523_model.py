@@ -0,0 +1,95 @@
+# SPDX-License-Identifier: MIT
+
+import errno
+import pytest
+import busio
+import pcf8523_model
+from pcf8523_model import PCF8523Model, CONTROL_1, CONTROL_2, SECONDS, TMR_CLKOUT_CTRL, TMR_B_FREQ_CTRL, TMR_B_REG
+
+START_EPOCH = 1700000000
+
+def make_bus(clock, ppm: int = 0):
+    model = PCF8523Model(clock, START_EPOCH, ppm)
+    i2c = busio.I2C(clock=clock)
+    i2c.attach(0x68, model)
+    assert i2c.try_lock()
+    return model, i2c
+
+def read(i2c, register: int, length: int = 1) -> bytearray:
+    buffer = bytearray(1 + length)
+    buffer[0] = register
+    i2c.writeto_then_readfrom(0x68, buffer, buffer, out_end=1, in_start=1)
+    return buffer[1:]
+
+def write(i2c, register: int, *values):
+    i2c.writeto(0x68, bytes((register,) + values))
+
+def test_time_registers_count_on_the_crystal(clock):
+    model, i2c = make_bus(clock, ppm=100)
+    assert model.epoch() == START_EPOCH
+    # Tuesday 2023-11-14 22:13:20 in BCD, with the oscillator stopped flag clear
+    assert read(i2c, SECONDS, 7) == bytearray((0x20, 0x13, 0x22, 0x14, 1, 0x11, 0x23))
+    # 100 ppm fast gains a second in 10000, and rolls over to Wednesday 01:00:01
+    clock.sleep(10000)
+    assert model.epoch() == START_EPOCH + 10001
+    assert read(i2c, SECONDS, 7) == bytearray((0x01, 0x00, 0x01, 0x15, 2, 0x11, 0x23))
+
+def test_control_2_flags_clear_on_zero_only(clock):
+    model, i2c = make_bus(clock)
+    model.registers[CONTROL_2] = pcf8523_model.CTAF | pcf8523_model.CTBF
+    write(i2c, CONTROL_2, pcf8523_model.FLAGS & ~pcf8523_model.CTBF | pcf8523_model.CTAIE)
+    assert read(i2c, CONTROL_2)[0] == pcf8523_model.CTAF | pcf8523_model.CTAIE
+
+def test_timer_b_countdown(clock):
+    model, i2c = make_bus(clock)
+    # 64Hz source divided by 16, 4 ticks a second, with its interrupt enabled
+    write(i2c, TMR_B_FREQ_CTRL, 0b001)
+    write(i2c, TMR_B_REG, 16)
+    write(i2c, CONTROL_2, pcf8523_model.CTBIE)
+    write(i2c, TMR_CLKOUT_CTRL, pcf8523_model.TBC)
+    clock.sleep(0.24)
+    assert not read(i2c, CONTROL_2)[0] & pcf8523_model.CTBF
+    clock.sleep(0.02)
+    assert read(i2c, CONTROL_2)[0] & pcf8523_model.CTBF
+    clock.sleep(1)
+    assert model.timer_ticks() == 5
+    assert model.interrupts == 5
+
+def test_software_reset_keeps_the_time(clock):
+    model, i2c = make_bus(clock)
+    write(i2c, TMR_B_REG, 16)
+    clock.sleep(5)
+    write(i2c, CONTROL_1, pcf8523_model.SOFTWARE_RESET)
+    assert model.registers == bytearray(pcf8523_model.RESET_VALUES)
+    assert model.epoch() == START_EPOCH + 5
+
+def test_register_address_wraps(clock):
+    model, i2c = make_bus(clock)
+    assert read(i2c, TMR_B_REG, 3) == bytearray((0, 0, 0))
+    assert model.reads[TMR_B_REG] == model.reads[CONTROL_1] == model.reads[CONTROL_2] == 1
+    assert model.pointer == pcf8523_model.CONTROL_3
+
+def test_bus_accounting(clock):
+    model, i2c = make_bus(clock)
+    start = clock.monotonic_ns()
+    read(i2c, CONTROL_2)
+    write(i2c, CONTROL_2, 0)
+    total = i2c.totals()
+    assert total.transactions == 2
+    assert total.bytes_written == 3
+    assert total.bytes_read == 1
+    assert list(i2c.callers) == ["test_pcf8523_model.read", "test_pcf8523_model.write"]
+    # Start, stop and 9 clocks per byte with the address at 100kHz: 40 clocks for the read with its repeated start,
+    # 29 for the write
+    assert clock.monotonic_ns() - start == 690000
+    i2c.reset_stats()
+    assert i2c.totals().transactions == 0
+
+def test_bus_errors(clock):
+    _, i2c = make_bus(clock)
+    with pytest.raises(OSError) as error:
+        i2c.writeto(0x50, b"\x00")
+    assert error.value.errno == errno.ENODEV
+    i2c.unlock()
+    with pytest.raises(RuntimeError):
+        write(i2c, CONTROL_2, 0)
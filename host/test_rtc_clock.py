@@ -0,0 +1,87 @@
+# SPDX-License-Identifier: MIT
+
+import time
+import rtc_clock
+from rtc_clock import RTCClock
+
+START_EPOCH = 1700000000 # Past 2**30, a long int on the device
+
+class FakeRTC:
+    """
+    An RTC whose crystal runs ppm parts per million fast against the virtual clock, counting its reads.
+
+    Attributes:
+        reads (int): The number of reads of datetime.
+        offset (int): Seconds added to the time, to set the clock.
+    """
+    def __init__(self, clock, ppm: int = 0):
+        self.clock = clock
+        self.ppm = ppm
+        self.reads = 0
+        self.offset = 0
+
+    @property
+    def datetime(self):
+        self.reads += 1
+        elapsed = self.clock.monotonic_ns() * (1000000 + self.ppm) // 1000000 // 1000000000
+        return time.localtime(START_EPOCH + self.offset + elapsed)
+
+def run(clock, rtc_clock, seconds: int, step: int = 60):
+    # Ask for the time every step seconds, as the timer task does
+    for _ in range(seconds // step):
+        clock.sleep(step)
+        rtc_clock.seconds()
+
+def test_interpolates_between_syncs(clock):
+    rtc = FakeRTC(clock)
+    software = RTCClock(rtc, sync_interval=300)
+    clock.sleep(10.5)
+    assert software.seconds() == 10
+    assert software.now() == START_EPOCH + 10
+    assert rtc.reads == 1
+    clock.sleep(290)
+    assert software.seconds() == 300
+    assert rtc.reads == 2
+    assert software.syncs == 2
+
+def test_seconds_stay_small_ints(clock):
+    software = RTCClock(FakeRTC(clock))
+    assert software.base == START_EPOCH
+    assert software.base >= 1 << 30
+    run(clock, software, 7 * 86400, 3600)
+    assert 0 <= software.seconds() < 1 << 30
+    assert software.now() == software.base + software.seconds()
+
+def test_sync_interval_is_capped(clock):
+    software = RTCClock(FakeRTC(clock), sync_interval=3600)
+    assert software.sync_ms == rtc_clock.MAX_SYNC_MS
+
+def test_no_drift_correction_before_baseline(clock):
+    software = RTCClock(FakeRTC(clock, ppm=100))
+    run(clock, software, rtc_clock.MIN_DRIFT_BASELINE - 3600)
+    assert software.ms_per_ks == rtc_clock.NOMINAL_MS_PER_KS
+
+def test_drift_is_measured_and_corrected(clock):
+    for ppm in (100, -100):
+        clock.ns = 0
+        rtc = FakeRTC(clock, ppm)
+        software = RTCClock(rtc)
+        run(clock, software, rtc_clock.MIN_DRIFT_BASELINE + 86400)
+        # Local milliseconds per 1000 RTC seconds. RTC reads are whole seconds, so it is within a second over the baseline
+        expected = 1000000 * 1000000 // (1000000 + ppm)
+        assert abs(software.ms_per_ks - expected) <= 1000000 // rtc_clock.MIN_DRIFT_BASELINE + 1
+        assert abs(software.last_error) <= 1
+        assert software.max_error <= 1
+
+def test_setting_the_rtc_restarts_the_baseline(clock):
+    rtc = FakeRTC(clock, ppm=100)
+    software = RTCClock(rtc)
+    run(clock, software, 86400)
+    rtc.offset = 1000
+    run(clock, software, 300)
+    assert software.last_error < -rtc_clock.MAX_SYNC_ERROR
+    assert software.max_error == 0
+    assert software.now() == rtc.clock.monotonic_ns() * 1000100 // 1000000 // 1000000000 + START_EPOCH + 1000
+    # The day before the jump does not count towards the baseline
+    run(clock, software, rtc_clock.MIN_DRIFT_BASELINE - 86400)
+    assert software.ms_per_ks == rtc_clock.NOMINAL_MS_PER_KS
@@ -0,0 +1,89 @@
+# SPDX-License-Identifier: MIT
+
+import errno
+import os
+import pytest
+import hostenv
+import displayio
+import adafruit_imageload
+import tile_provider
+
+SHEET_PATH = os.path.join(hostenv.ROOT_DIR, "art", "sprite_sheet.bmp")
+TILE = 16
+
+def assert_tile_shown(provider, slot: int, sheet, tile: int):
+    columns = sheet.width // TILE
+    for y in range(TILE):
+        for x in range(TILE):
+            assert provider.bitmap[slot * TILE + x, y] == sheet[(tile % columns) * TILE + x, (tile // columns) * TILE + y]
+
+@pytest.fixture
+def sheet():
+    bitmap, _ = adafruit_imageload.load(SHEET_PATH, bitmap=displayio.Bitmap, palette=displayio.Palette)
+    return bitmap
+
+def test_tiles_match_the_sheet(sheet):
+    provider = tile_provider.TileProvider(SHEET_PATH, TILE, TILE, 4)
+    assert provider.tile_count == 19
+    for tile in (0, 7, 18):
+        assert_tile_shown(provider, provider.acquire(tile), sheet, tile)
+    provider.close()
+
+def test_least_recently_used_unpinned_slot_is_reused():
+    provider = tile_provider.TileProvider(SHEET_PATH, TILE, TILE, 3)
+    slots = [provider.acquire(tile) for tile in (0, 1, 2)]
+    assert sorted(slots) == [0, 1, 2]
+    provider.release(0)
+    provider.release(1)
+    # Tile 1 was released last, so tile 0's slot goes first
+    assert provider.acquire(3) == slots[0]
+    assert provider.acquire(1) == slots[1]
+    assert (provider.loads, provider.hits) == (4, 1)
+    with pytest.raises(RuntimeError):
+        provider.acquire(4)
+    with pytest.raises(ValueError):
+        provider.acquire(19)
+    provider.close()
+
+def test_grid_pins_its_tiles(sheet):
+    provider = tile_provider.TileProvider(SHEET_PATH, TILE, TILE, 4)
+    grid = tile_provider.StreamedTileGrid(provider, width=2, height=2, tiles=(0, 1, 2, 3))
+    assert grid.tile_version == provider.loads == 4
+    assert provider._users == [1, 1, 1, 1]
+    # The cache is full, so the new tile takes the slot the old one leaves
+    slot = grid[3]
+    grid.set_tile(3, 5)
+    assert grid.get_tile(3) == 5
+    assert grid[3] == slot
+    assert_tile_shown(provider, slot, sheet, 5)
+    grid.release_tiles()
+    assert provider._users == [0, 0, 0, 0]
+    assert grid.get_tile(0) is None
+    provider.close()
+
+def test_failed_set_tile_keeps_the_old_tile():
+    provider = tile_provider.TileProvider(SHEET_PATH, TILE, TILE, 2)
+    grid = tile_provider.StreamedTileGrid(provider, width=2, height=1, tiles=(0, 1))
+    with pytest.raises(ValueError):
+        grid.set_tile(0, 99)
+    assert grid.get_tile(0) == 0
+    assert provider._users == [1, 1]
+    # The old tile is still pinned once, so releasing the grid does not release it twice
+    grid.release_tiles()
+    assert provider._users == [0, 0]
+    provider.close()
+
+def test_failed_restore_raises_the_first_error():
+    provider = tile_provider.TileProvider(SHEET_PATH, TILE, TILE, 2)
+    grid = tile_provider.StreamedTileGrid(provider, width=2, height=1, tiles=(0, 1))
+    # Every read from flash fails now, so loading the old tile back into the slot it freed fails too
+    def failing_load(tile, slot):
+        raise OSError(errno.EIO, "reading tile {}".format(tile))
+    provider._load = failing_load
+    with pytest.raises(OSError, match="reading tile 5"):
+        grid.set_tile(0, 5)
+    assert grid.get_tile(0) is None
+    assert provider._users == [0, 1]
+    grid.release_tiles()
+    assert provider._users == [0, 0]
+    provider.close()
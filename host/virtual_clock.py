@@ -0,0 +1,100 @@
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import math
+import selectors
+
+class VirtualClock:
+    """
+    A monotonic clock for host runs that only moves when it is told to.
+
+    Attributes:
+        ns (int): The current time in nanoseconds.
+    """
+    def __init__(self, start_ns: int = 0):
+        """
+        Initializes the clock.
+
+        Parameters:
+            start_ns (int): The starting time in nanoseconds.
+        """
+        self.ns = start_ns
+
+    def monotonic_ns(self) -> int:
+        """
+        Get the current time.
+
+        Returns:
+            int: The current time in nanoseconds.
+        """
+        return self.ns
+
+    def monotonic(self) -> float:
+        """
+        Get the current time.
+
+        Returns:
+            float: The current time in seconds.
+        """
+        return self.ns / 1000000000
+
+    def advance_ns(self, ns: int):
+        """
+        Move the clock forward.
+
+        Parameters:
+            ns (int): Nanoseconds to move forward.
+        """
+        self.ns += ns
+
+    def sleep(self, seconds: float):
+        """
+        Move the clock forward, standing in for time.sleep().
+
+        Parameters:
+            seconds (float): Seconds to move forward.
+        """
+        self.advance_ns(math.ceil(seconds * 1000000000))
+
+
+class VirtualSelector(selectors.DefaultSelector):
+    """
+    A selector that advances a VirtualClock by the timeout instead of blocking.
+    """
+    def __init__(self, clock: VirtualClock):
+        super().__init__()
+        self.clock = clock
+
+    def select(self, timeout=None):
+        if timeout is None:
+            raise RuntimeError("virtual event loop has nothing scheduled and would block forever")
+        if timeout > 0:
+            self.clock.sleep(timeout)
+        return super().select(0)
+
+
+class VirtualEventLoop(asyncio.SelectorEventLoop):
+    """
+    An asyncio event loop on virtual time, so asyncio.sleep() takes no wall clock time.
+    """
+    def __init__(self, clock: VirtualClock):
+        super().__init__(VirtualSelector(clock))
+        self.clock = clock
+
+    def time(self):
+        return self.clock.monotonic()
+
+
+def run(coro, clock: VirtualClock):
+    """
+    Run a coroutine to completion on a VirtualEventLoop, standing in for asyncio.run().
+
+    Parameters:
+        coro: The coroutine to run.
+        clock (VirtualClock): The clock the event loop runs on.
+
+    Returns:
+        The result of the coroutine.
+    """
+    with asyncio.Runner(loop_factory=lambda: VirtualEventLoop(clock)) as runner:
+        return runner.run(coro)
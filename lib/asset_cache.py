@@ -0,0 +1,159 @@
+# SPDX-License-Identifier: MIT
+
+import struct
+import displayio
+import bitmaptools
+from os import remove, rename
+
+# Cache file layout: a header, then the scaled tiles one byte per pixel, row by row, for bitmaptools.readinto
+MAGIC = b"SCL1"
+HEADER_FORMAT = "<4sHHI" # Magic, width, height, checksum of the source tiles
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+TEMP_SUFFIX = ".tmp" # The cache is written under this suffix, then renamed, so a power cut never leaves half a file in place
+
+def scale_tiles(source, palette, tiles: tuple, tile_width: int, tile_height: int, scale: int, path: str = None):
+    """
+    Build a sheet of scaled copies of some tiles of a sprite sheet, laid out in one row in the order given.
+    The sheet only has the colors the tiles use, so it can take fewer bits per pixel than the sprite sheet.
+
+    Parameters:
+        source (displayio.Bitmap): The sprite sheet.
+        palette (displayio.Palette): The sprite sheet palette.
+        tiles (tuple): The tile indexes to copy.
+        tile_width (int): Width of a tile in the sprite sheet in pixels.
+        tile_height (int): Height of a tile in the sprite sheet in pixels.
+        scale (int): The scaling factor.
+        path (str): A file to load the scaled tiles from, and to save them to if it is missing or out of date. None to always build them.
+
+    Returns:
+        tuple: The scaled sheet as a displayio.Bitmap and its displayio.Palette.
+    """
+    # Give the colors the tiles use new values, in the order they are found
+    columns = source.width // tile_width
+    values = {}
+    checksum = 0
+    for tile in tiles:
+        source_x = (tile % columns) * tile_width
+        source_y = (tile // columns) * tile_height
+        for y in range(source_y, source_y + tile_height):
+            for x in range(source_x, source_x + tile_width):
+                value = source[x, y]
+                if value not in values:
+                    values[value] = len(values)
+                checksum = (checksum * 31 + value) & 0xFFFFFFFF
+
+    sheet_palette = displayio.Palette(len(values))
+    for old, new in values.items():
+        sheet_palette[new] = palette[old]
+        if palette.is_transparent(old):
+            sheet_palette.make_transparent(new)
+
+    sheet = displayio.Bitmap(len(tiles) * tile_width * scale, tile_height * scale, len(values))
+    if path is not None and _load(sheet, path, checksum):
+        return sheet, sheet_palette
+
+    for index, tile in enumerate(tiles):
+        source_x = (tile % columns) * tile_width
+        source_y = (tile // columns) * tile_height
+        left = index * tile_width * scale
+        for y in range(tile_height):
+            top = y * scale
+            # One fill per run of same colored pixels in the row. The sheet starts at 0, so runs of 0 are skipped
+            start = 0
+            value = values[source[source_x, source_y + y]]
+            for x in range(1, tile_width + 1):
+                next_value = values[source[source_x + x, source_y + y]] if x < tile_width else -1
+                if next_value != value:
+                    if value:
+                        bitmaptools.fill_region(sheet, left + start * scale, top, left + x * scale, top + scale, value)
+                    start = x
+                    value = next_value
+
+    if path is not None:
+        _save(sheet, path, checksum)
+    return sheet, sheet_palette
+
+def _load(sheet, path: str, checksum: int) -> bool:
+    try:
+        with open(path, "rb") as file:
+            header = file.read(HEADER_SIZE)
+            if len(header) < HEADER_SIZE:
+                return False
+            magic, width, height, saved_checksum = struct.unpack(HEADER_FORMAT, header)
+            if magic != MAGIC or width != sheet.width or height != sheet.height or saved_checksum != checksum:
+                return False
+            # A file cut short is built again, bitmaptools.readinto would raise EOFError partway through it
+            file.seek(0, 2)
+            if file.tell() != HEADER_SIZE + width * height:
+                return False
+            file.seek(HEADER_SIZE)
+            bitmaptools.readinto(sheet, file, 8)
+    except (OSError, ValueError, EOFError):
+        return False
+    return True
+
+def _save(sheet, path: str, checksum: int):
+    row = bytearray(sheet.width)
+    temp_path = path + TEMP_SUFFIX
+    try:
+        with open(temp_path, "wb") as file:
+            file.write(struct.pack(HEADER_FORMAT, MAGIC, sheet.width, sheet.height, checksum))
+            for y in range(sheet.height):
+                for x in range(sheet.width):
+                    row[x] = sheet[x, y]
+                file.write(row)
+        # FAT will not rename over a file, so the old cache goes first. Without either, the tiles are built next boot
+        try:
+            remove(path)
+        except OSError:
+            pass
+        rename(temp_path, path)
+    except OSError as e:  # Typically when the filesystem isn't writeable, the tiles are built again next boot
+        print(e)
+
+def prescale_group(group, path: str = None) -> list:
+    """
+    Replace the TileGrids of a scaled group with unscaled TileGrids of pre-scaled tiles, so the display does not
+    scale them on every refresh, then set the group scale to 1. The group looks the same on screen.
+    Every member of the group has to be a TileGrid of the same sprite sheet and palette.
+
+    Parameters:
+        group (displayio.Group): The group, with its scale and member positions set.
+        path (str): A file to keep the scaled tiles in between boots, or None to build them every boot.
+
+    Returns:
+        list: The new TileGrids, in the order of the group.
+    """
+    scale = group.scale
+    old_grids = [group[index] for index in range(len(group))]
+    if scale == 1 or not old_grids:
+        return old_grids
+    first = old_grids[0]
+    for tile_grid in old_grids:
+        if not isinstance(tile_grid, displayio.TileGrid) or tile_grid.bitmap is not first.bitmap or tile_grid.pixel_shader is not first.pixel_shader:
+            raise ValueError("prescale_group needs a group of TileGrids sharing one sprite sheet")
+
+    tiles = []
+    for tile_grid in old_grids:
+        for index in range(tile_grid.width * tile_grid.height):
+            if tile_grid[index] not in tiles:
+                tiles.append(tile_grid[index])
+    sheet, sheet_palette = scale_tiles(first.bitmap, first.pixel_shader, tuple(tiles), first.tile_width, first.tile_height, scale, path)
+
+    new_grids = []
+    for position, old in enumerate(old_grids):
+        new = displayio.TileGrid(sheet, pixel_shader=sheet_palette, width=old.width, height=old.height,
+                                 tile_width=old.tile_width * scale, tile_height=old.tile_height * scale, x=old.x * scale, y=old.y * scale)
+        for index in range(old.width * old.height):
+            new[index] = tiles.index(old[index])
+        new.flip_x = old.flip_x
+        new.flip_y = old.flip_y
+        new.transpose_xy = old.transpose_xy
+        new.hidden = old.hidden
+        group[position] = new
+        new_grids.append(new)
+        # A tile_provider.StreamedTileGrid pins cache slots until told it is no longer shown
+        if hasattr(old, "release_tiles"):
+            old.release_tiles()
+    group.scale = 1
+    return new_grids
@@ -0,0 +1,205 @@
+# SPDX-License-Identifier: MIT
+
+import array
+import struct
+import displayio
+
+# File layout: a header, a key frame, then one frame per loop step. Each frame is a uint32 count followed by that many
+# uint32 pixel changes, the pixel index in the low 24 bits and the new value in the high 8. All little endian
+MAGIC = b"STAR"
+VERSION = 1
+
+# Magic, version, width, height, colors, frames in the loop, most changes in one frame
+HEADER_FORMAT = "<4sBHHBHH"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+INDEX_MASK = 0xFFFFFF
+VALUE_SHIFT = 24
+
+class BakedStarfield(displayio.TileGrid):
+    """
+    A kind of Adafruit displayio TileGrid that plays a looping starfield baked by host/bake_starfield.py, in place of
+    a live ParticleSystem. Each update reads the next frame's pixel changes from flash in one bulk read and writes
+    them to the bitmap, so there is no simulation or random number cost at runtime.
+    It has the ParticleSystem methods code.py calls, and the palette slots are laid out the same for palette_fx.Twinkle.
+
+    Attributes:
+        system_width (int): Width of the starfield in pixels.
+        system_height (int): Height of the starfield in pixels.
+        colors (int): The number of palette slots stars are drawn with, slot 0 is the background.
+        frames (int): The number of frames in the loop.
+        frame (int): The next frame of the loop to play.
+        occlusion (OcclusionMask): If set, pixels it marks as hidden behind other layers are not written. None by default.
+        occluded (int): The number of pixel writes the last update() skipped because they were hidden.
+        particles (tuple): Always empty, the stars are only pixels.
+    """
+    def __init__(self, path: str):
+        """
+        Initializes the starfield and draws the first frame of the loop.
+
+        Parameters:
+            path (str): The baked starfield file.
+        """
+        self._file = open(path, "rb")
+        header = self._file.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or header[:len(MAGIC)] != MAGIC or header[len(MAGIC)] != VERSION:
+            self._file.close()
+            raise ValueError("not a version {} baked starfield: {}".format(VERSION, path))
+        _, _, width, height, colors, self.frames, max_changes = struct.unpack(HEADER_FORMAT, header)
+        self.system_width = width
+        self.system_height = height
+        self.colors = colors
+        self.frame = 0
+        self.occlusion = None
+        self.occluded = 0
+        self.particles = ()
+        self._max_changes = max_changes
+        self._count = array.array("I", [0])
+        self._changes = array.array("I", [0] * max(max_changes, 1))
+        self._view = memoryview(self._changes)
+        self._changed = 0
+        try:
+            self._check()
+        except ValueError:
+            self._file.close()
+            raise
+
+        bitmap = displayio.Bitmap(width, height, colors + 1)
+        palette = displayio.Palette(colors + 1)
+        palette[0] = 0x000000  # Background color (black)
+        for color in range(1, colors + 1):
+            palette[color] = 0xFFFFFF  # Star color (white)
+        super().__init__(bitmap, pixel_shader=palette)
+
+        # The key frame draws the stars as they are at the start of the loop
+        self._play()
+        self._loop_start = self._file.tell()
+
+    def _read(self) -> int:
+        # Read the next frame's changes into the buffer, refusing a frame the file does not hold in full
+        if self._file.readinto(self._count) != 4:
+            raise ValueError("baked starfield is cut short")
+        count = self._count[0]
+        if count > self._max_changes:
+            raise ValueError("baked starfield frame has {} changes, more than the {} in its header".format(count, self._max_changes))
+        if self._file.readinto(self._view[:count]) != 4 * count:
+            raise ValueError("baked starfield is cut short")
+        return count
+
+    def _check(self):
+        # Walk the whole file once before playing it, so a damaged one is refused here, where code.py falls back to
+        # the live stars, rather than partway through the loop
+        pixels = self.system_width * self.system_height
+        changes = self._changes
+        for _ in range(self.frames + 1):
+            for index in range(self._read()):
+                change = changes[index]
+                if change & INDEX_MASK >= pixels or change >> VALUE_SHIFT > self.colors:
+                    raise ValueError("baked starfield has a change outside the {}x{} screen or its {} colors".format(
+                        self.system_width, self.system_height, self.colors))
+        if self._file.read(1):
+            raise ValueError("baked starfield is longer than the {} frames in its header".format(self.frames))
+        self._file.seek(HEADER_SIZE)
+
+    def _play(self):
+        count = self._read()
+        self._changed = count
+
+        changes = self._changes
+        bitmap = self.bitmap
+        if self.occlusion is None:
+            for index in range(count):
+                change = changes[index]
+                bitmap[change & INDEX_MASK] = change >> VALUE_SHIFT
+            return
+
+        # Bring the mask up to date with the layers in front first, in case they moved since the last frame
+        self.occlusion.update()
+        mask = self.occlusion.bitmap
+        occluded = 0
+        for index in range(count):
+            change = changes[index]
+            if mask[change & INDEX_MASK]:
+                bitmap[change & INDEX_MASK] = change >> VALUE_SHIFT
+            else:
+                occluded += 1
+        self.occluded = occluded
+
+    def update(self):
+        """
+        Play the next frame of the loop, starting over after the last one.
+        This function updates pixels on the screen and the display should be refreshed soon after update.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        if self.frame == self.frames:
+            self._file.seek(self._loop_start)
+            self.frame = 0
+        self._play()
+        self.frame += 1
+
+    def remove_out_of_bounds(self):
+        """
+        Nothing to do, the baked stars respawn as part of the loop. Kept so the starfield can stand in for a ParticleSystem.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        pass
+
+    def resize(self, num_particles: int):
+        """
+        Nothing to do, the number of stars is fixed when the starfield is baked. Kept so the starfield can stand in for a ParticleSystem.
+
+        Parameters:
+            num_particles (int): Ignored.
+
+        Returns:
+            None
+        """
+        pass
+
+    def dirty_area(self, masked: bool = True):
+        """
+        Get the area of the bitmap the last update() changed, including changes the occlusion mask hid.
+
+        Parameters:
+            masked (bool): Ignored, the area is the same either way. Kept so the starfield can stand in for a ParticleSystem.
+
+        Returns:
+            tuple: The area as x1, y1, x2, y2 with x2 and y2 exclusive, or all zeros if nothing was written.
+        """
+        x1 = self.system_width
+        y1 = self.system_height
+        x2 = 0
+        y2 = 0
+        for index in range(self._changed):
+            pixel = self._changes[index] & INDEX_MASK
+            x = pixel % self.system_width
+            y = pixel // self.system_width
+            x1 = min(x1, x)
+            x2 = max(x2, x + 1)
+            y1 = min(y1, y)
+            y2 = max(y2, y + 1)
+        if x2 <= x1 or y2 <= y1:
+            return 0, 0, 0, 0
+        return x1, y1, x2, y2
+
+    def close(self):
+        """
+        Close the baked starfield file. No more frames can be played.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        self._file.close()
@@ -0,0 +1,231 @@
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import time
+
+# Timer source frequency in Hz for each TIMER_FREQ_* selection value that is fast enough to pace frames
+SOURCE_HZ = {0b000: 4096, 0b001: 64, 0b010: 1}
+
+# Control_2 of the PCF8523 holds the Timer A and Timer B flags next to the interrupt enables. Flags are cleared by
+# writing 0 and left as they are by writing 1, so writing back a byte read with every flag set but the ones to clear
+# needs no fresh read, and cannot clear a flag that was raised since
+CONTROL_2 = 0x01
+FLAGS = 0xF8
+CTAF = 0x40
+CTBF = 0x20
+
+class FrameClock:
+    """
+    Paces frames from Timer B of the PCF8523 instead of sleeping between them.
+    Timer B runs as a repeating countdown from a 64Hz source divided down to the frame rate, so frame
+    timing does not drift with how long each frame takes to draw.
+    The flag is only polled from just before a tick is due until it arrives. It latches once however many
+    periods run out, so the periods missed while a long frame blocked polling are worked out from the time
+    since the last tick.
+
+    Attributes:
+        timer: The adafruit_pcf8523_timer.Timer (or a stand-in with the same timerB attributes).
+        frequency (int): The TIMER_FREQ_* selection value of the Timer B source.
+        divider (int): The number of source ticks per frame, written to timerB_value.
+        rate (float): The frame rate in Hz that Timer B actually produces.
+        period_ns (int): Nanoseconds per frame tick.
+        poll_interval (float): Seconds between checks of the Timer B flag while a tick is due.
+        ticks (int): The total number of frame ticks seen.
+        missed (int): The number of frame ticks that were not waited on because a frame ran long.
+        event (asyncio.Event): Set when a frame tick arrives.
+        bus: The i2c_bus.I2CBusManager the flag is polled through, or None to poll it directly.
+        control (int): The Control_2 byte read at the last frame tick, with the Timer A flag in it.
+    """
+    def __init__(self, timer, rate: float = 4, frequency: int = None, int_pin=None, poll_interval: float = None, bus=None):
+        """
+        Initializes and starts Timer B in pulsed mode at the closest rate it can produce.
+
+        Parameters:
+            timer: The adafruit_pcf8523_timer.Timer to use Timer B of.
+            rate (float): The requested frame rate in Hz.
+            frequency (int): The TIMER_FREQ_* selection value of the source, 64Hz by default.
+            int_pin: Optional pin wired to the PCF8523 INT output. Pulses are counted with countio instead of polling the flag over I2C.
+            poll_interval (float): Seconds between flag checks while a tick is due, a sixteenth of a frame by default.
+            bus: Optional i2c_bus.I2CBusManager to queue flag checks on instead of blocking on the bus.
+        """
+        if frequency is None:
+            frequency = timer.TIMER_FREQ_64HZ
+        self.timer = timer
+        self.frequency = frequency
+        self.divider = min(max(round(SOURCE_HZ[frequency] / rate), 1), 255)
+        self.rate = SOURCE_HZ[frequency] / self.divider
+        self.period_ns = 1000000000 * self.divider // SOURCE_HZ[frequency]
+        self.poll_interval = poll_interval if poll_interval is not None else 1 / (self.rate * 16)
+        self.ticks = 0
+        self.missed = 0
+        self.event = asyncio.Event()
+        self.bus = bus
+        self.control = 0
+        self._cleared = 0
+        self._pending = 0
+        self._buffer = bytearray(2)
+
+        self._counter = None
+        if int_pin is not None:
+            import countio
+            import digitalio
+            self._counter = countio.Counter(int_pin, edge=countio.Edge.FALL, pull=digitalio.Pull.UP)
+
+        # Timer B has to be stopped while it is reconfigured
+        timer.timerB_enabled = False
+        timer.timerB_frequency = frequency
+        timer.timerB_value = self.divider
+        timer.timerB_pulsed = True
+        timer.timerB_interrupt = self._counter is not None
+        timer.timerB_status = False
+        timer.timerB_enabled = True
+        self._tick_ns = time.monotonic_ns()
+        self._clear_ns = self._tick_ns
+
+    def poll(self) -> int:
+        """
+        Check for frame ticks since the last poll and set the event if there were any.
+
+        Parameters:
+            None
+
+        Returns:
+            int: The number of new frame ticks.
+        """
+        now = time.monotonic_ns()
+        if self._counter is not None:
+            # Every pulse is counted, so only the time of the last one is needed. Control_2 is read once per tick
+            # for the Timer A flag
+            new_ticks = self._counter.count
+            if new_ticks:
+                self._counter.reset()
+                self._tick_ns = now
+                self.control = self._read_control()
+            return self._add_ticks(new_ticks)
+        control = self._read_control()
+        if control & CTBF:
+            self.control = control
+            self._write_control(CTBF)
+            new_ticks = self._flag_ticks(time.monotonic_ns())
+        else:
+            self._clear_ns = now
+            new_ticks = 0
+        return self._add_ticks(new_ticks)
+
+    async def poll_bus(self) -> int:
+        """
+        Check the Timer B flag through the bus manager and set the event if a frame tick arrived.
+        The Control_2 byte read is kept in control, so the Timer A flag needs no read of its own.
+
+        Parameters:
+            None
+
+        Returns:
+            int: The number of new frame ticks.
+        """
+        now = time.monotonic_ns()
+        new_ticks = 0
+        self._cleared = 0
+        control = (await self.bus.read(CONTROL_2))[0]
+        # A flag cleared while the read was queued may have been read before the write. If it was really raised
+        # again, it is still set at the next tick
+        control &= ~self._cleared
+        if control & CTBF:
+            self.control = control
+            await self.clear_flags(CTBF)
+            new_ticks = self._flag_ticks(time.monotonic_ns())
+        else:
+            self._clear_ns = now
+        return self._add_ticks(new_ticks)
+
+    async def clear_flags(self, flags: int):
+        """
+        Clear Control_2 flags with one write, using the byte read at the last frame tick. The write goes through
+        the bus manager if there is one.
+
+        Parameters:
+            flags (int): The flags to clear, for example CTAF for the Timer A flag.
+
+        Returns:
+            None
+        """
+        if self.bus is None:
+            self._write_control(flags)
+            return
+        self._cleared |= flags
+        self.control &= ~flags
+        await self.bus.write(CONTROL_2, bytes((((self.control | FLAGS) & ~flags) & 0xFF,)))
+
+    def _read_control(self) -> int:
+        # One read of Control_2, in place of a read per flag through the driver's bit properties
+        buffer = self._buffer
+        buffer[0] = CONTROL_2
+        with self.timer.i2c_device as i2c:
+            i2c.write_then_readinto(buffer, buffer, out_end=1, in_start=1)
+        return buffer[1]
+
+    def _write_control(self, flags: int):
+        # Write back the last byte read with every flag set but the ones to clear, rather than the driver's
+        # read-modify-write, which could clear a flag raised between its read and its write
+        self.control &= ~flags
+        buffer = self._buffer
+        buffer[0] = CONTROL_2
+        buffer[1] = ((self.control | FLAGS) & ~flags) & 0xFF
+        with self.timer.i2c_device as i2c:
+            i2c.write(buffer)
+
+    def _flag_ticks(self, now: int) -> int:
+        # Every period that ran out before the flag was written back is used up, seen or not, so now is the time
+        # the write finished. The first new period ran out after the last tick and after the last poll that found
+        # the flag clear. Going by both keeps the estimate within a poll interval of the RTC, whichever clock runs fast
+        first = max(self._tick_ns + self.period_ns, self._clear_ns)
+        if now <= first:
+            self._tick_ns = now
+            return 1
+        new_ticks = 1 + (now - first) // self.period_ns
+        self._tick_ns = first + (new_ticks - 1) * self.period_ns
+        return new_ticks
+
+    def _add_ticks(self, new_ticks: int) -> int:
+        if new_ticks:
+            self.ticks += new_ticks
+            self._pending += new_ticks
+            self.event.set()
+        return new_ticks
+
+    async def run(self):
+        """
+        Poll for frame ticks forever. Run this as its own task.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        while True:
+            if self.bus is None or self._counter is not None:
+                self.poll()
+            else:
+                await self.poll_bus()
+            # Sleep until a poll interval before the next tick is due, then poll every interval until it arrives
+            due = (self._tick_ns + self.period_ns - time.monotonic_ns()) / 1000000000 - self.poll_interval
+            await asyncio.sleep(max(due, self.poll_interval))
+
+    async def wait(self) -> int:
+        """
+        Wait for the next frame tick.
+
+        Parameters:
+            None
+
+        Returns:
+            int: The number of frame ticks since the last wait, more than 1 if a frame ran long.
+        """
+        while not self._pending:
+            self.event.clear()
+            await self.event.wait()
+        elapsed = self._pending
+        self._pending = 0
+        self.missed += elapsed - 1
+        return elapsed
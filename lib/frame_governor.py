@@ -0,0 +1,127 @@
+# SPDX-License-Identifier: MIT
+
+from adafruit_ticks import ticks_ms, ticks_diff
+
+class FrameGovernor:
+    """
+    Measures the work time of each frame, from its frame tick to the end of its refresh, and steps through quality
+    levels to keep it inside the frame period. Each level is a particle count and a tick divider: with a divider of 2
+    only every second frame tick is drawn. The FrameClock already waits only for the rest of each period, so the
+    governor decides how much work goes into one.
+
+    Attributes:
+        rate (float): The frame tick rate in Hz, the FrameClock rate.
+        levels (tuple): (particle count, tick divider) pairs, from full quality down.
+        level (int): The current index into levels, 0 is full quality.
+        work_ms (int): The work time of the last frame in milliseconds.
+        fps (float): Frames drawn per second, measured over the last window of frames.
+        overruns (int): The number of frames that ran over budget.
+        changes (int): The number of level changes.
+    """
+    def __init__(self, rate: float, levels: tuple, budget: float = 0.9, headroom: float = 0.5, patience: int = 4, calm: int = 40, window: int = 16):
+        """
+        Initializes the governor at full quality.
+
+        Parameters:
+            rate (float): The frame tick rate in Hz, the FrameClock rate.
+            levels (tuple): (particle count, tick divider) pairs, from full quality down.
+            budget (float): The share of the target period a frame can take before it counts as an overrun.
+            headroom (float): Quality goes back up after calm frames in a row take less than this share of the period of the level above.
+            patience (int): Overruns in a row before quality goes down.
+            calm (int): Frames in a row under the headroom before quality goes back up.
+            window (int): Frames to measure fps over.
+        """
+        self.rate = rate
+        self.levels = levels
+        self.level = 0
+        self.work_ms = 0
+        self.fps = 0
+        self.overruns = 0
+        self.changes = 0
+        self._budget = budget
+        self._headroom = headroom
+        self._patience = patience
+        self._calm = calm
+        self._window = window
+        self._late = 0
+        self._early = 0
+        self._skipped = 0
+        self._late_ticks = False
+        self._start = None
+        self._window_start = ticks_ms()
+        self._window_frames = 0
+
+    @property
+    def target_fps(self) -> float:
+        """The frame rate the current level aims for."""
+        return self.rate / self.levels[self.level][1]
+
+    @property
+    def particles(self) -> int:
+        """The particle count of the current level."""
+        return self.levels[self.level][0]
+
+    def begin_frame(self, ticks: int = 1) -> bool:
+        """
+        Start timing a frame, if the current level draws on this frame tick.
+
+        Parameters:
+            ticks (int): The frame ticks since the last call, as returned by FrameClock.wait().
+
+        Returns:
+            bool: True if the frame should be drawn, followed by end_frame() once it is refreshed.
+        """
+        self._skipped += ticks
+        if self._skipped < self.levels[self.level][1]:
+            return False
+        # More ticks than the divider means the last frame ran into the next period
+        self._late_ticks = self._skipped > self.levels[self.level][1]
+        self._skipped = 0
+        self._start = ticks_ms()
+        return True
+
+    def end_frame(self) -> bool:
+        """
+        Stop timing the frame, and change the quality level if the frames keep overrunning or keep having headroom.
+
+        Parameters:
+            None
+
+        Returns:
+            bool: True if the level changed, so the particle count has to be applied.
+        """
+        now = ticks_ms()
+        self.work_ms = ticks_diff(now, self._start)
+        self._window_frames += 1
+        if self._window_frames >= self._window:
+            self.fps = self._window_frames * 1000 / max(ticks_diff(now, self._window_start), 1)
+            self._window_start = now
+            self._window_frames = 0
+
+        period_ms = 1000 / self.target_fps
+        # Headroom is judged against the period of the level above, so a step up does not overrun straight away
+        up_period_ms = 1000 * self.levels[max(self.level - 1, 0)][1] / self.rate
+        if self.work_ms > period_ms * self._budget or self._late_ticks:
+            self.overruns += 1
+            self._late += 1
+            self._early = 0
+        else:
+            self._late = 0
+            if self.work_ms < up_period_ms * self._headroom:
+                self._early += 1
+            else:
+                self._early = 0
+
+        if self._late >= self._patience:
+            self._late = 0
+            if self.level < len(self.levels) - 1:
+                self.level += 1
+                self.changes += 1
+                return True
+        elif self._early >= self._calm:
+            self._early = 0
+            if self.level > 0:
+                self.level -= 1
+                self.changes += 1
+                return True
+        return False
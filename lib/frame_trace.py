@@ -0,0 +1,252 @@
+# SPDX-License-Identifier: MIT
+
+import random
+import struct
+import time
+
+# File layout: a header, then one fixed size record per frame, all little endian
+MAGIC = b"MTRC"
+VERSION = 3
+
+# Magic, version, seed, starting counter, then the ParticleSystem arguments:
+# num_particles, system_height, system_width, min_dx, min_dy, max_dx, max_dy, start_x, start_y, rand_x, rand_y, colors
+HEADER_FORMAT = "<4sBIf9h3B"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# Frame, seed, epoch, counter, rocket x, flags, ticks, particle count, dirty x1 y1 x2 y2, unmasked dirty x1 y1 x2 y2,
+# particle checksum, stage times in us, output crc
+FRAME_FORMAT = "<IIIfhBBH4H4HI4II"
+FRAME_SIZE = struct.calcsize(FRAME_FORMAT)
+
+# Stages of a frame that are timed, in the order they run
+STAGES = ("timer", "particles", "rocket", "refresh")
+
+# Frame flags
+FLAG_TIMER = 0x01 # The 3 second timer went off this frame
+FLAG_FLIP_Y = 0x02 # The rocket is flying right, toward the moon
+FLAG_OCCLUDED = 0x04 # The occlusion mask skipped particle writes, so the dirty area depends on the scene
+
+def particle_checksum(particle_system) -> int:
+    """
+    Checksum where every particle is, in order. Unlike the bitmap, it is the same with or without an occlusion mask.
+    It is kept to 24 bits so it never leaves the small ints on the device.
+
+    Parameters:
+        particle_system: The ParticleSystem.
+
+    Returns:
+        int: The checksum.
+    """
+    checksum = 0
+    for particle in particle_system.particles:
+        checksum = (checksum * 31 + particle.x * 512 + particle.y) & 0xFFFFFF
+    return checksum
+
+class TraceFrame:
+    """
+    A helper class representing the inputs and outputs of one recorded frame.
+
+    Attributes:
+        frame (int): The frame number, starting at 0.
+        seed (int): The random seed set at the start of the frame.
+        epoch (int): The RTC time in seconds since the unix epoch.
+        counter (float): The counter value after the frame.
+        rocket_x (int): The rocket TileGrid x position after the frame.
+        timer (bool): True if the 3 second timer went off this frame.
+        flip_y (bool): The rocket TileGrid flip_y after the frame.
+        occluded (bool): True if the occlusion mask skipped particle writes this frame.
+        ticks (int): The number of frame clock ticks waited for, more than 1 if the last frame ran long.
+        particles (int): The number of particles after the frame.
+        dirty (tuple): The particle bitmap area written this frame, as x1, y1, x2, y2.
+        unmasked (tuple): The area the particles would have written without the occlusion mask, the same as dirty
+            when the frame is not occluded. It depends only on the particles, so a replay without the scene can check it.
+        positions (int): particle_checksum() of the particles after the frame.
+        stage_us (tuple): Microseconds spent in each of STAGES.
+        crc (int): A checksum of the particle bitmap after the frame, or 0 if it was not computed.
+    """
+    def __init__(self, values: tuple):
+        """
+        Initializes a frame from an unpacked FRAME_FORMAT record.
+
+        Parameters:
+            values (tuple): The unpacked record.
+        """
+        self.frame, self.seed, self.epoch, self.counter, self.rocket_x, flags, self.ticks, self.particles = values[:8]
+        self.timer = bool(flags & FLAG_TIMER)
+        self.flip_y = bool(flags & FLAG_FLIP_Y)
+        self.occluded = bool(flags & FLAG_OCCLUDED)
+        self.dirty = values[8:12]
+        self.unmasked = values[12:16]
+        self.positions = values[16]
+        self.stage_us = values[17:21]
+        self.crc = values[21]
+
+
+class FrameTraceWriter:
+    """
+    Records per frame inputs and outputs to a compact binary file so a frame sequence can be replayed later.
+    The random number generator is seeded from the trace at the start of every frame, so replays are deterministic.
+
+    Attributes:
+        seed (int): The base random seed.
+        particle_args (tuple): The ParticleSystem arguments, ending with rand_x, rand_y and colors.
+        frame (int): The number of frames recorded.
+        max_frames (int): Recording stops after this many frames.
+    """
+    def __init__(self, path: str, seed: int, particle_args: tuple, counter: float, buffer_frames: int = 64, max_frames: int = 14400):
+        """
+        Initializes the trace file, writes its header and seeds the random number generator.
+        Create the writer before the ParticleSystem, so the particles it starts with are part of the trace.
+
+        Parameters:
+            path (str): The file to write.
+            seed (int): The base random seed.
+            particle_args (tuple): The ParticleSystem arguments, ending with rand_x, rand_y and colors.
+            counter (float): The counter value at startup.
+            buffer_frames (int): Frames to collect in memory between writes, to keep flash writes few and large.
+            max_frames (int): Recording stops after this many frames, an hour at 4 frames per second by default.
+        """
+        self.seed = seed
+        self.particle_args = particle_args
+        self.frame = 0
+        self.max_frames = max_frames
+        self._file = open(path, "wb")
+        self._file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, seed, counter, *particle_args))
+        self._buffer = bytearray(FRAME_SIZE * buffer_frames)
+        self._used = 0
+        self._stage_us = [0] * len(STAGES)
+        self._frame_seed = 0
+        self._lap = 0
+        random.seed(seed)
+
+    def begin_frame(self):
+        """
+        Start a frame. Seeds the random number generator and starts the stage timer.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        self._frame_seed = (self.seed + self.frame) & 0xFFFFFFFF
+        random.seed(self._frame_seed)
+        self._lap = time.monotonic_ns()
+
+    def lap(self, stage: int):
+        """
+        Record the time since the last lap (or the start of the frame) against a stage.
+
+        Parameters:
+            stage (int): The index of the stage in STAGES.
+
+        Returns:
+            None
+        """
+        now = time.monotonic_ns()
+        self._stage_us[stage] = (now - self._lap) // 1000
+        self._lap = now
+
+    def end_frame(self, timer: bool, epoch: int, counter: float, rocket, ticks: int, particle_system, crc: int = 0):
+        """
+        Finish a frame and add its record to the trace.
+
+        Parameters:
+            timer (bool): True if the 3 second timer went off this frame.
+            epoch (int): The RTC time in seconds since the unix epoch.
+            counter (float): The counter value after the frame.
+            rocket: The rocket TileGrid.
+            ticks (int): The number of frame clock ticks waited for.
+            particle_system: The ParticleSystem.
+            crc (int): A checksum of the particle bitmap, if one was computed.
+
+        Returns:
+            None
+        """
+        if self._file is None:
+            return
+        flags = (FLAG_TIMER if timer else 0) | (FLAG_FLIP_Y if rocket.flip_y else 0) | (FLAG_OCCLUDED if particle_system.occluded else 0)
+        # One starred argument, last, is all the CircuitPython 8 compiler is sure to take in a call
+        values = ((self.frame, self._frame_seed, epoch, counter, rocket.x, flags, min(ticks, 255), len(particle_system.particles))
+                  + tuple(particle_system.dirty_area()) + tuple(particle_system.dirty_area(False))
+                  + (particle_checksum(particle_system),) + tuple(self._stage_us) + (crc,))
+        struct.pack_into(FRAME_FORMAT, self._buffer, self._used, *values)
+        self._used += FRAME_SIZE
+        self.frame += 1
+        if self._used == len(self._buffer):
+            self.flush()
+        if self.frame >= self.max_frames:
+            self.close()
+
+    def flush(self):
+        """
+        Write the buffered frame records to the file.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        if self._file is None or not self._used:
+            return
+        self._file.write(memoryview(self._buffer)[:self._used])
+        self._file.flush()
+        self._used = 0
+
+    def close(self):
+        """
+        Write any buffered frame records and close the file. Later frames are not recorded.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+
+
+class FrameTraceReader:
+    """
+    Reads a trace written by FrameTraceWriter.
+
+    Attributes:
+        seed (int): The base random seed.
+        counter (float): The counter value at startup.
+        particle_args (tuple): The ParticleSystem arguments, ending with rand_x, rand_y and colors.
+    """
+    def __init__(self, path: str):
+        """
+        Initializes the reader and reads the header.
+
+        Parameters:
+            path (str): The file to read.
+        """
+        self._file = open(path, "rb")
+        magic, version, self.seed, self.counter, *particle_args = struct.unpack(HEADER_FORMAT, self._file.read(HEADER_SIZE))
+        if magic != MAGIC or version != VERSION:
+            self._file.close()
+            raise ValueError("not a version {} frame trace: {}".format(VERSION, path))
+        self.particle_args = tuple(particle_args)
+
+    def __iter__(self):
+        record = bytearray(FRAME_SIZE)
+        while self._file.readinto(record) == FRAME_SIZE:
+            yield TraceFrame(struct.unpack(FRAME_FORMAT, record))
+
+    def close(self):
+        """
+        Close the file.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        self._file.close()
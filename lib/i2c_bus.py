@@ -0,0 +1,149 @@
+# SPDX-License-Identifier: MIT
+
+import asyncio
+
+# Kinds of queued register access
+READ = 0
+WRITE = 1
+
+class RegisterAccess:
+    """
+    A helper class representing one queued register read or write.
+
+    Attributes:
+        kind (int): READ or WRITE.
+        register (int): The first register address.
+        length (int): The number of registers.
+        data (bytearray): The bytes read, or the bytes to write.
+        done (bool): True once the bus transfer has happened.
+    """
+    def __init__(self, kind: int, register: int, length: int, data: bytearray = None):
+        """
+        Initializes a register access that has not been transferred yet.
+
+        Parameters:
+            kind (int): READ or WRITE.
+            register (int): The first register address.
+            length (int): The number of registers.
+            data (bytearray): The bytes to write for a WRITE.
+        """
+        self.kind = kind
+        self.register = register
+        self.length = length
+        self.data = data
+        self.done = False
+
+
+class I2CBusManager:
+    """
+    Queues register reads and writes for one I2C device and runs them from its own asyncio task, one bus
+    transaction each, in the order they were queued. Because the task only runs while the frame loop is
+    awaiting, bus traffic never lands in the middle of display.refresh().
+    Accesses are not merged or reordered: even a read can change a register, reading Control_2 of the PCF8523
+    clears its watchdog flag, so each one reaches the device exactly as asked.
+
+    Attributes:
+        i2c_device: The adafruit_bus_device I2CDevice, the one the drivers use.
+        queue (list): The register accesses waiting for the next flush.
+        transactions (int): The number of bus transactions made.
+        bytes (int): The number of bytes moved over the bus, including register addresses.
+        accesses (int): The number of register accesses queued.
+    """
+    def __init__(self, i2c_device, max_registers: int = 32):
+        """
+        Initializes the manager.
+
+        Parameters:
+            i2c_device: The adafruit_bus_device I2CDevice the drivers use, for example rtc.i2c_device.
+            max_registers (int): The most registers one access can cover.
+        """
+        self.i2c_device = i2c_device
+        self.queue = []
+        self.transactions = 0
+        self.bytes = 0
+        self.accesses = 0
+        self._buffer = bytearray(max_registers + 1)
+        self._pending = asyncio.Event()
+        self._flushed = asyncio.Event()
+
+    async def _submit(self, access: RegisterAccess) -> RegisterAccess:
+        self.queue.append(access)
+        self.accesses += 1
+        self._pending.set()
+        while not access.done:
+            await self._flushed.wait()
+        return access
+
+    async def read(self, register: int, length: int = 1) -> bytearray:
+        """
+        Read consecutive registers.
+
+        Parameters:
+            register (int): The first register address.
+            length (int): The number of registers.
+
+        Returns:
+            bytearray: The register values.
+        """
+        access = await self._submit(RegisterAccess(READ, register, length))
+        return access.data
+
+    async def write(self, register: int, data):
+        """
+        Write consecutive registers.
+
+        Parameters:
+            register (int): The first register address.
+            data: The bytes to write.
+
+        Returns:
+            None
+        """
+        await self._submit(RegisterAccess(WRITE, register, len(data), bytearray(data)))
+
+    def flush(self):
+        """
+        Run every queued register access in order, and wake their waiters.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        queue = self.queue
+        if not queue:
+            return
+        self.queue = []
+        buffer = self._buffer
+        for access in queue:
+            length = access.length
+            with self.i2c_device as i2c:
+                buffer[0] = access.register
+                if access.kind == READ:
+                    i2c.write_then_readinto(buffer, buffer, out_end=1, in_start=1, in_end=1 + length)
+                    access.data = buffer[1:1 + length]
+                else:
+                    buffer[1:1 + length] = access.data
+                    i2c.write(buffer, end=1 + length)
+            self.transactions += 1
+            self.bytes += 1 + length
+            access.done = True
+
+        self._flushed.set()
+        self._flushed.clear()
+
+    async def run(self):
+        """
+        Flush the queue whenever something is waiting in it. Run this as its own task.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        while True:
+            await self._pending.wait()
+            self._pending.clear()
+            self.flush()
@@ -0,0 +1,33 @@
+# SPDX-License-Identifier: MIT
+
+def step_rocket(rtg, tile_width: int):
+    """
+    Move the rocket one step along its path, flying right from the earth to the moon then back again.
+
+    Parameters:
+        rtg: The rocket TileGrid. Its x position and flip_y (True when flying right) are updated.
+        tile_width (int): Width of a single tile in pixels.
+
+    Returns:
+        None
+    """
+    if rtg.x < (12 * tile_width) and rtg.flip_y:
+        rtg.x += (4 * tile_width)
+    elif rtg.x == (12 * tile_width) and rtg.flip_y:
+        rtg.flip_y = False
+    elif not rtg.flip_y and rtg.x > (2 * tile_width):
+        rtg.x -= (4 * tile_width)
+    elif rtg.x == (0) and not rtg.flip_y:
+        rtg.flip_y  = True
+
+def counter_text(cycle) -> str:
+    """
+    Format the number of trips to the moon and back for the counter label.
+
+    Parameters:
+        cycle (float): The number of trips.
+
+    Returns:
+        str: The label text.
+    """
+    return "{:.3e}".format(float(cycle)) + " times!"
@@ -0,0 +1,200 @@
+# SPDX-License-Identifier: MIT
+
+import displayio
+import bitmaptools
+
+# Mask values
+OCCLUDED = 0
+VISIBLE = 1
+
+class OcclusionMask:
+    """
+    A one bit mask of the screen, VISIBLE where the layers above a ParticleSystem are transparent and OCCLUDED
+    under their opaque pixels. Each TileGrid under the layers is stamped into the mask from a cached bitmap of
+    its opaque pixels. When a TileGrid moves, flips or changes tiles (or a label's text changes), only the area
+    it left and the stamps overlapping that area are redrawn.
+
+    Attributes:
+        bitmap (displayio.Bitmap): The mask, one bit per screen pixel.
+        layers (tuple): The Groups and TileGrids in front of the particles.
+        target (displayio.Bitmap): A bitmap cleared to 0 under newly placed stamps, or None.
+        rebuilds (int): The number of updates that changed the mask.
+    """
+    def __init__(self, width: int, height: int, layers: tuple, target=None, max_stamps: int = 64):
+        """
+        Initializes the mask and stamps the layers into it.
+
+        Parameters:
+            width (int): The screen width in pixels.
+            height (int): The screen height in pixels.
+            layers (tuple): The Groups and TileGrids in front of the particles. Their parents must be at 0, 0 and unscaled.
+            target (displayio.Bitmap): The particle bitmap, so particles are not left behind stamps that move over them.
+            max_stamps (int): Cached stamps are dropped once there are more than this many.
+        """
+        self.bitmap = displayio.Bitmap(width, height, 2)
+        self.bitmap.fill(VISIBLE)
+        self.layers = layers
+        self.target = target
+        self.rebuilds = 0
+        self._max_stamps = max_stamps
+        self._stamps = {}
+        self._placed = {}
+        self.update()
+
+    def _collect(self, layer, x: int, y: int, scale: int, found: list):
+        if layer.hidden:
+            return
+        if isinstance(layer, displayio.TileGrid):
+            found.append((layer, x + layer.x * scale, y + layer.y * scale, scale))
+            return
+        x += layer.x * scale
+        y += layer.y * scale
+        scale *= layer.scale
+        for index in range(len(layer)):
+            self._collect(layer[index], x, y, scale, found)
+
+    def _stamp(self, tile_grid, tiles: tuple, version: int, scale: int):
+        # A bitmap of the TileGrid as drawn on screen, OCCLUDED where it is opaque and VISIBLE elsewhere.
+        # An id can be reused once its bitmap is collected, so the entry keeps the bitmap and palette to check against
+        source = tile_grid.bitmap
+        shader = tile_grid.pixel_shader
+        key = (id(source), id(shader), tile_grid.tile_width, tile_grid.tile_height, tile_grid.width,
+               tiles, version, tile_grid.flip_x, tile_grid.flip_y, tile_grid.transpose_xy, scale)
+        cached = self._stamps.get(key)
+        if cached is not None and cached[0] is source and cached[1] is shader:
+            return cached[2]
+
+        tile_width = tile_grid.tile_width
+        tile_height = tile_grid.tile_height
+        width = tile_grid.width * tile_width
+        height = tile_grid.height * tile_height
+        transpose = tile_grid.transpose_xy
+        if transpose:
+            stamp = displayio.Bitmap(height * scale, width * scale, 2)
+        else:
+            stamp = displayio.Bitmap(width * scale, height * scale, 2)
+        stamp.fill(VISIBLE)
+
+        columns = source.width // tile_width
+        opaque = {}
+        for index, tile in enumerate(tiles):
+            tile_x = (index % tile_grid.width) * tile_width
+            tile_y = (index // tile_grid.width) * tile_height
+            source_x = (tile % columns) * tile_width
+            source_y = (tile // columns) * tile_height
+            for py in range(tile_height):
+                for px in range(tile_width):
+                    value = source[source_x + px, source_y + py]
+                    is_opaque = opaque.get(value)
+                    if is_opaque is None:
+                        is_opaque = opaque[value] = not (isinstance(shader, displayio.Palette) and shader.is_transparent(value))
+                    if not is_opaque:
+                        continue
+                    # Flips mirror the whole grid, then transpose swaps the axes, as the core draws it
+                    x = tile_x + px
+                    y = tile_y + py
+                    if tile_grid.flip_x:
+                        x = width - 1 - x
+                    if tile_grid.flip_y:
+                        y = height - 1 - y
+                    if transpose:
+                        x, y = y, x
+                    if scale == 1:
+                        stamp[x, y] = OCCLUDED
+                    else:
+                        bitmaptools.fill_region(stamp, x * scale, y * scale, (x + 1) * scale, (y + 1) * scale, OCCLUDED)
+
+        if len(self._stamps) >= self._max_stamps:
+            self._stamps = {}
+        self._stamps[key] = (source, shader, stamp)
+        return stamp
+
+    def _forget(self, placed: dict):
+        # A label replaces its bitmap when the text changes and never shows the old one again, so the stamps of
+        # bitmaps no longer on screen are dropped rather than keep those bitmaps alive in the cache
+        shown = None
+        for key, old in self._placed.items():
+            source = old[7]
+            new = placed.get(key)
+            if new is not None and new[7] is source:
+                continue
+            if shown is None:
+                shown = [entry[7] for entry in placed.values()]
+            if any(source is bitmap for bitmap in shown):
+                continue
+            for stamp_key in [stamp_key for stamp_key, cached in self._stamps.items() if cached[0] is source]:
+                del self._stamps[stamp_key]
+
+    def _blit(self, dest, stamp, x: int, y: int):
+        # Bitmap.blit refuses a destination that starts off the bitmap, so clip the stamp here
+        x1 = max(0, -x)
+        y1 = max(0, -y)
+        x2 = min(stamp.width, dest.width - x)
+        y2 = min(stamp.height, dest.height - y)
+        if x2 > x1 and y2 > y1:
+            dest.blit(x + x1, y + y1, stamp, x1=x1, y1=y1, x2=x2, y2=y2, skip_index=VISIBLE)
+
+    def update(self) -> bool:
+        """
+        Redraw the parts of the mask whose TileGrids have moved or changed since the last update.
+        This runs every frame from ParticleSystem.update(), and does nothing but compare positions when nothing moved.
+
+        Parameters:
+            None
+
+        Returns:
+            bool: True if the mask changed.
+        """
+        found = []
+        for layer in self.layers:
+            self._collect(layer, 0, 0, 1, found)
+
+        placed = {}
+        cleared = []
+        stamped = []
+        for tile_grid, x, y, scale in found:
+            tiles = tuple(tile_grid[index] for index in range(tile_grid.width * tile_grid.height))
+            # TileGrids whose bitmap can change under them, like tile_provider.StreamedTileGrid, say so with a tile_version
+            version = getattr(tile_grid, "tile_version", 0)
+            signature = (x, y, scale, tile_grid.flip_x, tile_grid.flip_y, tile_grid.transpose_xy, tiles, version)
+            old = self._placed.get(id(tile_grid))
+            if old is not None and old[1] == signature and old[7] is tile_grid.bitmap:
+                placed[id(tile_grid)] = old
+                continue
+            if old is not None:
+                cleared.append(old[2:7])
+            stamp = self._stamp(tile_grid, tiles, version, scale)
+            entry = (tile_grid, signature, x, y, x + stamp.width, y + stamp.height, stamp, tile_grid.bitmap)
+            placed[id(tile_grid)] = entry
+            stamped.append(entry)
+        for key, old in self._placed.items():
+            if key not in placed:
+                cleared.append(old[2:7])
+        if cleared:
+            self._forget(placed)
+        self._placed = placed
+        if not cleared and not stamped:
+            return False
+
+        # Uncover the areas left behind, then redraw the new stamps and every other stamp overlapping those areas
+        mask = self.bitmap
+        for x1, y1, x2, y2, _ in cleared:
+            x1 = max(x1, 0)
+            y1 = max(y1, 0)
+            x2 = min(x2, mask.width)
+            y2 = min(y2, mask.height)
+            if x2 > x1 and y2 > y1:
+                bitmaptools.fill_region(mask, x1, y1, x2, y2, VISIBLE)
+        for _, _, x1, y1, _, _, stamp, _ in stamped:
+            self._blit(mask, stamp, x1, y1)
+            if self.target is not None:
+                self._blit(self.target, stamp, x1, y1)
+        if cleared:
+            for entry in placed.values():
+                _, _, x1, y1, x2, y2, stamp, _ = entry
+                for cx1, cy1, cx2, cy2, _ in cleared:
+                    if x1 < cx2 and cx1 < x2 and y1 < cy2 and cy1 < y2:
+                        self._blit(mask, stamp, x1, y1)
+                        break
+        self.rebuilds += 1
+        return True
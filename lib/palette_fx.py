@@ -0,0 +1,86 @@
+# SPDX-License-Identifier: MIT
+
+def scale_color(color: int, level: int, levels: int) -> int:
+    """
+    Scale the brightness of a color.
+
+    Parameters:
+        color (int): The color as 0xRRGGBB.
+        level (int): The brightness step, from 0 (black) to levels.
+        levels (int): The number of brightness steps.
+
+    Returns:
+        int: The scaled color as 0xRRGGBB.
+    """
+    red = (color >> 16 & 0xFF) * level // levels
+    green = (color >> 8 & 0xFF) * level // levels
+    blue = (color & 0xFF) * level // levels
+    return red << 16 | green << 8 | blue
+
+class Twinkle:
+    """
+    Twinkles particles by rewriting a few palette slots each frame, instead of rewriting their pixels.
+    Each slot fades up and down through a table of brightness steps with its own phase offset, so the
+    cost per frame is one palette write per slot no matter how many particles are drawn with it.
+    A palette write makes displayio refresh everything drawn with the palette though, so the fade can
+    step only every few updates.
+
+    Attributes:
+        palette: The displayio.Palette to animate.
+        first (int): The first palette slot animated.
+        count (int): The number of palette slots animated.
+        table (list): The colors of one fade cycle, up then back down.
+        speed (int): Steps through the table per step of the fade.
+        every (int): Updates per step of the fade.
+        phase (int): The current position in the table of the first slot.
+    """
+    def __init__(self, palette, first: int = 1, count: int = 1, color: int = 0xFFFFFF, steps: int = 8, dimmest: int = 2, speed: int = 1, every: int = 1):
+        """
+        Initializes the fade table and sets the starting color of each slot.
+
+        Parameters:
+            palette: The displayio.Palette to animate, for example a ParticleSystem's pixel_shader.
+            first (int): The first palette slot to animate.
+            count (int): The number of palette slots to animate.
+            color (int): The brightest color as 0xRRGGBB.
+            steps (int): The number of brightness steps from dimmest to brightest.
+            dimmest (int): The dimmest brightness, in steps out of steps.
+            speed (int): Steps through the table per step of the fade.
+            every (int): Updates per step of the fade. Palette writes, and the refreshes they cause, happen only on those.
+        """
+        self.palette = palette
+        self.first = first
+        self.count = count
+        self.speed = speed
+        self.every = every
+        self.phase = 0
+        self._updates = 0
+
+        # Fade up from dimmest to full, then back down without repeating either end
+        up = [scale_color(color, level, steps) for level in range(dimmest, steps + 1)]
+        self.table = up + up[-2:0:-1]
+
+        # Spread the slots evenly over the cycle so they are never all bright at once
+        self._offsets = [slot * len(self.table) // count for slot in range(count)]
+        self.update(0)
+
+    def update(self, speed: int = None):
+        """
+        Advance the fade and rewrite each slot's palette entry, on every every-th update.
+
+        Parameters:
+            speed (int): Steps to advance by, right away. By default the speed attribute, once every updates.
+
+        Returns:
+            None
+        """
+        if speed is None:
+            self._updates += 1
+            if self._updates < self.every:
+                return
+            self._updates = 0
+        table = self.table
+        size = len(table)
+        self.phase = (self.phase + (self.speed if speed is None else speed)) % size
+        for slot in range(self.count):
+            self.palette[self.first + slot] = table[(self.phase + self._offsets[slot]) % size]
@@ -0,0 +1,202 @@
+# SPDX-License-Identifier: MIT
+
+import random
+import simple_particle_sim
+
+# ulab is built into CircuitPython, NumPy stands in for it on the host. Without either, np is None and
+# code.py keeps the ParticleSystem from simple_particle_sim. So far this has only been run against NumPy on the
+# host, the ulab path (float pixel indexes included) still needs a run on the device
+try:
+    from ulab import numpy as np
+    INDEX_DTYPE = np.float # ulab has no 32 bit integers, and a float holds every pixel index of the screen exactly
+except ImportError:
+    try:
+        import numpy as np
+        INDEX_DTYPE = np.int32
+    except ImportError:
+        np = None
+        INDEX_DTYPE = None
+
+class ArrayParticleSystem(simple_particle_sim.ParticleSystem):
+    """
+    A ParticleSystem keeping its particles in ndarrays instead of Particle objects. Moving, bounds checks, respawning
+    and pixel indexes are whole-array operations, leaving one loop over the pixel writes, since a displayio Bitmap
+    can only be written a pixel at a time. The bitmap ends up the same as with ParticleSystem, frame for frame.
+    The bulk option is accepted but has no effect, and an occlusion mask has to be the size of the system.
+
+    Attributes:
+        particles (list): Particle copies of the arrays. Changing them does not change the system, assign a new list instead.
+    """
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes the system the same way as ParticleSystem, with the same random numbers.
+
+        Parameters:
+            See simple_particle_sim.ParticleSystem.
+        """
+        super().__init__(*args, **kwargs)
+        # ParticleSystem colors its particles after creating them, which only colored copies here, so do it again
+        self._next_color = 0
+        self._color = np.array([self.next_color() for _ in range(len(self._x))], dtype=np.uint8)
+
+    @property
+    def particles(self) -> list:
+        particles = []
+        for x, y, dx, dy, px, py, color in zip(self._x.tolist(), self._y.tolist(), self._dx.tolist(), self._dy.tolist(),
+                                               self._px.tolist(), self._py.tolist(), self._color.tolist()):
+            particle = simple_particle_sim.Particle(x, y, dx, dy, color)
+            particle.px = px
+            particle.py = py
+            particles.append(particle)
+        return particles
+
+    @particles.setter
+    def particles(self, particles: list):
+        self._x = np.array([particle.x for particle in particles], dtype=np.int16)
+        self._y = np.array([particle.y for particle in particles], dtype=np.int16)
+        self._dx = np.array([particle.dx for particle in particles], dtype=np.int16)
+        self._dy = np.array([particle.dy for particle in particles], dtype=np.int16)
+        self._px = np.array([particle.px for particle in particles], dtype=np.int16)
+        self._py = np.array([particle.py for particle in particles], dtype=np.int16)
+        self._color = np.array([particle.color for particle in particles], dtype=np.uint8)
+
+    def _stays(self):
+        # True for the particles whose next move stays in the system, which are drawn at their new position
+        next_x = self._x + self._dx
+        next_y = self._y + self._dy
+        return (next_x >= 0) & (next_x < self.system_width) & (next_y >= 0) & (next_y < self.system_height)
+
+    def update(self):
+        """
+        Update every particle in the particle system, as ParticleSystem.update() does.
+        This function updates pixels on the screen and the display should be refreshed soon after update.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        self._px = self._x
+        self._py = self._y
+        self._x = self._x + self._dx
+        self._y = self._y + self._dy
+        draws = (np.array(self._y, dtype=INDEX_DTYPE) * self.system_width + self._x).tolist()
+        erases = (np.array(self._py, dtype=INDEX_DTYPE) * self.system_width + self._px).tolist()
+        stays = self._stays().tolist()
+        colors = self._color.tolist()
+
+        # Each particle draws, then erases, in turn, so overlapping particles leave the same pixels as ParticleSystem
+        bitmap = self.bitmap
+        if self.occlusion is None:
+            for draw, erase, color, stay in zip(draws, erases, colors, stays):
+                if stay:
+                    bitmap[int(draw)] = color
+                bitmap[int(erase)] = 0
+            return
+
+        # Bring the mask up to date with the layers in front first, in case they moved since the last frame
+        self.occlusion.update()
+        mask = self.occlusion.bitmap
+        occluded = 0
+        for draw, erase, color, stay in zip(draws, erases, colors, stays):
+            if stay:
+                if mask[int(draw)]:
+                    bitmap[int(draw)] = color
+                else:
+                    occluded += 1
+            if mask[int(erase)]:
+                bitmap[int(erase)] = 0
+            else:
+                occluded += 1
+        self.occluded = occluded
+
+    def remove_out_of_bounds(self):
+        """
+        Remove the particles out of bounds and respawn as many at the right edge, as ParticleSystem does.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        x = self._x
+        y = self._y
+        keep = (x >= 0) & (x <= self.system_width) & (y >= 0) & (y <= self.system_height)
+        if np.all(keep):
+            return
+        count = len(x)
+        self._x = x[keep]
+        self._y = y[keep]
+        self._dx = self._dx[keep]
+        self._dy = self._dy[keep]
+        self._px = self._px[keep]
+        self._py = self._py[keep]
+        self._color = self._color[keep]
+        self._spawn(count - len(self._x))
+
+    def _spawn(self, count: int):
+        # One random number per spawned particle, in order, so traces replay the same with either system
+        spawn_y = [random.randint(0, self.system_height - 1) for _ in range(count)]
+        spawn_color = [self.next_color() for _ in range(count)]
+        self._x = np.concatenate((self._x, np.array([self.system_width - 1] * count, dtype=np.int16)))
+        self._y = np.concatenate((self._y, np.array(spawn_y, dtype=np.int16)))
+        self._dx = np.concatenate((self._dx, np.array([self.p_behavior[0]] * count, dtype=np.int16)))
+        self._dy = np.concatenate((self._dy, np.array([self.p_behavior[1]] * count, dtype=np.int16)))
+        self._px = np.concatenate((self._px, np.zeros(count, dtype=np.int16)))
+        self._py = np.concatenate((self._py, np.zeros(count, dtype=np.int16)))
+        self._color = np.concatenate((self._color, np.array(spawn_color, dtype=np.uint8)))
+
+    def resize(self, num_particles: int):
+        """
+        Change the number of particles, as ParticleSystem.resize() does.
+
+        Parameters:
+            num_particles (int): The new number of particles.
+
+        Returns:
+            None
+        """
+        count = len(self._x)
+        if num_particles > count:
+            self._spawn(num_particles - count)
+            return
+        for x, y, dx, dy in zip(self._x[num_particles:].tolist(), self._y[num_particles:].tolist(),
+                                self._dx[num_particles:].tolist(), self._dy[num_particles:].tolist()):
+            if self._is_drawn(x, y, dx, dy):
+                self.bitmap[x, y] = 0
+        self._x = self._x[:num_particles]
+        self._y = self._y[:num_particles]
+        self._dx = self._dx[:num_particles]
+        self._dy = self._dy[:num_particles]
+        self._px = self._px[:num_particles]
+        self._py = self._py[:num_particles]
+        self._color = self._color[:num_particles]
+
+    def dirty_area(self, masked: bool = True):
+        """
+        Get the area of the bitmap the last update() wrote to.
+
+        Parameters:
+            masked (bool): False to get the area the update would have written without the occlusion mask.
+
+        Returns:
+            tuple: The area as x1, y1, x2, y2 with x2 and y2 exclusive, or all zeros if nothing was written.
+        """
+        if (self.occlusion is not None and masked) or not len(self._x):
+            return super().dirty_area(masked)
+        # Every previous position is erased, and the new positions of the particles staying in the system are drawn
+        x1 = int(np.min(self._px))
+        y1 = int(np.min(self._py))
+        x2 = int(np.max(self._px)) + 1
+        y2 = int(np.max(self._py)) + 1
+        stays = self._stays()
+        drawn_x = self._x[stays]
+        if len(drawn_x):
+            drawn_y = self._y[stays]
+            x1 = min(x1, int(np.min(drawn_x)))
+            y1 = min(y1, int(np.min(drawn_y)))
+            x2 = max(x2, int(np.max(drawn_x)) + 1)
+            y2 = max(y2, int(np.max(drawn_y)) + 1)
+        return x1, y1, x2, y2
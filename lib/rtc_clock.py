@@ -0,0 +1,127 @@
+# SPDX-License-Identifier: MIT
+
+import time
+from adafruit_ticks import ticks_ms, ticks_diff
+
+# Longest time in milliseconds the clock will interpolate before re-reading the RTC.
+# Keeps (elapsed ms * 1000) inside a small int so now() does not allocate.
+MAX_SYNC_MS = 900000
+
+# Nominal number of local ticks_ms milliseconds in 1000 RTC seconds
+NOMINAL_MS_PER_KS = 1000000
+
+# The largest drift correction we believe, 2% either way. Anything beyond this is the RTC being set, not drift.
+MAX_DRIFT_MS_PER_KS = 20000
+
+# Shortest baseline in seconds before a drift correction is computed. RTC reads are whole seconds, so a baseline is
+# only known to a second either way: after two days that is 6 ppm, under the 20 ppm or more of the crystals it corrects
+MIN_DRIFT_BASELINE = 172800
+
+# A difference larger than this many seconds at sync means the RTC was set and the drift baseline restarts
+MAX_SYNC_ERROR = 5
+
+class RTCClock:
+    """
+    A software clock that reads a real time clock once and interpolates between reads with adafruit_ticks.
+    Epoch seconds are past 2**30, so they are long ints on the device. seconds() counts from base instead and stays
+    a small int, so it never allocates; now() adds base back for the few uses that need the epoch.
+
+    Attributes:
+        rtc: The real time clock, any object with a datetime attribute such as adafruit_pcf8523.PCF8523.
+        base (int): Epoch seconds read from the RTC at the first sync, where seconds() counts from.
+        epoch (int): Epoch seconds read from the RTC at the last sync.
+        sync_ms (int): Milliseconds between reads of the RTC.
+        ms_per_ks (int): Measured local milliseconds per 1000 RTC seconds, used for drift correction.
+        last_error (int): Interpolated time minus RTC time in seconds at the last sync.
+        max_error (int): The largest absolute last_error seen since the drift baseline started.
+        syncs (int): The number of times the RTC has been read.
+    """
+    def __init__(self, rtc, sync_interval: int = 300):
+        """
+        Initializes the clock and reads the RTC for the first time.
+
+        Parameters:
+            rtc: The real time clock, any object with a datetime attribute.
+            sync_interval (int): Seconds between reads of the RTC, at most 900.
+        """
+        self.rtc = rtc
+        self.sync_ms = min(sync_interval * 1000, MAX_SYNC_MS)
+        self.ms_per_ks = NOMINAL_MS_PER_KS
+        self.last_error = 0
+        self.max_error = 0
+        self.syncs = 0
+        self.base = 0
+        self.epoch = 0
+        self._seconds = 0
+        self._ticks = 0
+        self._base_epoch = 0
+        self._base_ms = 0
+        self.sync()
+
+    def sync(self):
+        """
+        Read the RTC, measure the interpolation error and update the drift correction.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        now_ticks = ticks_ms()
+        rtc_epoch = int(time.mktime(self.rtc.datetime))
+
+        if self.syncs == 0:
+            self.base = rtc_epoch
+            self._base_epoch = rtc_epoch
+        else:
+            elapsed_ms = ticks_diff(now_ticks, self._ticks)
+            self.last_error = self._seconds + elapsed_ms * 1000 // self.ms_per_ks - (rtc_epoch - self.base)
+            if abs(self.last_error) > MAX_SYNC_ERROR:
+                # The RTC was set or the ticks wrapped, start measuring drift again
+                self._base_epoch = rtc_epoch
+                self._base_ms = 0
+                self.max_error = 0
+            else:
+                self._base_ms += elapsed_ms
+                self.max_error = max(self.max_error, abs(self.last_error))
+                baseline = rtc_epoch - self._base_epoch
+                if baseline >= MIN_DRIFT_BASELINE:
+                    ms_per_ks = self._base_ms * 1000 // baseline
+                    if abs(ms_per_ks - NOMINAL_MS_PER_KS) <= MAX_DRIFT_MS_PER_KS:
+                        self.ms_per_ks = ms_per_ks
+
+        self.epoch = rtc_epoch
+        self._seconds = rtc_epoch - self.base
+        self._ticks = now_ticks
+        self.syncs += 1
+
+    def seconds(self) -> int:
+        """
+        Get the current time as seconds since base, reading the RTC only if the sync interval has passed.
+        Between syncs this does not allocate.
+
+        Parameters:
+            None
+
+        Returns:
+            int: Seconds since base.
+        """
+        elapsed_ms = ticks_diff(ticks_ms(), self._ticks)
+        if elapsed_ms >= self.sync_ms:
+            self.sync()
+            return self._seconds
+        return self._seconds + elapsed_ms * 1000 // self.ms_per_ks
+
+    def now(self) -> int:
+        """
+        Get the current time, reading the RTC only if the sync interval has passed.
+        The result is a long int on the device, use seconds() where a difference will do.
+
+        Parameters:
+            None
+
+        Returns:
+            int: Seconds since the unix epoch.
+        """
+        return self.base + self.seconds()
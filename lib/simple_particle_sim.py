@@ -1,8 +1,12 @@
 # SPDX-License-Identifier: MIT
 
 import displayio
+import bitmaptools
 import random
 
+# Pixel value arrayblit leaves alone, used for the pixels a particle jumps over in one update
+SKIP = 0xFF
+
 class Particle:
     """
     A helper class representing individual particles in a particle system.
@@ -14,8 +18,9 @@ class Particle:
         dy (int): The y axis velocity in pixels per update.
         px (int): The previous screen space x position in pixels.
         py (int): The previous screen space y position in pixels.
+        color (int): The palette slot the particle is drawn with.
     """
-    def __init__(self, x: int, y: int, dx: int, dy: int):
+    def __init__(self, x: int, y: int, dx: int, dy: int, color: int = 1):
         """
         Initializes a simple monochrome particle, displayed as a pixel.
  
@@ -24,6 +29,7 @@ class Particle:
             y (int): The screen space y position in pixels.
             dx (int): The x axis velocity in pixels per update.
             dy (int): The y axis velocity in pixels per update.
+            color (int): The palette slot the particle is drawn with.
         """
         self.px = 0
         self.py = 0
@@ -31,6 +37,7 @@ class Particle:
         self.y = y
         self.dx = dx 
         self.dy = dy
+        self.color = color
     
     def move(self):
         """
@@ -65,8 +72,12 @@ class ParticleSystem(displayio.TileGrid):
     Attributes:
         num_particles (int): The number of particles in the particle system.
         p_behavior (list): A list of two elements that are used to define the x and y velocity of particles in pixels.
+        colors (int): The number of palette slots particles are drawn with, slot 0 is the background.
+        bulk (bool): True if horizontal moves are drawn with one bitmaptools.arrayblit instead of two pixel writes.
+        occlusion (OcclusionMask): If set, pixels it marks as hidden behind other layers are not written. None by default.
+        occluded (int): The number of pixel writes the last update() skipped because they were hidden.
     """
-    def __init__(self, num_particles: int, system_height: int, system_width: int, min_dx: int, min_dy: int, max_dx: int, max_dy: int, start_x: int, start_y: int, rand_x: bool = False, rand_y: bool = False):
+    def __init__(self, num_particles: int, system_height: int, system_width: int, min_dx: int, min_dy: int, max_dx: int, max_dy: int, start_x: int, start_y: int, rand_x: bool = False, rand_y: bool = False, colors: int = 1, bulk: bool = False):
         """
         Initializes a TileGrid that contains the particles and updates them.
  
@@ -82,14 +93,23 @@ class ParticleSystem(displayio.TileGrid):
             start_y (int):
             rand_x (bool):
             rand_y (bool):
+            colors (int): The number of palette slots to spread particles over, so effects like palette_fx.Twinkle can animate them.
+            bulk (bool): Draw horizontal moves with one bitmaptools.arrayblit each. The result is the same as pixel writes.
 
         """
-        bitmap = displayio.Bitmap(system_width, system_height, 2)
+        bitmap = displayio.Bitmap(system_width, system_height, colors + 1)
         self.system_width = system_width
         self.system_height = system_height
-        palette = displayio.Palette(2)
+        self.colors = colors
+        self.bulk = bulk
+        self.occlusion = None
+        self.occluded = 0
+        self._next_color = 0
+        self._spans = {}
+        palette = displayio.Palette(colors + 1)
         palette[0] = 0x000000  # Background color (black)
-        palette[1] = 0xFFFFFF  # Particle color (white)
+        for color in range(1, colors + 1):
+            palette[color] = 0xFFFFFF  # Particle color (white)
 
         # Initialize the TileGrid using super()
         super().__init__(bitmap, pixel_shader=palette)
@@ -118,6 +138,22 @@ class ParticleSystem(displayio.TileGrid):
         
         self.p_behavior = min_dx, max_dx, min_dy, max_dy
 
+        for particle in self.particles:
+            particle.color = self.next_color()
+
+    def next_color(self) -> int:
+        """
+        Get the palette slot for the next particle to spawn. Slots are handed out in turn so each is used equally.
+
+        Parameters:
+            None
+
+        Returns:
+            int: The palette slot, from 1 to colors.
+        """
+        self._next_color = self._next_color % self.colors + 1
+        return self._next_color
+
     def update(self):
         """
         Update each particle in the particle system, calling each particle's move() function. 
@@ -129,6 +165,15 @@ class ParticleSystem(displayio.TileGrid):
         Returns:
             None
         """
+        if self.occlusion is not None:
+            # Bring the mask up to date with the layers in front first, in case they moved since the last frame
+            self.occlusion.update()
+            self._update_occluded(self.occlusion.bitmap)
+            return
+        if self.bulk:
+            self._update_bulk()
+            return
+
         for particle in self.particles:
             particle.move()
             if particle.x + particle.dx < 0 or particle.y + particle.dy < 0:
@@ -136,9 +181,70 @@ class ParticleSystem(displayio.TileGrid):
             elif particle.x + particle.dx > (self.system_width - 1) or particle.y + particle.dy > (self.system_height - 1):
                 self.bitmap[particle.px, particle.py] = 0
             else:
-                self.bitmap[particle.x, particle.y] = 1
+                self.bitmap[particle.x, particle.y] = particle.color
                 self.bitmap[particle.px, particle.py] = 0
 
+    def _span(self, dx: int, color: int) -> bytearray:
+        # A row of pixels covering one horizontal move: the new position drawn, the old one erased and the rest skipped
+        key = dx * 256 + color
+        span = self._spans.get(key)
+        if span is None:
+            span = bytearray([SKIP]) * (abs(dx) + 1)
+            if dx < 0:
+                span[0] = color
+                span[-1] = 0
+            else:
+                span[0] = 0
+                span[-1] = color
+            self._spans[key] = span
+        return span
+
+    def _update_bulk(self):
+        bitmap = self.bitmap
+        for particle in self.particles:
+            particle.move()
+            if particle.x + particle.dx < 0 or particle.y + particle.dy < 0:
+                bitmap[particle.px, particle.py] = 0
+            elif particle.x + particle.dx > (self.system_width - 1) or particle.y + particle.dy > (self.system_height - 1):
+                bitmap[particle.px, particle.py] = 0
+            elif particle.dy or not particle.dx:
+                bitmap[particle.x, particle.y] = particle.color
+                bitmap[particle.px, particle.py] = 0
+            else:
+                # The erase and the draw are on the same row, so they go to the core as one call
+                span = self._span(particle.dx, particle.color)
+                x1 = particle.x if particle.dx < 0 else particle.px
+                bitmaptools.arrayblit(bitmap, span, x1, particle.y, x1 + len(span), particle.y + 1, SKIP)
+
+    def _update_occluded(self, mask):
+        # The same as the other update paths, except pixels hidden by the mask are skipped
+        bitmap = self.bitmap
+        occluded = 0
+        for particle in self.particles:
+            particle.move()
+            if particle.x + particle.dx < 0 or particle.y + particle.dy < 0 or particle.x + particle.dx > (self.system_width - 1) or particle.y + particle.dy > (self.system_height - 1):
+                if mask[particle.px, particle.py]:
+                    bitmap[particle.px, particle.py] = 0
+                else:
+                    occluded += 1
+                continue
+            draw = mask[particle.x, particle.y]
+            erase = mask[particle.px, particle.py]
+            if draw and erase and self.bulk and particle.dx and not particle.dy:
+                span = self._span(particle.dx, particle.color)
+                x1 = particle.x if particle.dx < 0 else particle.px
+                bitmaptools.arrayblit(bitmap, span, x1, particle.y, x1 + len(span), particle.y + 1, SKIP)
+                continue
+            if draw:
+                bitmap[particle.x, particle.y] = particle.color
+            else:
+                occluded += 1
+            if erase:
+                bitmap[particle.px, particle.py] = 0
+            else:
+                occluded += 1
+        self.occluded = occluded
+
     def remove_out_of_bounds(self):
         """
         Check if each particle is out of bounds, and if so remove them from the system.
@@ -152,7 +258,63 @@ class ParticleSystem(displayio.TileGrid):
         num_stale_particles = len(self.particles)
         self.particles = [particle for particle in self.particles if not (particle.is_out_of_bounds(self.system_width, self.system_height)[0] or particle.is_out_of_bounds(self.system_width, self.system_height)[1])]
         for dead_particle in range(0,num_stale_particles-len(self.particles)):
-            self.particles.append(Particle(self.system_width - 1, random.randint(0, self.system_height - 1), self.p_behavior[0], self.p_behavior[1]))
+            self.particles.append(Particle(self.system_width - 1, random.randint(0, self.system_height - 1), self.p_behavior[0], self.p_behavior[1], self.next_color()))
+
+    def _is_drawn(self, x: int, y: int, dx: int, dy: int) -> bool:
+        # A particle is on screen at x, y if its last update drew it there, and the occlusion mask let it
+        if not (0 <= x + dx < self.system_width and 0 <= y + dy < self.system_height and 0 <= x < self.system_width and 0 <= y < self.system_height):
+            return False
+        return self.occlusion is None or self.occlusion.bitmap[x, y]
+
+    def resize(self, num_particles: int):
+        """
+        Change the number of particles, for example when a frame_governor.FrameGovernor changes quality level.
+        Particles removed are erased from the bitmap, new ones spawn at the right edge like respawned particles.
+
+        Parameters:
+            num_particles (int): The new number of particles.
+
+        Returns:
+            None
+        """
+        while len(self.particles) > num_particles:
+            particle = self.particles.pop()
+            if self._is_drawn(particle.x, particle.y, particle.dx, particle.dy):
+                self.bitmap[particle.x, particle.y] = 0
+        while len(self.particles) < num_particles:
+            self.particles.append(Particle(self.system_width - 1, random.randint(0, self.system_height - 1), self.p_behavior[0], self.p_behavior[1], self.next_color()))
+
+    def dirty_area(self, masked: bool = True):
+        """
+        Get the area of the bitmap the last update() wrote to.
+
+        Parameters:
+            masked (bool): False to get the area the update would have written without the occlusion mask.
+
+        Returns:
+            tuple: The area as x1, y1, x2, y2 with x2 and y2 exclusive, or all zeros if nothing was written.
+        """
+        x1 = self.system_width
+        y1 = self.system_height
+        x2 = 0
+        y2 = 0
+        mask = self.occlusion.bitmap if self.occlusion is not None and masked else None
+        for particle in self.particles:
+            # The previous position is always erased, the new one is drawn unless the next move leaves the system.
+            # Neither is written where the occlusion mask hides it.
+            if mask is None or mask[particle.px, particle.py]:
+                x1 = min(x1, particle.px)
+                x2 = max(x2, particle.px + 1)
+                y1 = min(y1, particle.py)
+                y2 = max(y2, particle.py + 1)
+            if 0 <= particle.x + particle.dx < self.system_width and 0 <= particle.y + particle.dy < self.system_height and (mask is None or mask[particle.x, particle.y]):
+                x1 = min(x1, particle.x)
+                x2 = max(x2, particle.x + 1)
+                y1 = min(y1, particle.y)
+                y2 = max(y2, particle.y + 1)
+        if x2 <= x1 or y2 <= y1:
+            return 0, 0, 0, 0
+        return x1, y1, x2, y2
 
     def print_particle_list(self):
         """
@@ -0,0 +1,240 @@
+# SPDX-License-Identifier: MIT
+
+import struct
+import displayio
+import bitmaptools
+
+class TileProvider:
+    """
+    Streams tiles of an 8 bit uncompressed BMP sprite sheet from flash into a small cache bitmap, instead of loading
+    the whole sheet into RAM. A cache slot is pinned while any StreamedTileGrid shows it, and the least recently
+    used unpinned slot is reused when a tile that is not cached is needed.
+
+    Attributes:
+        bitmap (displayio.Bitmap): The cache, one row of slots each one tile in size.
+        palette (displayio.Palette): The sprite sheet palette.
+        tile_width (int): Width of a tile in pixels.
+        tile_height (int): Height of a tile in pixels.
+        slots (int): The number of tiles the cache holds.
+        tile_count (int): The number of tiles in the sprite sheet.
+        loads (int): The number of tiles read from flash.
+        hits (int): The number of tile requests served from the cache.
+    """
+    def __init__(self, path: str, tile_width: int, tile_height: int, slots: int = 16):
+        """
+        Initializes the provider, reading the sheet header and palette but none of its pixels.
+
+        Parameters:
+            path (str): The sprite sheet, an 8 bit per pixel uncompressed BMP.
+            tile_width (int): Width of a tile in pixels.
+            tile_height (int): Height of a tile in pixels.
+            slots (int): The number of tiles the cache holds.
+        """
+        self._file = open(path, "rb")
+        header = self._file.read(54)
+        if header[0:2] != b"BM":
+            raise ValueError("not a BMP file: " + path)
+        self._data_offset = struct.unpack_from("<I", header, 10)[0]
+        header_size, width, height, _, bits_per_pixel, compression = struct.unpack_from("<IiiHHI", header, 14)
+        colors = struct.unpack_from("<I", header, 46)[0] or 256
+        if bits_per_pixel != 8 or compression != 0:
+            raise ValueError("only 8 bit uncompressed BMP sprite sheets can be streamed")
+
+        self._file.seek(14 + header_size)
+        table = self._file.read(4 * colors)
+        self.palette = displayio.Palette(colors)
+        for index in range(colors):
+            blue, green, red = table[4 * index:4 * index + 3]
+            self.palette[index] = red << 16 | green << 8 | blue
+
+        # BMP rows are padded to 4 bytes and stored bottom up unless the height is negative
+        self._sheet_width = width
+        self._sheet_height = abs(height)
+        self._bottom_up = height > 0
+        self._stride = (width + 3) & ~3
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self._columns = width // tile_width
+        self.tile_count = self._columns * (self._sheet_height // tile_height)
+
+        self.slots = slots
+        self.bitmap = displayio.Bitmap(slots * tile_width, tile_height, colors)
+        self.loads = 0
+        self.hits = 0
+        self._buffer = bytearray(tile_width * tile_height)
+        self._slot_of = {}
+        self._tile_in = [None] * slots
+        self._users = [0] * slots
+        self._last_used = [0] * slots
+        self._clock = 0
+
+    def _load(self, tile: int, slot: int):
+        source_x = (tile % self._columns) * self.tile_width
+        source_y = (tile // self._columns) * self.tile_height
+        buffer = memoryview(self._buffer)
+        width = self.tile_width
+        for row in range(self.tile_height):
+            y = source_y + row
+            if self._bottom_up:
+                y = self._sheet_height - 1 - y
+            self._file.seek(self._data_offset + y * self._stride + source_x)
+            self._file.readinto(buffer[row * width:(row + 1) * width])
+        x1 = slot * width
+        bitmaptools.arrayblit(self.bitmap, self._buffer, x1, 0, x1 + width, self.tile_height)
+        self.loads += 1
+
+    def acquire(self, tile: int) -> int:
+        """
+        Get the cache slot holding a tile, reading it from flash if needed, and pin it until it is released.
+
+        Parameters:
+            tile (int): The tile index in the sprite sheet.
+
+        Returns:
+            int: The cache slot, which is also the tile index to use in a TileGrid of bitmap.
+        """
+        if not 0 <= tile < self.tile_count:
+            raise ValueError("tile index out of bounds")
+        self._clock += 1
+        slot = self._slot_of.get(tile)
+        if slot is not None:
+            self.hits += 1
+        else:
+            # Reuse the least recently used slot nothing is showing
+            slot = None
+            for candidate in range(self.slots):
+                if self._users[candidate] == 0 and (slot is None or self._last_used[candidate] < self._last_used[slot]):
+                    slot = candidate
+            if slot is None:
+                raise RuntimeError("tile cache is full, every slot is on screen")
+            old_tile = self._tile_in[slot]
+            if old_tile is not None:
+                # The slot is empty until the load finishes, so a failed read leaves no tile pointing at half a tile
+                del self._slot_of[old_tile]
+                self._tile_in[slot] = None
+            self._load(tile, slot)
+            self._tile_in[slot] = tile
+            self._slot_of[tile] = slot
+        self._users[slot] += 1
+        self._last_used[slot] = self._clock
+        return slot
+
+    def release(self, tile: int):
+        """
+        Unpin a tile acquired earlier. It stays cached until its slot is needed for another tile.
+
+        Parameters:
+            tile (int): The tile index in the sprite sheet.
+
+        Returns:
+            None
+        """
+        slot = self._slot_of[tile]
+        self._users[slot] -= 1
+        self._last_used[slot] = self._clock
+
+    def close(self):
+        """
+        Close the sprite sheet file. No more tiles can be loaded.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        self._file.close()
+
+
+class StreamedTileGrid(displayio.TileGrid):
+    """
+    A kind of Adafruit displayio TileGrid showing tiles of a TileProvider. Tiles are set by their sprite sheet index
+    with set_tile(), and the grid is pointed at the cache slot holding each one.
+
+    Attributes:
+        provider (TileProvider): Where the tiles come from.
+    """
+    def __init__(self, provider: TileProvider, *, width: int = 1, height: int = 1, tiles: tuple = None, x: int = 0, y: int = 0):
+        """
+        Initializes the TileGrid over the provider cache.
+
+        Parameters:
+            provider (TileProvider): Where the tiles come from.
+            width (int): Width of the grid in tiles.
+            height (int): Height of the grid in tiles.
+            tiles (tuple): Sprite sheet tile indexes to fill the grid with, row by row. Cells left unset show cache slot 0.
+            x (int): The x position in pixels.
+            y (int): The y position in pixels.
+        """
+        super().__init__(provider.bitmap, pixel_shader=provider.palette, width=width, height=height,
+                         tile_width=provider.tile_width, tile_height=provider.tile_height, x=x, y=y)
+        self.provider = provider
+        self._sheet_tiles = [None] * (width * height)
+        if tiles is not None:
+            for index, tile in enumerate(tiles):
+                self.set_tile(index, tile)
+
+    @property
+    def tile_version(self) -> int:
+        """Changes whenever the provider loads a tile, since cache slots can then hold different pixels."""
+        return self.provider.loads
+
+    def set_tile(self, index: int, tile: int):
+        """
+        Show a sprite sheet tile in a cell of the grid.
+
+        Parameters:
+            index (int): The cell, counted row by row.
+            tile (int): The tile index in the sprite sheet.
+
+        Returns:
+            None
+        """
+        old = self._sheet_tiles[index]
+        if old == tile:
+            return
+        # Unpin the old tile first, so its slot can take the new one if the cache is full
+        if old is not None:
+            self.provider.release(old)
+            self._sheet_tiles[index] = None
+        try:
+            slot = self.provider.acquire(tile)
+        except Exception as error:
+            # Pin the old tile again, so the cell keeps showing it and its pin is not released twice later. If that
+            # fails too the cell is left unset, and the first error is the one raised.
+            if old is not None:
+                try:
+                    self[index] = self.provider.acquire(old)
+                    self._sheet_tiles[index] = old
+                except Exception:
+                    pass
+            raise error
+        self[index] = slot
+        self._sheet_tiles[index] = tile
+
+    def get_tile(self, index: int) -> int:
+        """
+        Get the sprite sheet tile shown in a cell of the grid.
+
+        Parameters:
+            index (int): The cell, counted row by row.
+
+        Returns:
+            int: The tile index in the sprite sheet, or None if the cell was never set.
+        """
+        return self._sheet_tiles[index]
+
+    def release_tiles(self):
+        """
+        Unpin every tile of the grid, when it is no longer shown.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        for index, tile in enumerate(self._sheet_tiles):
+            if tile is not None:
+                self.provider.release(tile)
+                self._sheet_tiles[index] = None
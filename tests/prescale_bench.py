@@ -0,0 +1,91 @@
+# SPDX-License-Identifier: MIT
+
+import gc
+import time
+import board
+import displayio
+import adafruit_imageload
+import asset_cache
+from adafruit_hx8357 import HX8357
+
+# Release any resources currently in use for the displays
+displayio.release_displays()
+
+# Constants
+TILE_WIDTH = 16 # Width of single tile in pixels
+TILE_HEIGHT = 16 # Height of single tile in pixels
+SCREEN_WIDTH = 480 # Width of screen in pixels
+SCREEN_HEIGHT = 320 # Width of height in pixels
+PLANET_SCALE = 4 # Scaling factor for planet group
+REFRESHES = 20 # Full screen refreshes timed for each setup
+CACHE_PATH = "/planet_tiles.bin" # The cache file code.py uses
+
+# Component Pins
+spi = board.SPI()
+tft_cs = board.D24
+tft_dc = board.D25
+rst = board.D7
+display_bus = displayio.FourWire(spi, command=tft_dc, chip_select=tft_cs, reset=rst)
+
+# Component objects
+display = HX8357(display_bus, width=480, height=320, rotation=180)
+display.auto_refresh = False
+
+art_sprite, art_palette = adafruit_imageload.load("art/sprite_sheet.bmp", bitmap=displayio.Bitmap, palette=displayio.Palette)
+art_palette.make_transparent(0)
+
+# A black background, marked dirty before each refresh so the whole screen is composited every time
+background = displayio.Bitmap(SCREEN_WIDTH, SCREEN_HEIGHT, 1)
+background_palette = displayio.Palette(1)
+background_palette[0] = 0x000000
+
+def planet_scene():
+    # The planets as code.py sets them up
+    earth = displayio.TileGrid(art_sprite, pixel_shader=art_palette, width=2, height=2, tile_width=TILE_WIDTH, tile_height=TILE_HEIGHT)
+    moon = displayio.TileGrid(art_sprite, pixel_shader=art_palette, width=2, height=2, tile_width=TILE_WIDTH, tile_height=TILE_HEIGHT)
+    for index in range(4):
+        earth[index] = index
+        moon[index] = 4 + index
+    planet_group = displayio.Group()
+    planet_group.append(earth)
+    planet_group.append(moon)
+    moon.x = int((SCREEN_WIDTH / PLANET_SCALE) - (moon.width * TILE_WIDTH))
+    planet_group.y = int(SCREEN_HEIGHT - (earth.height * TILE_HEIGHT * PLANET_SCALE))
+    planet_group.scale = PLANET_SCALE
+    return planet_group
+
+def time_refresh(planet_group):
+    root = displayio.Group()
+    root.append(displayio.TileGrid(background, pixel_shader=background_palette))
+    root.append(planet_group)
+    display.show(root)
+    display.refresh()
+    total_ns = 0
+    for _ in range(REFRESHES):
+        background.dirty()
+        start = time.monotonic_ns()
+        display.refresh()
+        total_ns += time.monotonic_ns() - start
+    display.show(None)
+    return total_ns // REFRESHES // 1000
+
+# Group scaling, as before
+gc.collect()
+free = gc.mem_free()
+scaled = planet_scene()
+gc.collect()
+print("scaled group     refresh us: {: >8} RAM: {: >6}".format(time_refresh(scaled), free - gc.mem_free()))
+del scaled
+
+# Pre-scaled tiles, built at boot and then loaded from the cache file. The first run writes the cache file,
+# so run it twice to time loading it
+for path, name in ((None, "prescaled built "), (CACHE_PATH, "prescaled cached")):
+    gc.collect()
+    free = gc.mem_free()
+    prescaled = planet_scene()
+    start = time.monotonic_ns()
+    asset_cache.prescale_group(prescaled, path)
+    setup_us = (time.monotonic_ns() - start) // 1000
+    gc.collect()
+    print("{} refresh us: {: >8} RAM: {: >6} setup us: {: >8}".format(name, time_refresh(prescaled), free - gc.mem_free(), setup_us))
+    del prescaled
@@ -0,0 +1,33 @@
+# SPDX-License-Identifier: MIT
+
+import time
+import board
+import busio
+import adafruit_pcf8523
+import rtc_clock
+
+# Constants
+SYNC_INTERVAL = 60 # Seconds between RTC reads by the software clock, short so drift shows up quickly
+CHECK_INTERVAL = 10 # Seconds between comparisons against the RTC
+
+# Component Pins
+i2c = busio.I2C(board.SCL, board.SDA)
+
+# Component objects
+rtc = adafruit_pcf8523.PCF8523(i2c)
+clock = rtc_clock.RTCClock(rtc, SYNC_INTERVAL)
+
+# Compare the software clock against a direct RTC read, and time how long each takes
+while True:
+    start = time.monotonic_ns()
+    soft = clock.now()
+    soft_ns = time.monotonic_ns() - start
+
+    start = time.monotonic_ns()
+    hard = int(time.mktime(rtc.datetime))
+    hard_ns = time.monotonic_ns() - start
+
+    print("clock: {: >12} rtc: {: >12} diff: {: >3} clock us: {: >6} rtc us: {: >6} ms/ks: {: >8} last error: {: >3} max error: {: >3} syncs: {: >5}".format(
+        soft, hard, soft - hard, soft_ns // 1000, hard_ns // 1000, clock.ms_per_ks, clock.last_error, clock.max_error, clock.syncs))
+
+    time.sleep(CHECK_INTERVAL)